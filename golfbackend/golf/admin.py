@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from golf.models import GolfBoxCookie, GolfClub, GolfCourse, SearchQuery, TeeTime
+from golf.models import (
+    ClubDailyAvailability,
+    GolfBoxCookie,
+    GolfClub,
+    GolfCourse,
+    GridPageFingerprint,
+    SearchQuery,
+    TeeTime,
+)
 
 
 class GolfCourseInline(admin.TabularInline):
@@ -64,3 +72,5 @@ class GolfCourseAdmin(admin.ModelAdmin):
 
 admin.site.register(GolfBoxCookie)
 admin.site.register(SearchQuery)
+admin.site.register(GridPageFingerprint)
+admin.site.register(ClubDailyAvailability)
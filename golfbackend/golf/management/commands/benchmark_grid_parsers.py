@@ -0,0 +1,101 @@
+from django.core.management.base import (
+    BaseCommand,
+)
+import logging
+import random
+import time
+from golf.utils.grid_parsers import GRID_CLASS, GRID_PARSERS, PRICE_CONTAINER_CLASS
+
+logger = logging.getLogger("default")
+
+
+class Command(BaseCommand):
+    help = "Compare parse time per booking grid page across the grid parser backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            action="append",
+            default=[],
+            help="Saved GolfBox grid page to parse, can be given several times "
+            "(default: a generated page)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Number of times each page is parsed per backend (default: 50)",
+        )
+        parser.add_argument(
+            "--slots",
+            type=int,
+            default=80,
+            help="Number of timeslots on the generated page (default: 80)",
+        )
+
+    def handle(self, *args, **options):
+        pages = []
+        for path in options["file"]:
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+        if not pages:
+            pages.append(create_sample_grid_page(options["slots"]))
+
+        # Silence the per-node warnings of the html.parser backend while timing
+        logging.getLogger("default").setLevel(logging.ERROR)
+        expected = [GRID_PARSERS["html.parser"](page) for page in pages]
+        iterations = options["iterations"]
+        baseline = None
+        for name, parse in GRID_PARSERS.items():
+            start = time.perf_counter()
+            for _ in range(iterations):
+                results = [parse(page) for page in pages]
+            elapsed = time.perf_counter() - start
+            ms_per_page = elapsed * 1000 / (iterations * len(pages))
+            baseline = baseline or ms_per_page
+            matches = results == expected
+            line = (
+                f"{name:<12} {ms_per_page:8.3f} ms/page  "
+                f"{baseline / ms_per_page:5.1f}x  "
+                f"{'output matches html.parser' if matches else 'OUTPUT DIFFERS'}"
+            )
+            self.stdout.write(
+                self.style.SUCCESS(line) if matches else self.style.ERROR(line)
+            )
+
+
+def create_sample_grid_page(slots: int) -> str:
+    """
+    Builds a page shaped like a GolfBox booking grid, with some navigation around it.
+    """
+    rows = []
+    for index in range(slots):
+        hour, minute = divmod(7 * 60 + index * 10, 60)
+        availability = random.choice(["free", "c_partfree", "full", "blocking"])
+        players = "".join(
+            f'<div class="player"><span>Player {n}</span></div>'
+            for n in range(random.randint(0, 4))
+        )
+        timecell = (
+            ""
+            if availability == "blocking"
+            else f'<div class="timecell"> {hour:02d}:{minute:02d} </div>'
+        )
+        rows.append(
+            f'<div class="time {availability}" data-index="{index}">\n'
+            f'  <div class="d-flex">{timecell}</div>\n'
+            f'  <div class="time-players">{players}</div>\n'
+            f'  <div class="{PRICE_CONTAINER_CLASS}">'
+            f'<i class="icon"></i><div class="ymPrice"> {random.randint(3, 9)}50,- </div>'
+            "</div>\n</div>"
+        )
+    navigation = "".join(
+        f'<li><a href="/site/{n}">Menu item {n}</a></li>' for n in range(200)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>GolfBox</title></head><body>"
+        f'<div class="nav"><ul>{navigation}</ul></div>'
+        f'<div class="{GRID_CLASS}">\n'
+        + "\n".join(rows)
+        + f'</div><div class="footer"><ul>{navigation}</ul></div></body></html>'
+    )
@@ -0,0 +1,79 @@
+from django.core.management.base import (
+    BaseCommand,
+)
+import json
+import time
+from rest_framework.utils.encoders import JSONEncoder
+from golf.models import TeeTime
+from golf.serializers import (
+    TeeTimeSerializer,
+    get_tee_time_rows,
+    serialize_tee_time_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost per tee time of TeeTimeSerializer and the .values() based "
+        "serializer used by the list endpoints, on tee times in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=500,
+            help="Number of tee times serialized per iteration (default: 500)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of times the tee times are serialized (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        iterations = options["iterations"]
+        queryset = TeeTime.objects.order_by("time", "id")[:rows]
+        count = queryset.count()
+        if count == 0:
+            self.stdout.write(
+                self.style.ERROR(
+                    "No tee times found. Run scrape_tee_times or "
+                    "create_fake_tee_times first."
+                )
+            )
+            return
+
+        def model_serializer():
+            return TeeTimeSerializer(
+                queryset.select_related("golf_course", "golf_course__golf_club"),
+                many=True,
+            ).data
+
+        def row_serializer():
+            return serialize_tee_time_rows(get_tee_time_rows(queryset))
+
+        expected = json.dumps(model_serializer(), cls=JSONEncoder)
+        baseline = None
+        for name, serialize in [
+            ("TeeTimeSerializer", model_serializer),
+            ("serialize_tee_time_rows", row_serializer),
+        ]:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                result = serialize()
+            elapsed = time.perf_counter() - start
+            us_per_row = elapsed * 1_000_000 / (iterations * count)
+            baseline = baseline or us_per_row
+            matches = json.dumps(result, cls=JSONEncoder) == expected
+            line = (
+                f"{name:<24} {us_per_row:8.1f} us/row  "
+                f"{baseline / us_per_row:5.1f}x  "
+                f"{'output matches' if matches else 'OUTPUT DIFFERS'}"
+            )
+            self.stdout.write(
+                self.style.SUCCESS(line) if matches else self.style.ERROR(line)
+            )
+        self.stdout.write(f"Timed over {count} tee times, including the query.")
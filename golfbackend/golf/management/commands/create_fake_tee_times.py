@@ -3,6 +3,9 @@ from django.utils import timezone
 from datetime import timedelta
 import random
 from golf.models import GolfCourse, TeeTime
+from golf.utils.ingest import refresh_club_daily_availability
+from golf.utils.local_time import local_date
+from golf.utils.response_cache import bump_data_version
 
 
 class Command(BaseCommand):
@@ -69,10 +72,15 @@ class Command(BaseCommand):
                             price_in_ore=price_in_ore,
                         )
 
+            today = local_date(timezone.now())
+            refresh_club_daily_availability(
+                [course.golf_club_id], today, today + timedelta(days=days)
+            )
             self.stdout.write(
                 self.style.SUCCESS(f"Successfully created tee times for {course.name}")
             )
 
+        bump_data_version()
         self.stdout.write(
             self.style.SUCCESS(
                 f"Successfully created fake tee times for {num_courses} courses over {days} days"
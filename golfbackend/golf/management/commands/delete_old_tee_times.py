@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
-from golf.models import TeeTime
+from golf.models import ClubDailyAvailability, TeeTime
+from golf.utils.ingest import refresh_club_daily_availability
+from golf.utils.local_time import local_date
+from golf.utils.response_cache import bump_data_version
 from django.utils import timezone
 import logging
 
@@ -14,8 +17,19 @@ class Command(BaseCommand):
         old_tee_times = TeeTime.objects.filter(time__lt=now)
         count = old_tee_times.count()
 
+        # Past days leave the availability rollup, today loses the passed tee times
+        today = local_date(now)
+        ClubDailyAvailability.objects.filter(date__lt=today).delete()
+
         if count > 0:
+            club_ids = list(
+                old_tee_times.values_list("golf_course__golf_club_id", flat=True)
+                .order_by()
+                .distinct()
+            )
             old_tee_times.delete()
+            refresh_club_daily_availability(club_ids, today, today)
+            bump_data_version()
             self.stdout.write(
                 self.style.SUCCESS(f"Successfully deleted {count} old tee times")
             )
@@ -0,0 +1,98 @@
+from django.core.management.base import (
+    BaseCommand,
+)
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from golf.management.commands.scrape_tee_times import create_dates, save_timeslots
+from golf.utils.response_cache import bump_data_version_if_changed
+from golf.utils.scheduler import ScrapeScheduler
+from golf.utils.scrape_engine import get_default_throttle, scrape_course_dates
+
+logger = logging.getLogger("default")
+
+
+class Command(BaseCommand):
+    help = (
+        "Continuously refresh the tee time grid pages that matter most, "
+        "within a fixed request budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests_per_cycle",
+            type=int,
+            default=120,
+            help="Number of grid pages fetched per cycle (default: 120)",
+        )
+        parser.add_argument(
+            "--cycle_seconds",
+            type=int,
+            default=60,
+            help="Length of a scheduling cycle in seconds (default: 60)",
+        )
+        parser.add_argument(
+            "--min_interval_minutes",
+            type=int,
+            default=5,
+            help="Minimum time between two fetches of the same page (default: 5)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=6,
+            help="Number of days ahead to keep fresh (default: 6)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run a single cycle and exit",
+        )
+
+    def handle(self, *args, **options):
+        logger.info("Started scrape scheduler.")
+        throttle = get_default_throttle()
+        scheduler = ScrapeScheduler(
+            min_interval=timedelta(minutes=options["min_interval_minutes"])
+        )
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    run_scheduler_cycle(
+                        scheduler,
+                        budget=options["requests_per_cycle"],
+                        days=options["days"],
+                        throttle=throttle,
+                    )
+                except Exception:
+                    # One failed cycle must not stop the scheduler, the next cycle
+                    # starts over with fresh database connections
+                    logger.exception("Scrape scheduler cycle failed.")
+                if options["once"]:
+                    break
+                elapsed = time.monotonic() - started
+                time.sleep(max(0, options["cycle_seconds"] - elapsed))
+        except KeyboardInterrupt:
+            pass
+        logger.info("Stopped scrape scheduler.")
+
+
+def run_scheduler_cycle(scheduler, budget, days, throttle=None):
+    # Long-running process, drop connections the database may have closed meanwhile
+    close_old_connections()
+    tasks = scheduler.next_tasks(create_dates(days), budget)
+    if not tasks:
+        logger.info("Scrape scheduler: nothing is due for a refresh.")
+        return None
+    summary = scrape_course_dates(
+        tasks,
+        save_timeslots,
+        workers=settings.GOLFBOX_SCRAPE_WORKERS,
+        throttle=throttle,
+    )
+    bump_data_version_if_changed(summary)
+    logger.info(f"Scrape scheduler cycle finished: {summary}")
+    return summary
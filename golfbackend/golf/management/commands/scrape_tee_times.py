@@ -4,9 +4,12 @@ from django.core.management.base import (
 import logging
 from datetime import timedelta
 from django.utils import timezone
-from golf.models import GolfClub, TeeTime
-from golf.utils.scraping import get_timeslots_of_course
-import time
+from golf.models import GolfCourse
+from golf.utils.ingest import upsert_tee_times
+from golf.utils.response_cache import bump_data_version_if_changed
+from golf.utils.scrape_engine import scrape_course_dates
+from golf.utils.throttling import HostThrottle
+from django.conf import settings
 
 logger = logging.getLogger("default")
 
@@ -21,12 +24,54 @@ class Command(BaseCommand):
             default=None,
             help="Number of clubs to scrape (default: all)",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.GOLFBOX_SCRAPE_WORKERS,
+            help=f"Number of concurrent fetch workers (default: {settings.GOLFBOX_SCRAPE_WORKERS})",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.GOLFBOX_REQUESTS_PER_SECOND,
+            help=f"Requests per second per host (default: {settings.GOLFBOX_REQUESTS_PER_SECOND})",
+        )
+        parser.add_argument(
+            "--max_per_host",
+            type=int,
+            default=settings.GOLFBOX_MAX_CONCURRENT_PER_HOST,
+            help=f"Concurrent requests per host (default: {settings.GOLFBOX_MAX_CONCURRENT_PER_HOST})",
+        )
+
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Parse and store every page, even if it is unchanged since last run",
+        )
 
     def handle(self, *args, **options):
         logger.info("Started tee time scraping.")
         number_of_clubs = options.get("number_of_clubs")
-        scrape_tee_times(number_of_clubs=number_of_clubs)
-        logger.info("Tee time scraping finished.")
+        throttle = HostThrottle(
+            rate=options["rate"],
+            burst=settings.GOLFBOX_REQUEST_BURST,
+            max_concurrent=options["max_per_host"],
+        )
+        summary = scrape_tee_times(
+            number_of_clubs=number_of_clubs,
+            workers=options["workers"],
+            throttle=throttle,
+            incremental=not options["full"],
+        )
+        logger.info(f"Tee time scraping finished: {summary}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fetched {summary['pages']} pages: "
+                f"{summary['fingerprint_hits']} unchanged, "
+                f"{summary['fingerprint_misses']} changed, "
+                f"{summary['failed_pages']} failed"
+            )
+        )
 
 
 def create_dates(days=7):
@@ -39,26 +84,37 @@ def create_dates(days=7):
     return dates
 
 
-def scrape_tee_times(number_of_clubs=None):
+def save_timeslots(course, timeslots):
+    counts = upsert_tee_times(course, timeslots)
+    logger.info(
+        f"Scraped {len(timeslots)} tee times for {course.name}: "
+        f"{counts['created']} created, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged"
+    )
+    return counts
+
+
+def scrape_tee_times(
+    number_of_clubs=None, workers=None, throttle=None, incremental=True
+):
     relevant_dates = create_dates(6)
-    clubs_qs = GolfClub.objects.filter(disabled=False).prefetch_related("golf_courses")
+    courses_qs = GolfCourse.objects.filter(golf_club__disabled=False).select_related(
+        "golf_club"
+    )
     if number_of_clubs is not None:
-        clubs_qs = clubs_qs[:number_of_clubs]
-    for club in clubs_qs:
-        for course in club.golf_courses.all():
-            timeslots = get_timeslots_of_course(
-                course.course_id, club.club_id, course.name, relevant_dates
-            )
-            for timeslot in timeslots:
-                TeeTime.objects.update_or_create(
-                    time=timeslot.get("time"),
-                    golf_course=course,
-                    defaults={
-                        "availability": timeslot.get("availability"),
-                        "available_spots": timeslot.get("available_spots"),
-                        "expired": timeslot.get("expired"),
-                        "price_in_ore": timeslot.get("price_in_ore"),
-                    },
-                )
-        logger.info(f"Scraped {len(timeslots)} tee times for {club.name}")
-        time.sleep(1)
+        club_pks = (
+            courses_qs.order_by("golf_club_id")
+            .values_list("golf_club_id", flat=True)
+            .distinct()[:number_of_clubs]
+        )
+        courses_qs = courses_qs.filter(golf_club_id__in=list(club_pks))
+    tasks = [(course, relevant_dates) for course in courses_qs]
+    summary = scrape_course_dates(
+        tasks,
+        save_timeslots,
+        workers=workers,
+        throttle=throttle,
+        incremental=incremental,
+    )
+    bump_data_version_if_changed(summary)
+    return summary
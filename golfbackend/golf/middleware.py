@@ -0,0 +1,92 @@
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+# Favours speed over ratio, responses are compressed on every request
+BROTLI_QUALITY = 5
+# Only API JSON is compressed. HTML pages, like the admin, can carry CSRF tokens,
+# which compression combined with reflected input leaks to BREACH attacks
+COMPRESSED_PATH_PREFIX = "/api/"
+COMPRESSED_CONTENT_TYPE = "application/json"
+
+
+def is_compressible(request, response) -> bool:
+    return request.path.startswith(COMPRESSED_PATH_PREFIX) and response.get(
+        "Content-Type", ""
+    ).startswith(COMPRESSED_CONTENT_TYPE)
+
+
+def compress_sequence_brotli(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses API JSON responses with brotli when the client accepts it and the
+    brotli package is installed, and with gzip otherwise. Other responses are
+    passed through uncompressed.
+
+    Streaming responses are compressed chunk by chunk, so they keep streaming.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(request, response):
+            return response
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if brotli is None or not re_accepts_brotli.search(accept_encoding):
+            return super().process_response(request, response)
+
+        # It's not worth attempting to compress really short responses.
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+                    async for chunk in original_iterator:
+                        data = compressor.process(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = compress_sequence_brotli(
+                    response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = brotli.compress(
+                response.content, quality=BROTLI_QUALITY
+            )
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # Compressed bodies differ from the uncompressed one, so a strong ETag
+        # becomes weak, as GZipMiddleware does
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
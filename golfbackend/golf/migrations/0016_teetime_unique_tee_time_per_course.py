@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:43
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def delete_duplicate_tee_times(apps, schema_editor):
+    TeeTime = apps.get_model("golf", "TeeTime")
+    duplicates = (
+        TeeTime.objects.values("golf_course", "time")
+        .annotate(count=Count("id"), keep_id=Max("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        TeeTime.objects.filter(
+            golf_course=duplicate["golf_course"], time=duplicate["time"]
+        ).exclude(id=duplicate["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0015_alter_teetime_golf_course"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_tee_times, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="teetime",
+            constraint=models.UniqueConstraint(
+                fields=("golf_course", "time"), name="unique_tee_time_per_course"
+            ),
+        ),
+    ]
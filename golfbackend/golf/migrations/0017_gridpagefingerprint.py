@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0016_teetime_unique_tee_time_per_course"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GridPageFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("fingerprint", models.CharField(max_length=64)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("last_modified", models.CharField(blank=True, max_length=255)),
+                (
+                    "last_checked",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "last_changed",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "golf_course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grid_page_fingerprints",
+                        to="golf.golfcourse",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="gridpagefingerprint",
+            constraint=models.UniqueConstraint(
+                fields=("golf_course", "date"), name="unique_grid_page_per_course_date"
+            ),
+        ),
+    ]
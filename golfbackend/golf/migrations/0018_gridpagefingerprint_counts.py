@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0017_gridpagefingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gridpagefingerprint",
+            name="change_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="gridpagefingerprint",
+            name="check_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0018_gridpagefingerprint_counts"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="golfclub",
+            name="club_id",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="golfcourse",
+            name="course_id",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name="teetime",
+            index=models.Index(
+                condition=models.Q(("available_spots__gt", 0), ("expired", False)),
+                fields=["time"],
+                name="teetime_bookable_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teetime",
+            index=models.Index(fields=["time"], name="teetime_time_idx"),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:02
+
+from django.db import migrations, models
+import pytz
+
+
+def set_local_minute_of_day(apps, schema_editor):
+    TeeTime = apps.get_model("golf", "TeeTime")
+    oslo = pytz.timezone("Europe/Oslo")
+    batch = []
+    for tee_time in TeeTime.objects.only("id", "time").iterator(chunk_size=2000):
+        local = tee_time.time.astimezone(oslo)
+        tee_time.local_minute_of_day = local.hour * 60 + local.minute
+        batch.append(tee_time)
+        if len(batch) >= 2000:
+            TeeTime.objects.bulk_update(batch, ["local_minute_of_day"])
+            batch = []
+    if batch:
+        TeeTime.objects.bulk_update(batch, ["local_minute_of_day"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0019_tee_time_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="teetime",
+            name="local_minute_of_day",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_local_minute_of_day, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="teetime",
+            index=models.Index(
+                condition=models.Q(("available_spots__gt", 0), ("expired", False)),
+                fields=["local_minute_of_day", "time"],
+                name="teetime_bookable_minute_idx",
+            ),
+        ),
+    ]
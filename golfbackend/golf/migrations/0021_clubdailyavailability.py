@@ -0,0 +1,78 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import pytz
+
+
+def build_club_daily_availability(apps, schema_editor):
+    TeeTime = apps.get_model("golf", "TeeTime")
+    ClubDailyAvailability = apps.get_model("golf", "ClubDailyAvailability")
+    counts = (
+        TeeTime.objects.filter(available_spots__gt=0)
+        .annotate(date=TruncDate("time", tzinfo=pytz.timezone("Europe/Oslo")))
+        .values("golf_course__golf_club_id", "date", "available_spots")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    ClubDailyAvailability.objects.bulk_create(
+        (
+            ClubDailyAvailability(
+                golf_club_id=row["golf_course__golf_club_id"],
+                date=row["date"],
+                available_spots=row["available_spots"],
+                count=row["count"],
+            )
+            for row in counts
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0020_teetime_local_minute_of_day"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClubDailyAvailability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("available_spots", models.PositiveSmallIntegerField()),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "golf_club",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_availability",
+                        to="golf.golfclub",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["date"], name="daily_availability_date_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="clubdailyavailability",
+            constraint=models.UniqueConstraint(
+                fields=("golf_club", "date", "available_spots"),
+                name="unique_daily_availability_per_club",
+            ),
+        ),
+        migrations.RunPython(build_club_daily_availability, migrations.RunPython.noop),
+    ]
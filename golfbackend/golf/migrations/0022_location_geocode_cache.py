@@ -0,0 +1,66 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:06
+
+import django.utils.timezone
+import re
+import unicodedata
+from django.db import migrations, models
+
+# Frozen copy of golf.utils.text.normalize_name as of this migration, so later
+# changes to it do not change what this migration does
+LETTER_REPLACEMENTS = str.maketrans({"ø": "o", "æ": "ae", "å": "a", "ß": "ss"})
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_name(text):
+    text = unicodedata.normalize("NFKD", text.casefold().translate(LETTER_REPLACEMENTS))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(NON_WORD_RE.sub(" ", text).split())
+
+
+def set_normalized_names(apps, schema_editor):
+    Location = apps.get_model("golf", "Location")
+    seen = set()
+    # Newest first, so the most recent coordinates of duplicate names are kept
+    for location in Location.objects.order_by("-id"):
+        key = normalize_name(location.name)
+        if key in seen:
+            location.delete()
+            continue
+        seen.add(key)
+        location.normalized_name = key
+        location.save(update_fields=["normalized_name"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0021_clubdailyavailability"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="normalized_name",
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="location",
+            name="last_checked",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="location",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="location",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_normalized_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="location",
+            name="normalized_name",
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+    ]
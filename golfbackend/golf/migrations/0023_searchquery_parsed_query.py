@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:12
+
+import re
+import unicodedata
+from django.db import migrations, models
+
+# Frozen copy of golf.utils.text.normalize_name as of this migration, so later
+# changes to it do not change what this migration does
+LETTER_REPLACEMENTS = str.maketrans({"ø": "o", "æ": "ae", "å": "a", "ß": "ss"})
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_name(text):
+    text = unicodedata.normalize("NFKD", text.casefold().translate(LETTER_REPLACEMENTS))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(NON_WORD_RE.sub(" ", text).split())
+
+
+def set_normalized_queries(apps, schema_editor):
+    SearchQuery = apps.get_model("golf", "SearchQuery")
+    queries = list(SearchQuery.objects.only("pk", "query"))
+    for search_query in queries:
+        search_query.normalized_query = normalize_name(search_query.query)
+    SearchQuery.objects.bulk_update(queries, ["normalized_query"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0022_location_geocode_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchquery",
+            name="normalized_query",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="searchquery",
+            name="parsed_query",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_normalized_queries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="searchquery",
+            index=models.Index(
+                fields=["normalized_query", "created"],
+                name="searchquery_normalized_idx",
+            ),
+        ),
+    ]
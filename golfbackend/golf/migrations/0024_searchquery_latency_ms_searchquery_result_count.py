@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0023_searchquery_parsed_query"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchquery",
+            name="latency_ms",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="searchquery",
+            name="result_count",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:41
+
+import re
+import unicodedata
+from django.db import migrations
+
+# Frozen copy of golf.utils.text.prepare_query as of this migration, so later
+# changes to it do not change what this migration does
+LETTER_REPLACEMENTS = str.maketrans({"ø": "o", "æ": "ae", "å": "a", "ß": "ss"})
+
+
+def fold_letters(text):
+    text = unicodedata.normalize("NFKD", text.casefold().translate(LETTER_REPLACEMENTS))
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def prepare_query(query_text):
+    text = re.sub(r"\bfør\b", " before ", query_text.casefold())
+    text = fold_letters(text).replace(",-", " kr ")
+    text = re.sub(r"[^\w.,:/-]+", " ", text)
+    text = re.sub(r"(?<!\d)[.,:/]|[.,:/](?!\d)|(?<![\dm])-|-(?!\d)", " ", text)
+    return " ".join(text.split())
+
+
+def set_prepared_queries(apps, schema_editor):
+    SearchQuery = apps.get_model("golf", "SearchQuery")
+    queries = list(SearchQuery.objects.only("pk", "query"))
+    for search_query in queries:
+        search_query.normalized_query = prepare_query(search_query.query)
+    SearchQuery.objects.bulk_update(queries, ["normalized_query"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("golf", "0024_searchquery_latency_ms_searchquery_result_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_prepared_queries, migrations.RunPython.noop),
+    ]
@@ -3,8 +3,14 @@ from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import Q
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
+from golf.utils.local_time import (
+    local_day_bounds,
+    local_minute_of_day,
+    parse_minute_of_day,
+)
+from golf.utils.text import normalize_name, prepare_query
 
 logger = logging.getLogger("default")
 
@@ -13,7 +19,7 @@ class GolfClub(models.Model):
     name = models.CharField(max_length=100, unique=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
-    club_id = models.CharField(max_length=100)
+    club_id = models.CharField(max_length=100, db_index=True)
     created = models.DateTimeField(default=timezone.now)
     disabled = models.BooleanField(default=False)
 
@@ -26,7 +32,7 @@ class GolfCourse(models.Model):
     golf_club = models.ForeignKey(
         GolfClub, on_delete=models.CASCADE, related_name="golf_courses"
     )
-    course_id = models.CharField(max_length=100)
+    course_id = models.CharField(max_length=100, db_index=True)
     created = models.DateTimeField(default=timezone.now)
 
     def __str__(self) -> str:
@@ -47,6 +53,38 @@ class TeeTime(models.Model):
         blank=True,
         validators=[MinValueValidator(0), MaxValueValidator(1000000)],
     )
+    # Local (Europe/Oslo) time of day of `time` in minutes, so time of day filters
+    # are plain range predicates. Kept in sync by save() and the bulk ingest.
+    local_minute_of_day = models.PositiveSmallIntegerField(editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["golf_course", "time"], name="unique_tee_time_per_course"
+            ),
+        ]
+        indexes = [
+            # Listing and search: upcoming bookable tee times ordered by time.
+            # Course scoped lookups use the (golf_course, time) unique constraint.
+            models.Index(
+                fields=["time"],
+                condition=Q(expired=False, available_spots__gt=0),
+                name="teetime_bookable_time_idx",
+            ),
+            # Time of day windows without a date, e.g. every afternoon this week
+            models.Index(
+                fields=["local_minute_of_day", "time"],
+                condition=Q(expired=False, available_spots__gt=0),
+                name="teetime_bookable_minute_idx",
+            ),
+            # Cleanup of past tee times and capacity counts over all tee times
+            models.Index(fields=["time"], name="teetime_time_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.time is not None:
+            self.local_minute_of_day = local_minute_of_day(self.time)
+        super().save(*args, **kwargs)
 
     @classmethod
     def apply_filters(self, filter_data: dict[str, Any]) -> Q:
@@ -54,56 +92,64 @@ class TeeTime(models.Model):
 
         if filter_data.get("date"):
             # Handles both dates and date ranges on the format 'YYYY-MM-DD to YYYY-MM-DD'
+            # Days are local days, expressed as a range on `time` so it stays indexable.
             try:
                 if "to" in filter_data["date"]:
                     start_date, end_date = filter_data["date"].split("to")
-                    start_date = start_date.strip()
-                    end_date = end_date.strip()
-                    start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-                    end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-                    date_range = []
-                    current_date = start_date_obj
-                    while current_date <= end_date_obj:
-                        date_range.append(current_date)
-                        current_date += timedelta(days=1)
-                    filters &= Q(time__date__in=date_range)
+                    start_date_obj = datetime.strptime(
+                        start_date.strip(), "%Y-%m-%d"
+                    ).date()
+                    end_date_obj = datetime.strptime(
+                        end_date.strip(), "%Y-%m-%d"
+                    ).date()
+                    start, end = local_day_bounds(start_date_obj, end_date_obj)
                 else:
                     date_obj = datetime.strptime(filter_data["date"], "%Y-%m-%d").date()
-                    filters &= Q(time__date=date_obj)
+                    start, end = local_day_bounds(date_obj)
+                filters &= Q(time__gte=start, time__lt=end)
             except ValueError:
                 logger.warning(f"Invalid date format: {filter_data['date']}")
 
         if filter_data.get("time_range"):
             time_range = filter_data["time_range"].lower()
             if "morning" in time_range:
-                filters &= Q(time__hour__gte=6, time__hour__lt=12)
+                filters &= Q(
+                    local_minute_of_day__gte=6 * 60, local_minute_of_day__lt=12 * 60
+                )
             elif "afternoon" in time_range:
-                filters &= Q(time__hour__gte=12, time__hour__lt=17)
+                filters &= Q(
+                    local_minute_of_day__gte=12 * 60, local_minute_of_day__lt=17 * 60
+                )
             elif "evening" in time_range:
-                filters &= Q(time__hour__gte=17, time__hour__lt=21)
-            elif "to" in time_range:
-                start_time, end_time = time_range.split("to")
-                start_time = start_time.strip()
-                end_time = end_time.strip()
-                start_time_obj = datetime.strptime(start_time, "%H:%M").time()
-                end_time_obj = datetime.strptime(end_time, "%H:%M").time()
                 filters &= Q(
-                    time__time__gte=start_time_obj, time__time__lt=end_time_obj
+                    local_minute_of_day__gte=17 * 60, local_minute_of_day__lt=21 * 60
                 )
+            elif "to" in time_range:
+                try:
+                    start_time, end_time = time_range.split("to")
+                    filters &= Q(
+                        local_minute_of_day__gte=parse_minute_of_day(start_time),
+                        local_minute_of_day__lt=parse_minute_of_day(end_time),
+                    )
+                except ValueError:
+                    logger.warning(f"Invalid time range: {filter_data['time_range']}")
 
+        # Always spelled out, even when players_count implies it, so the query
+        # matches the condition of the bookable tee time index
+        filters &= Q(available_spots__gt=0)
         if filter_data.get("players_count"):
             try:
                 players_count = int(filter_data["players_count"])
                 filters &= Q(available_spots__gte=players_count)
             except (ValueError, TypeError):
                 logger.warning(f"Invalid players count: {filter_data['players_count']}")
-        else:
-            filters &= Q(available_spots__gt=0)
 
         if filter_data.get("golf_club"):
-            golf_club = filter_data["golf_club"].lower()
-            location_filters = Q(golf_course__golf_club__name__icontains=golf_club)
-            filters &= location_filters
+            # Imported here, the index is built from the models of this module
+            from golf.utils.name_index import resolve_club_pks
+
+            club_pks = resolve_club_pks(filter_data["golf_club"])
+            filters &= Q(golf_course__golf_club_id__in=club_pks)
 
         if filter_data.get("golf_club_id"):
             golf_club_id = filter_data["golf_club_id"]
@@ -134,18 +180,102 @@ class GolfBoxCookie(models.Model):
         return self.name
 
 
+class GridPageFingerprint(models.Model):
+    golf_course = models.ForeignKey(
+        GolfCourse, on_delete=models.CASCADE, related_name="grid_page_fingerprints"
+    )
+    date = models.DateField()
+    fingerprint = models.CharField(max_length=64)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=255, blank=True)
+    last_checked = models.DateTimeField(default=timezone.now)
+    last_changed = models.DateTimeField(default=timezone.now)
+    check_count = models.PositiveIntegerField(default=0)
+    change_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["golf_course", "date"], name="unique_grid_page_per_course_date"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.golf_course.name} - {self.date}"
+
+
+class ClubDailyAvailability(models.Model):
+    """
+    Number of tee times of a club per local date and number of available spots.
+
+    A rollup of TeeTime kept up to date by the scrape ingest and the cleanup of
+    old tee times, so club listings do not aggregate tee times on every request.
+    Only tee times with available spots are counted.
+    """
+
+    golf_club = models.ForeignKey(
+        GolfClub, on_delete=models.CASCADE, related_name="daily_availability"
+    )
+    date = models.DateField()
+    available_spots = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["golf_club", "date", "available_spots"],
+                name="unique_daily_availability_per_club",
+            ),
+        ]
+        indexes = [models.Index(fields=["date"], name="daily_availability_date_idx")]
+
+    def __str__(self):
+        return f"{self.golf_club.name} - {self.date} - {self.available_spots}"
+
+
 class SearchQuery(models.Model):
     query = models.TextField()
+    normalized_query = models.TextField(blank=True, editable=False)
+    # What the query was parsed to, reused for the same query on the same day
+    parsed_query = models.JSONField(null=True, blank=True)
+    # Time taken to answer the search, and the number of tee times found
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    result_count = models.PositiveIntegerField(null=True, blank=True)
     created = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["normalized_query", "created"],
+                name="searchquery_normalized_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_query = prepare_query(self.query)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.query
 
 
 class Location(models.Model):
+    """
+    Geocoded place, looked up by its normalized name.
+
+    Places that could not be geocoded are stored without coordinates, so the
+    lookup is not retried before settings.GEOCODE_NEGATIVE_TTL has passed.
+    """
+
     name = models.CharField(max_length=255)
-    latitude = models.FloatField()
-    longitude = models.FloatField()
+    normalized_name = models.CharField(max_length=255, unique=True, editable=False)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    last_checked = models.DateTimeField(default=timezone.now)
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,70 @@
+import logging
+from itertools import islice
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("default")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson when it is installed.
+
+    Output is byte for byte what JSONRenderer produces with the default settings:
+    datetimes, dates, times, decimals and other types orjson would format
+    differently are passed through to DRF's JSONEncoder. Falls back to
+    JSONRenderer when orjson is missing, for indented output, and for data orjson
+    cannot encode, such as integers beyond 64 bits.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def __init__(self):
+        super().__init__()
+        self._encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._encoder.default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError) as e:
+            logger.warning(f"orjson could not encode response, using json: {e}")
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by JSONRenderer, as they are not valid in JavaScript strings
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+def iter_json_results(rows, serialize_rows, chunk_size: int = 500):
+    """
+    Encodes rows as a {"results": [...]} JSON document, one chunk of rows at a time.
+
+    Args:
+        rows: Iterable of rows, ideally a queryset iterator so rows are fetched
+            from the database in chunks as well.
+        serialize_rows: Turns a list of rows into a list of JSON ready objects.
+        chunk_size: Number of rows encoded per yielded chunk.
+    """
+    renderer = FastJSONRenderer()
+    rows = iter(rows)
+    yield b'{"results":['
+    first = True
+    while chunk := list(islice(rows, chunk_size)):
+        encoded = renderer.render(serialize_rows(chunk))
+        # Strip the brackets of the encoded list, the chunks share one list
+        yield (b"" if first else b",") + encoded[1:-1]
+        first = False
+    yield b"]}"
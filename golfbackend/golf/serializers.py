@@ -1,8 +1,56 @@
 from rest_framework import serializers
-from .models import GolfClub, GolfCourse, TeeTime
+from .models import ClubDailyAvailability, GolfClub, GolfCourse, TeeTime
 from django.db.models import Count
-from django.db.models.functions import TruncDate
 from django.utils import timezone
+from .utils.local_time import local_date, local_day_bounds
+
+
+def get_tee_times_capacity_counts(golf_clubs=None) -> dict[int, dict]:
+    """
+    Counts upcoming tee times per local date and number of available spots of
+    clubs. Later days are read from the ClubDailyAvailability rollup, today is
+    counted from the tee times left after the current time, since the rollup
+    still holds the tee times that have passed.
+
+    Args:
+        golf_clubs: Clubs to read counts for. Defaults to all clubs.
+
+    Returns:
+        A dict keyed by club pk, mapping ISO dates to counts per available spots
+        from "1" to "4". Clubs without bookable tee times are left out.
+    """
+    now = timezone.now()
+    today = local_date(now)
+    _, tomorrow_start = local_day_bounds(today)
+    today_counts = (
+        TeeTime.objects.filter(
+            time__gte=now, time__lt=tomorrow_start, available_spots__gt=0
+        )
+        .values_list("golf_course__golf_club_id", "available_spots")
+        .annotate(count=Count("id"))
+        .order_by("golf_course__golf_club_id", "available_spots")
+    )
+    rows = ClubDailyAvailability.objects.filter(date__gt=today).order_by(
+        "golf_club_id", "date", "available_spots"
+    )
+    if golf_clubs is not None:
+        today_counts = today_counts.filter(golf_course__golf_club__in=golf_clubs)
+        rows = rows.filter(golf_club__in=golf_clubs)
+
+    # Organize data by club, date and capacity
+    data_by_club = {}
+    counts = [
+        (golf_club_id, today, available_spots, count)
+        for golf_club_id, available_spots, count in today_counts
+    ]
+    counts.extend(rows.values_list("golf_club_id", "date", "available_spots", "count"))
+    for golf_club_id, date, available_spots, count in counts:
+        data_by_date = data_by_club.setdefault(golf_club_id, {})
+        date = date.isoformat()
+        if date not in data_by_date:
+            data_by_date[date] = {str(spots): 0 for spots in range(1, 5)}
+        data_by_date[date][str(available_spots)] = count
+    return data_by_club
 
 
 class GolfCourseSerializer(serializers.ModelSerializer):
@@ -29,30 +77,11 @@ class GolfClubSerializer(serializers.ModelSerializer[GolfClub]):
         ]
 
     def get_tee_times_capacity_count(self, obj):
-        # Get all TeeTimes for the GolfClub through the related GolfCourses
-        now = timezone.now()
-        tee_times = TeeTime.objects.filter(golf_course__golf_club=obj, time__gte=now)
-
-        # Annotate each TeeTime with its date
-        tee_times = tee_times.annotate(date=TruncDate("time"))
-
-        # Aggregate counts of TeeTimes by available_spots and date
-        counts = (
-            tee_times.values("date", "available_spots")
-            .annotate(count=Count("id"))
-            .order_by("date", "available_spots")
-        )
-        # Organize data by date and capacity
-        data_by_date = {}
-        for item in counts:
-            if item["available_spots"] == 0:
-                continue
-            date = item["date"].isoformat()  # Convert date to string
-            if date not in data_by_date:
-                data_by_date[date] = {str(spots): 0 for spots in range(1, 5)}
-            data_by_date[date][str(item["available_spots"])] = item["count"]
-
-        return data_by_date
+        # Listings pass the counts of all clubs in the context, computed in one query
+        capacity_counts = self.context.get("tee_times_capacity_counts")
+        if capacity_counts is None:
+            capacity_counts = get_tee_times_capacity_counts([obj])
+        return capacity_counts.get(obj.pk, {})
 
 
 # Update GolfCourseSerializer to include nested golf_club data
@@ -84,3 +113,151 @@ class TeeTimeSerializer(serializers.ModelSerializer[TeeTime]):
             "last_updated",
             "price_in_ore",
         ]
+
+
+# Fields read by serialize_tee_time_rows, plus the pk for keyset pagination
+TEE_TIME_ROW_FIELDS = [
+    "id",
+    "time",
+    "availability",
+    "available_spots",
+    "expired",
+    "last_updated",
+    "price_in_ore",
+    "golf_course_id",
+    "golf_course__course_id",
+    "golf_course__name",
+    "golf_course__created",
+    "golf_course__golf_club__club_id",
+    "golf_course__golf_club__name",
+    "golf_course__golf_club__latitude",
+    "golf_course__golf_club__longitude",
+]
+
+_datetime_field = serializers.DateTimeField()
+
+
+def get_tee_time_rows(queryset):
+    """
+    Turns a TeeTime queryset into the .values() rows serialize_tee_time_rows reads.
+
+    Annotations such as a distance are kept, so the rows can still be ordered and
+    paginated on them.
+    """
+    return queryset.values(*TEE_TIME_ROW_FIELDS, *queryset.query.annotations)
+
+
+def serialize_tee_time_rows(rows) -> list[dict]:
+    """
+    Builds the exact output of TeeTimeSerializer(many=True) from .values() rows.
+
+    Skips the three nested serializer layers per tee time, and builds the course
+    and club part once per course instead of once per tee time.
+    """
+    to_datetime = _datetime_field.to_representation
+    courses = {}
+    result = []
+    for row in rows:
+        course = courses.get(row["golf_course_id"])
+        if course is None:
+            latitude = row["golf_course__golf_club__latitude"]
+            longitude = row["golf_course__golf_club__longitude"]
+            course = {
+                "course_id": row["golf_course__course_id"],
+                "name": row["golf_course__name"],
+                "golf_club": {
+                    "club_id": row["golf_course__golf_club__club_id"],
+                    "name": row["golf_course__golf_club__name"],
+                    "latitude": None if latitude is None else float(latitude),
+                    "longitude": None if longitude is None else float(longitude),
+                },
+                "created": to_datetime(row["golf_course__created"]),
+            }
+            courses[row["golf_course_id"]] = course
+        price_in_ore = row["price_in_ore"]
+        result.append(
+            {
+                "time": to_datetime(row["time"]),
+                "golf_course": course,
+                "availability": row["availability"],
+                "available_spots": int(row["available_spots"]),
+                "expired": bool(row["expired"]),
+                "last_updated": to_datetime(row["last_updated"]),
+                "price_in_ore": None if price_in_ore is None else int(price_in_ore),
+            }
+        )
+    return result
+
+
+# Response shapes of the tee time list endpoints, chosen with ?shape=
+TEE_TIME_SHAPES = ["full", "compact", "columnar"]
+COMPACT_TEE_TIME_FIELDS = [
+    "time",
+    "course_id",
+    "availability",
+    "available_spots",
+    "expired",
+    "last_updated",
+    "price_in_ore",
+]
+
+
+def serialize_tee_time_rows_compact(rows, columnar: bool = False) -> dict:
+    """
+    Serializes .values() rows with courses and clubs listed once instead of per row.
+
+    Tee times reference their course by `course_id` and courses their club by
+    `club_id`. Values are formatted like serialize_tee_time_rows.
+
+    Args:
+        rows: Rows from get_tee_time_rows.
+        columnar: Return the tee times as one list per field instead of one
+            dict per tee time.
+
+    Returns:
+        A dict with "clubs" and "courses" lookup tables keyed by id and "results".
+    """
+    clubs = {}
+    courses = {}
+    results = []
+    for tee_time in serialize_tee_time_rows(rows):
+        course = tee_time.pop("golf_course")
+        club = course["golf_club"]
+        if course["course_id"] not in courses:
+            courses[course["course_id"]] = {
+                "name": course["name"],
+                "club_id": club["club_id"],
+                "created": course["created"],
+            }
+            clubs.setdefault(
+                club["club_id"],
+                {
+                    "name": club["name"],
+                    "latitude": club["latitude"],
+                    "longitude": club["longitude"],
+                },
+            )
+        tee_time["course_id"] = course["course_id"]
+        results.append(tee_time)
+
+    if columnar:
+        results = {
+            field: [tee_time[field] for tee_time in results]
+            for field in COMPACT_TEE_TIME_FIELDS
+        }
+    else:
+        results = [
+            {field: tee_time[field] for field in COMPACT_TEE_TIME_FIELDS}
+            for tee_time in results
+        ]
+    return {"clubs": clubs, "courses": courses, "results": results}
+
+
+def serialize_tee_time_page(rows, shape: str = "full") -> dict:
+    """
+    Serializes a page of .values() rows in one of TEE_TIME_SHAPES, as the keys
+    to include in the response.
+    """
+    if shape == "full":
+        return {"results": serialize_tee_time_rows(rows)}
+    return serialize_tee_time_rows_compact(rows, columnar=shape == "columnar")
@@ -0,0 +1,31 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from golf.models import GolfClub, GolfCourse, Location
+from golf.utils.geo import invalidate_club_spatial_index
+from golf.utils.name_index import invalidate_name_index
+from golf.utils.query_parser import invalidate_place_names
+from golf.utils.query_utils import geocode_cache
+from golf.utils.search_log import flush_search_log_if_due
+
+
+@receiver([post_save, post_delete], sender=GolfClub)
+def golf_club_changed(sender, **kwargs):
+    invalidate_club_spatial_index()
+    invalidate_name_index()
+    invalidate_place_names()
+
+
+@receiver([post_save, post_delete], sender=GolfCourse)
+def golf_course_changed(sender, **kwargs):
+    invalidate_name_index()
+
+
+@receiver([post_save, post_delete], sender=Location)
+def location_changed(sender, instance, **kwargs):
+    geocode_cache.delete(instance.normalized_name)
+    invalidate_place_names()
+
+
+# Sent once the response has been sent, so writing the log doesn't delay it
+request_finished.connect(flush_search_log_if_due, dispatch_uid="flush_search_log")
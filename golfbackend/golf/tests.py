@@ -1,3 +1,1970 @@
-from django.test import TestCase
+import gzip
+import logging
+import httpx
+import random
+import requests
+import threading
+import json
+from datetime import date, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from decimal import Decimal
+from unittest import mock, skipIf
+from haversine import haversine
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from golf.middleware import brotli
+from golf.renderers import FastJSONRenderer
+from django.utils import timezone
+from golf.models import (
+    ClubDailyAvailability,
+    GolfBoxCookie,
+    GolfClub,
+    GolfCourse,
+    GridPageFingerprint,
+    Location,
+    SearchQuery,
+    TeeTime,
+)
+from golf.serializers import (
+    TeeTimeSerializer,
+    get_tee_time_rows,
+    get_tee_times_capacity_counts,
+    serialize_tee_time_rows,
+)
+from golf.utils.geo import ClubSpatialIndex, get_club_spatial_index
+from golf.utils.grid_parsers import GRID_PARSERS, parse_grid_page
+from golf.utils.ingest import refresh_club_daily_availability, upsert_tee_times
+from golf.utils.local_time import LOCAL_TIMEZONE, local_date, local_minute_of_day
+from golf.utils.name_index import NameIndex, get_name_index, invalidate_name_index
+from golf.utils.openai_utils import cache_parse, get_reusable_parse, parse_cache
+from golf.utils.query_parser import (
+    get_place_names,
+    invalidate_place_names,
+    parse_query_locally,
+)
+from golf.utils.query_utils import (
+    GOOGLE_GEOCODE_URL,
+    aget_or_geocode_location,
+    geocode_cache,
+    get_or_geocode_location,
+)
+from golf.utils.response_cache import bump_data_version
+from golf.utils.scheduler import ClubDemand, ScrapeScheduler
+from golf.utils.scrape_engine import scrape_course_dates
+from golf.utils import scraping
+from golf.utils.search_log import search_log
+from golf.utils.text import normalize_name
+from golf.utils.throttling import HostThrottle, TokenBucket
 
-# Create your tests here.
+# Keeps cached responses out of the shared file cache and apart between tests
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def create_tee_times(course, count=10, start=None):
+    start = start or timezone.now() + timedelta(days=1)
+    times = [start + timedelta(minutes=10 * index) for index in range(count)]
+    return TeeTime.objects.bulk_create(
+        TeeTime(
+            time=time,
+            golf_course=course,
+            local_minute_of_day=local_minute_of_day(time),
+            availability="free",
+            available_spots=index % 5,
+            expired=False,
+            price_in_ore=50000,
+        )
+        for index, time in enumerate(times)
+    )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TeeTimeQueryPlanTests(TestCase):
+    """
+    Guards the indexes behind the tee time endpoints: none of their queries may fall
+    back to a full scan of the tee time table.
+    """
+
+    def setUp(self):
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.club = GolfClub.objects.create(
+            name="Asker Golfklubb", club_id="club-1", latitude=59.8, longitude=10.4
+        )
+        cls.course = GolfCourse.objects.create(
+            name="Asker 18 hull", golf_club=cls.club, course_id="course-1"
+        )
+        create_tee_times(cls.course)
+
+    def get_tee_time_query_plans(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                if '"golf_teetime"' not in query["sql"]:
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plans.append(" | ".join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans)
+        return plans
+
+    def assertNoTeeTimeScan(self, plans):
+        for plan in plans:
+            self.assertNotIn("SCAN golf_teetime", plan)
+
+    def test_tee_times_uses_bookable_index(self):
+        plans = self.get_tee_time_query_plans(reverse("tee_times"), {})
+        self.assertNoTeeTimeScan(plans)
+        self.assertTrue(any("teetime_bookable_time_idx" in plan for plan in plans))
+
+    def test_tee_times_with_players_uses_bookable_index(self):
+        plans = self.get_tee_time_query_plans(
+            reverse("tee_times"), {"slotsAvailable": 2, "maxPrice": 600}
+        )
+        self.assertNoTeeTimeScan(plans)
+        self.assertTrue(any("teetime_bookable_time_idx" in plan for plan in plans))
+
+    def test_tee_times_for_date_range_uses_bookable_index(self):
+        today = timezone.now().date()
+        date_range = f"{today} to {today + timedelta(days=3)}"
+        plans = self.get_tee_time_query_plans(
+            reverse("tee_times"), {"date": date_range, "timeRange": "10:00 to 14:00"}
+        )
+        self.assertNoTeeTimeScan(plans)
+
+    def test_tee_times_for_time_of_day_uses_minute_index(self):
+        plans = self.get_tee_time_query_plans(
+            reverse("tee_times"), {"timeRange": "afternoon"}
+        )
+        self.assertNoTeeTimeScan(plans)
+
+    def test_tee_times_for_club_uses_course_time_index(self):
+        plans = self.get_tee_time_query_plans(
+            reverse("tee_times"), {"golfClubId": self.club.club_id}
+        )
+        self.assertNoTeeTimeScan(plans)
+
+    def test_get_times_uses_course_time_index(self):
+        date = (timezone.now() + timedelta(days=1)).date().isoformat()
+        plans = self.get_tee_time_query_plans(
+            reverse("get_times", args=[self.course.course_id, date]), {}
+        )
+        self.assertNoTeeTimeScan(plans)
+
+    @override_settings(MOCK_OPENAI_CALL=True, OPENAI_API_KEY="test-key")
+    def test_search_for_tee_time_uses_index(self):
+        Location.objects.create(name="asker", latitude=59.83, longitude=10.43)
+        plans = self.get_tee_time_query_plans(
+            reverse("search_for_tee_time"), {"query": "golf i asker i morgen"}
+        )
+        self.assertNoTeeTimeScan(plans)
+
+
+class TeeTimeFilterTests(TestCase):
+    """
+    Dates and times of day in the filters are Norwegian local time, also across
+    midnight in UTC and daylight saving changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Bærum Golfklubb", club_id="club-1")
+        cls.course = GolfCourse.objects.create(
+            name="Bærum 18 hull", golf_club=club, course_id="course-1"
+        )
+
+    def create_tee_time(self, year, month, day, hour, minute=0):
+        return TeeTime.objects.create(
+            time=LOCAL_TIMEZONE.localize(datetime(year, month, day, hour, minute)),
+            golf_course=self.course,
+            availability="free",
+            available_spots=4,
+            expired=False,
+        )
+
+    def filter_tee_times(self, **filter_data):
+        return set(TeeTime.objects.filter(TeeTime.apply_filters(filter_data)))
+
+    def test_save_sets_local_minute_of_day(self):
+        summer = self.create_tee_time(2026, 7, 1, 14, 30)
+        winter = self.create_tee_time(2026, 1, 1, 14, 30)
+        self.assertEqual(summer.local_minute_of_day, 870)
+        self.assertEqual(winter.local_minute_of_day, 870)
+
+    def test_date_is_local_day(self):
+        # 00:30 in Oslo is still the previous day in UTC
+        early = self.create_tee_time(2026, 7, 2, 0, 30)
+        late = self.create_tee_time(2026, 7, 1, 23, 50)
+        self.assertEqual(self.filter_tee_times(date="2026-07-02"), {early})
+        self.assertEqual(self.filter_tee_times(date="2026-07-01"), {late})
+
+    def test_date_range_includes_last_day(self):
+        first = self.create_tee_time(2026, 3, 28, 8)
+        # Daylight saving starts on March 29th
+        last = self.create_tee_time(2026, 3, 29, 23, 30)
+        self.create_tee_time(2026, 3, 30, 0, 0)
+        self.assertEqual(
+            self.filter_tee_times(date="2026-03-28 to 2026-03-29"), {first, last}
+        )
+
+    def test_time_ranges_are_local_time(self):
+        morning = self.create_tee_time(2026, 7, 1, 6)
+        afternoon = self.create_tee_time(2026, 1, 15, 12)
+        evening = self.create_tee_time(2026, 7, 1, 20, 50)
+        self.assertEqual(self.filter_tee_times(time_range="morning"), {morning})
+        self.assertEqual(self.filter_tee_times(time_range="afternoon"), {afternoon})
+        self.assertEqual(self.filter_tee_times(time_range="evening"), {evening})
+        self.assertEqual(
+            self.filter_tee_times(time_range="06:00 to 12:30"), {morning, afternoon}
+        )
+
+    def test_invalid_time_range_is_ignored(self):
+        tee_time = self.create_tee_time(2026, 7, 1, 9)
+        self.assertEqual(self.filter_tee_times(time_range="soon to later"), {tee_time})
+
+
+class GolfClubListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(5):
+            club = GolfClub.objects.create(
+                name=f"Golfklubb {index}", club_id=f"club-{index}"
+            )
+            course = GolfCourse.objects.create(
+                name=f"Bane {index}", golf_club=club, course_id=f"course-{index}"
+            )
+            create_tee_times(course, count=5 * index)
+        today = local_date(timezone.now())
+        refresh_club_daily_availability(
+            list(GolfClub.objects.values_list("pk", flat=True)),
+            today,
+            today + timedelta(days=2),
+        )
+
+    def test_capacity_counts_take_constant_queries(self):
+        # Clubs, prefetched courses, today's grouped count and the rollup
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("get_golf_clubs"))
+        self.assertEqual(len(response.json()), 5)
+
+    def test_capacity_counts_match_single_club(self):
+        clubs = self.client.get(reverse("get_golf_clubs")).json()
+        for club in clubs:
+            response = self.client.get(reverse("get_golf_club", args=[club["club_id"]]))
+            self.assertEqual(
+                club["tee_times_capacity_count"],
+                response.json()["tee_times_capacity_count"],
+            )
+        counts = {club["club_id"]: club["tee_times_capacity_count"] for club in clubs}
+        self.assertEqual(counts["club-0"], {})
+        self.assertEqual(
+            sum(sum(day.values()) for day in counts["club-4"].values()), 16
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ClubDailyAvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.club = GolfClub.objects.create(name="Oslo Golfklubb", club_id="club-1")
+        cls.course = GolfCourse.objects.create(
+            name="Bogstad", golf_club=cls.club, course_id="course-1"
+        )
+        cls.tomorrow = local_date(timezone.now()) + timedelta(days=1)
+
+    def slot(self, hour, available_spots):
+        return {
+            "time": LOCAL_TIMEZONE.localize(
+                datetime.combine(self.tomorrow, datetime.min.time())
+            )
+            + timedelta(hours=hour),
+            "availability": "free" if available_spots else "full",
+            "available_spots": available_spots,
+            "expired": False,
+            "price_in_ore": 60000,
+        }
+
+    def get_rollup(self):
+        return dict(
+            ClubDailyAvailability.objects.filter(golf_club=self.club).values_list(
+                "available_spots", "count"
+            )
+        )
+
+    def test_ingest_keeps_rollup_in_sync(self):
+        upsert_tee_times(
+            self.course, [self.slot(8, 4), self.slot(9, 4), self.slot(10, 0)]
+        )
+        self.assertEqual(self.get_rollup(), {4: 2})
+
+        upsert_tee_times(
+            self.course, [self.slot(8, 4), self.slot(9, 2), self.slot(10, 1)]
+        )
+        self.assertEqual(self.get_rollup(), {4: 1, 2: 1, 1: 1})
+
+    def test_counts_for_today_leave_out_passed_tee_times(self):
+        today = local_date(timezone.now())
+        noon = LOCAL_TIMEZONE.localize(datetime.combine(today, datetime.min.time()))
+        noon += timedelta(hours=12)
+        for hours, available_spots in [(-3, 4), (3, 4), (4, 2)]:
+            TeeTime.objects.create(
+                time=noon + timedelta(hours=hours),
+                golf_course=self.course,
+                availability="free",
+                available_spots=available_spots,
+                expired=False,
+            )
+        refresh_club_daily_availability([self.club.pk], today, self.tomorrow)
+        self.assertEqual(self.get_rollup(), {4: 2, 2: 1})
+
+        with mock.patch("golf.serializers.timezone.now", return_value=noon):
+            counts = get_tee_times_capacity_counts([self.club])
+        self.assertEqual(
+            counts[self.club.pk],
+            {today.isoformat(): {"1": 0, "2": 1, "3": 0, "4": 1}},
+        )
+
+    def test_delete_old_tee_times_updates_rollup(self):
+        now = timezone.now()
+        TeeTime.objects.create(
+            time=now - timedelta(minutes=10),
+            golf_course=self.course,
+            availability="free",
+            available_spots=4,
+            expired=False,
+        )
+        ClubDailyAvailability.objects.create(
+            golf_club=self.club,
+            date=local_date(now) - timedelta(days=1),
+            available_spots=4,
+            count=3,
+        )
+        refresh_club_daily_availability(
+            [self.club.pk], local_date(now), local_date(now)
+        )
+
+        call_command("delete_old_tee_times", stdout=StringIO())
+        self.assertFalse(ClubDailyAvailability.objects.exists())
+
+
+class UpsertTeeTimesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Oslo Golfklubb", club_id="club-1")
+        cls.course = GolfCourse.objects.create(
+            name="Bogstad", golf_club=club, course_id="course-1"
+        )
+        cls.start = LOCAL_TIMEZONE.localize(
+            datetime.combine(
+                local_date(timezone.now()) + timedelta(days=1), datetime.min.time()
+            )
+        ) + timedelta(hours=8)
+
+    def slot(self, minutes, available_spots=4, price_in_ore=60000):
+        return {
+            "time": self.start + timedelta(minutes=minutes),
+            "availability": "free" if available_spots else "full",
+            "available_spots": available_spots,
+            "expired": False,
+            "price_in_ore": price_in_ore,
+        }
+
+    def get_tee_times(self):
+        return {
+            tee_time.time: tee_time
+            for tee_time in TeeTime.objects.filter(golf_course=self.course)
+        }
+
+    def test_classifies_created_updated_and_unchanged(self):
+        self.assertEqual(
+            upsert_tee_times(self.course, [self.slot(0), self.slot(10), self.slot(20)]),
+            {"created": 3, "updated": 0, "unchanged": 0},
+        )
+        counts = upsert_tee_times(
+            self.course,
+            [
+                self.slot(0),
+                self.slot(10, available_spots=2),
+                self.slot(20, price_in_ore=45000),
+                self.slot(30),
+            ],
+        )
+        self.assertEqual(counts, {"created": 1, "updated": 2, "unchanged": 1})
+
+        tee_times = self.get_tee_times()
+        self.assertEqual(len(tee_times), 4)
+        self.assertEqual(tee_times[self.slot(10)["time"]].available_spots, 2)
+        self.assertEqual(tee_times[self.slot(20)["time"]].price_in_ore, 45000)
+        self.assertEqual(
+            tee_times[self.slot(30)["time"]].local_minute_of_day,
+            local_minute_of_day(self.slot(30)["time"]),
+        )
+
+    def test_unchanged_rows_keep_last_updated(self):
+        upsert_tee_times(self.course, [self.slot(0), self.slot(10)])
+        long_ago = timezone.now() - timedelta(days=2)
+        TeeTime.objects.update(last_updated=long_ago)
+
+        upsert_tee_times(self.course, [self.slot(0), self.slot(10, available_spots=1)])
+        tee_times = self.get_tee_times()
+        self.assertEqual(tee_times[self.slot(0)["time"]].last_updated, long_ago)
+        self.assertGreater(tee_times[self.slot(10)["time"]].last_updated, long_ago)
+
+    def test_unchanged_scrape_writes_nothing(self):
+        upsert_tee_times(self.course, [self.slot(0), self.slot(10)])
+        with CaptureQueriesContext(connection) as context:
+            upsert_tee_times(self.course, [self.slot(0), self.slot(10)])
+        writes = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_rows_inserted_after_the_diff_are_updated(self):
+        upsert_tee_times(self.course, [self.slot(0)])
+        filter_tee_times = TeeTime.objects.filter
+
+        def filter_missing_existing_rows(*args, **kwargs):
+            # The first query reads the existing rows, as if another scrape
+            # inserted them right after it
+            if filter_missing_existing_rows.calls == 0:
+                filter_missing_existing_rows.calls += 1
+                return TeeTime.objects.none()
+            return filter_tee_times(*args, **kwargs)
+
+        filter_missing_existing_rows.calls = 0
+        with mock.patch.object(
+            TeeTime.objects, "filter", side_effect=filter_missing_existing_rows
+        ):
+            counts = upsert_tee_times(self.course, [self.slot(0, available_spots=3)])
+        self.assertEqual(counts["created"], 1)
+        [tee_time] = self.get_tee_times().values()
+        self.assertEqual(tee_time.available_spots, 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TeeTimeResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        cls.course = GolfCourse.objects.create(
+            name="Asker 18 hull", golf_club=club, course_id="course-1"
+        )
+        create_tee_times(cls.course)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_equivalent_requests_share_cache_entry(self):
+        url = reverse("tee_times")
+        first = self.client.get(url, {"slotsAvailable": "2", "utm": "a"})
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {"slotsAvailable": " 2", "page": "1"})
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_bump_data_version_invalidates_cache(self):
+        url = reverse("tee_times")
+        first = self.client.get(url)
+        create_tee_times(self.course, count=3, start=timezone.now() + timedelta(days=2))
+        self.assertEqual(self.client.get(url).json(), first.json())
+
+        bump_data_version()
+        second = self.client.get(url)
+        self.assertEqual(
+            second.json()["pagination"]["total_results"],
+            first.json()["pagination"]["total_results"] + 2,
+        )
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_matching_etag_returns_not_modified(self):
+        url = reverse("tee_times")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(
+            self.client.get(url, headers={"If-None-Match": '"stale"'}).status_code, 200
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Not named after the searched location, so the search is not narrowed to it
+        near = GolfClub.objects.create(
+            name="Holtsmark Golfklubb", club_id="club-1", latitude=59.8, longitude=10.4
+        )
+        far = GolfClub.objects.create(
+            name="Bergen Golfklubb", club_id="club-2", latitude=60.4, longitude=5.3
+        )
+        start = timezone.now() + timedelta(days=1)
+        for club in [near, far]:
+            course = GolfCourse.objects.create(
+                name=f"{club.name} bane", golf_club=club, course_id=f"{club.pk}-1"
+            )
+            create_tee_times(course, count=700, start=start)
+        Location.objects.create(name="asker", latitude=59.83, longitude=10.43)
+
+    def setUp(self):
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+        cache.clear()
+
+    def walk_pages(self, url, params):
+        results = []
+        cursor = None
+        while True:
+            page_params = {**params, "pagination": "cursor"}
+            if cursor:
+                page_params["cursor"] = cursor
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, page_params)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in context.captured_queries)
+            )
+            body = response.json()
+            results.extend(body["results"])
+            cursor = body["pagination"]["next_cursor"]
+            if cursor is None:
+                self.assertFalse(body["pagination"]["has_next"])
+                return results
+
+    def test_tee_times_cursor_pages_match_offset_pages(self):
+        url = reverse("tee_times")
+        offset_results = []
+        page = 1
+        while True:
+            body = self.client.get(url, {"page": page}).json()
+            offset_results.extend(body["results"])
+            if not body["pagination"]["has_next"]:
+                break
+            page += 1
+        cursor_results = self.walk_pages(url, {})
+        self.assertEqual(len(cursor_results), 1120)
+        self.assertEqual(cursor_results, offset_results)
+
+    @override_settings(MOCK_OPENAI_CALL=True, OPENAI_API_KEY="test-key")
+    def test_search_cursor_pages_follow_distance(self):
+        results = self.walk_pages(
+            reverse("search_for_tee_time"), {"query": "golf i asker i morgen"}
+        )
+        club_ids = [result["golf_course"]["golf_club"]["club_id"] for result in results]
+        self.assertEqual(club_ids, sorted(club_ids))
+        self.assertEqual(set(club_ids), {"club-1", "club-2"})
+        for club_id in ["club-1", "club-2"]:
+            times = [
+                result["time"]
+                for result in results
+                if result["golf_course"]["golf_club"]["club_id"] == club_id
+            ]
+            self.assertEqual(times, sorted(times))
+            self.assertEqual(len(times), len(set(times)))
+
+    def test_cursor_page_uses_index(self):
+        url = reverse("tee_times")
+        cursor = self.client.get(url, {"pagination": "cursor"}).json()["pagination"][
+            "next_cursor"
+        ]
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, {"cursor": cursor})
+        with connection.cursor() as db_cursor:
+            for query in context.captured_queries:
+                db_cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plan = " | ".join(row[-1] for row in db_cursor.fetchall())
+                self.assertNotIn("SCAN golf_teetime", plan)
+
+    def test_approximate_total_is_capped(self):
+        pagination = self.client.get(
+            reverse("tee_times"), {"pagination": "cursor", "includeTotal": "true"}
+        ).json()["pagination"]
+        self.assertEqual(pagination["total_results"], 1000)
+        self.assertTrue(pagination["total_is_approximate"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("tee_times"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TeeTimeRowSerializerTests(TestCase):
+    def test_matches_model_serializer(self):
+        located = GolfClub.objects.create(
+            name="Asker Golfklubb", club_id="club-1", latitude=59.8, longitude=10
+        )
+        unlocated = GolfClub.objects.create(name="Ukjent Golfklubb", club_id="club-2")
+        for club in [located, unlocated]:
+            course = GolfCourse.objects.create(
+                name=f"{club.name} bane", golf_club=club, course_id=f"{club.pk}-1"
+            )
+            create_tee_times(course, count=5)
+        TeeTime.objects.filter(available_spots=1).update(price_in_ore=None)
+
+        queryset = TeeTime.objects.order_by("time", "id")
+        expected = TeeTimeSerializer(
+            queryset.select_related("golf_course__golf_club"), many=True
+        ).data
+        with self.assertNumQueries(1):
+            result = serialize_tee_time_rows(get_tee_time_rows(queryset))
+        self.assertEqual(
+            json.dumps(result, cls=JSONEncoder), json.dumps(expected, cls=JSONEncoder)
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CompactShapeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            club = GolfClub.objects.create(
+                name=f"Golfklubb {index}",
+                club_id=f"club-{index}",
+                latitude=59 + index,
+                longitude=10,
+            )
+            course = GolfCourse.objects.create(
+                name=f"Bane {index}", golf_club=club, course_id=f"course-{index}"
+            )
+            create_tee_times(course, count=50)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_tee_times(self, **params):
+        response = self.client.get(reverse("tee_times"), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def expand(self, body, tee_times):
+        expanded = []
+        for tee_time in tee_times:
+            course_id = tee_time.pop("course_id")
+            course = body["courses"][course_id]
+            tee_time["golf_course"] = {
+                "course_id": course_id,
+                "name": course["name"],
+                "golf_club": {
+                    "club_id": course["club_id"],
+                    **body["clubs"][course["club_id"]],
+                },
+                "created": course["created"],
+            }
+            expanded.append(tee_time)
+        return expanded
+
+    def test_compact_shape_holds_the_full_data(self):
+        full = self.get_tee_times().json()
+        compact = self.get_tee_times(shape="compact")
+        body = compact.json()
+        self.assertEqual(len(body["clubs"]), 3)
+        self.assertEqual(len(body["courses"]), 3)
+        self.assertEqual(body["pagination"], full["pagination"])
+        self.assertEqual(
+            sorted_json(self.expand(body, body["results"])),
+            sorted_json(full["results"]),
+        )
+        self.assertLess(len(compact.content), len(self.get_tee_times().content))
+
+    def test_columnar_shape_matches_compact(self):
+        compact = self.get_tee_times(shape="compact").json()
+        columnar = self.get_tee_times(shape="columnar").json()
+        columns = columnar.pop("results")
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        self.assertEqual(rows, compact.pop("results"))
+        self.assertEqual(columnar, compact)
+
+    def test_unknown_shape_is_rejected(self):
+        response = self.client.get(reverse("tee_times"), {"shape": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+def sorted_json(tee_times):
+    return sorted(json.dumps(tee_time, sort_keys=True) for tee_time in tee_times)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_json_renderer(self):
+        now = timezone.now()
+        data = {
+            "time": now,
+            "naive": datetime(2026, 7, 1, 8, 30, 0, 123456),
+            "date": now.date(),
+            "price": Decimal("350.50"),
+            "name": "Bærum «golf»\u2028",
+            "spots": {1: 3, "2": 0},
+            "results": [{"available_spots": 4, "price_in_ore": None, "expired": False}],
+            "distance": 0.1 + 0.2,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_falls_back_for_big_integers(self):
+        data = {"count": 2**70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_api_uses_renderer(self):
+        GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        response = self.client.get(reverse("get_golf_club", args=["club-1"]))
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.json()["club_id"], "club-1")
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CompressionAndStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        course = GolfCourse.objects.create(
+            name="Asker 18 hull", golf_club=club, course_id="course-1"
+        )
+        create_tee_times(course, count=1200)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_gzip_is_negotiated(self):
+        url = reverse("tee_times")
+        plain = self.client.get(url)
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+        not_modified = self.client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        url = reverse("tee_times")
+        plain = self.client.get(url)
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_html_pages_are_not_compressed(self):
+        response = self.client.get("/admin/login/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("csrfmiddlewaretoken", response.content.decode())
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_html_pages_are_not_compressed_with_brotli(self):
+        response = self.client.get("/admin/login/", headers={"Accept-Encoding": "br"})
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_stream_returns_every_tee_time(self):
+        url = reverse("tee_times")
+        response = self.client.get(url, {"stream": "true"})
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b"".join(response.streaming_content))
+
+        pages = []
+        for page in [1, 2]:
+            pages.extend(self.client.get(url, {"page": page}).json()["results"])
+        self.assertEqual(streamed, {"results": pages})
+
+    def test_stream_is_compressed_in_chunks(self):
+        response = self.client.get(
+            reverse("tee_times"),
+            {"stream": "true"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(json.loads(body)["results"]), 960)
+
+    @override_settings(TEE_TIME_STREAM_MAX_RESULTS=100)
+    def test_stream_is_capped(self):
+        response = self.client.get(reverse("tee_times"), {"stream": "true"})
+        streamed = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(streamed["results"]), 100)
+        first_page = self.client.get(reverse("tee_times")).json()["results"]
+        self.assertEqual(streamed["results"], first_page[:100])
+
+    def test_stream_of_no_results_is_valid_json(self):
+        response = self.client.get(
+            reverse("tee_times"), {"stream": "true", "golfClubId": "unknown"}
+        )
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content)), {"results": []}
+        )
+
+
+class ClubSpatialIndexTests(TestCase):
+    def test_ranked_matches_brute_force(self):
+        generator = random.Random(7)
+        clubs = [
+            (pk, generator.uniform(58, 71), generator.uniform(4, 31))
+            for pk in range(300)
+        ]
+        index = ClubSpatialIndex(clubs)
+        for latitude, longitude, radius_km in [
+            (59.9, 10.7, 30),
+            (69.6, 18.9, 150),
+            (63.4, 10.4, None),
+        ]:
+            expected = sorted(
+                (
+                    (pk, haversine((latitude, longitude), (club_lat, club_lon)))
+                    for pk, club_lat, club_lon in clubs
+                ),
+                key=lambda item: (item[1], item[0]),
+            )
+            if radius_km is not None:
+                expected = [item for item in expected if item[1] <= radius_km]
+            self.assertEqual(index.ranked(latitude, longitude, radius_km), expected)
+
+    def test_index_is_rebuilt_when_clubs_change(self):
+        club = GolfClub.objects.create(name="Oslo Golfklubb", club_id="club-1")
+        self.assertEqual(get_club_spatial_index().clubs, {})
+        club.latitude, club.longitude = 59.95, 10.63
+        club.save()
+        self.assertEqual(get_club_spatial_index().clubs, {club.pk: (59.95, 10.63)})
+
+
+@override_settings(MOCK_OPENAI_CALL=True, OPENAI_API_KEY="test-key")
+class SearchDistanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Location.objects.create(name="asker", latitude=60.0, longitude=10.0)
+        # 0.9 degrees east is about 50 km at 60 degrees north, 0.6 north about 67 km
+        for club_id, latitude, longitude in [
+            ("east", 60.0, 10.9),
+            ("north", 60.6, 10.0),
+            ("unknown", None, None),
+        ]:
+            club = GolfClub.objects.create(
+                name=f"Golfklubb {club_id}",
+                club_id=club_id,
+                latitude=latitude,
+                longitude=longitude,
+            )
+            course = GolfCourse.objects.create(
+                name=f"Bane {club_id}", golf_club=club, course_id=f"course-{club_id}"
+            )
+            create_tee_times(course, count=10)
+
+    def setUp(self):
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+        geocode_cache.clear()
+        parse_cache.clear()
+        invalidate_place_names()
+        invalidate_name_index()
+
+    def search(self, **params):
+        response = self.client.get(
+            reverse("search_for_tee_time"),
+            {"query": "golf nær asker for 2 personer", **params},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            result["golf_course"]["golf_club"]["club_id"]
+            for result in response.json()["results"]
+        ]
+
+    def test_sorted_by_great_circle_distance(self):
+        club_ids = self.search()
+        self.assertEqual(club_ids, ["east"] * 6 + ["north"] * 6 + ["unknown"] * 6)
+
+    def test_search_takes_constant_queries(self):
+        get_club_spatial_index()
+        get_name_index()
+        get_place_names()
+        # Parse history, location, page count and page rows
+        with self.assertNumQueries(4):
+            self.search()
+        # The parse and the location are cached in process from here on
+        with self.assertNumQueries(2):
+            self.search(radiusKm="60")
+
+    def test_async_view_matches_sync_view(self):
+        params = {"query": "golf nær asker for 2 personer", "radiusKm": "60"}
+        sync_response = self.client.get(reverse("search_for_tee_time"), params)
+        async_response = self.client.get(reverse("search_for_tee_time_async"), params)
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.json(), sync_response.json())
+        self.assertEqual(len(search_log), 2)
+        response = self.client.get(reverse("search_for_tee_time_async"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_view_looks_up_club_and_location_concurrently(self):
+        # Each lookup waits for the other, which times out if they run one after
+        # the other on the shared sync thread
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_then(function):
+            def wrapper(*args):
+                barrier.wait()
+                return function(*args)
+
+            return wrapper
+
+        with (
+            mock.patch(
+                "golf.utils.search.find_club_id", wait_then(lambda parsed_query: None)
+            ),
+            mock.patch(
+                "golf.utils.query_utils.get_known_location",
+                wait_then(lambda key: (60.0, 10.0)),
+            ),
+        ):
+            response = self.client.get(
+                reverse("search_for_tee_time_async"),
+                {"query": "golf nær asker for 2 personer"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(barrier.broken)
+
+    def test_every_club_in_radius_is_ranked(self):
+        # 60 clubs 0.005 degrees (about 0.56 km) apart south of Asker, created
+        # furthest first so insertion order does not give the expected order
+        for index in reversed(range(1, 61)):
+            club = GolfClub.objects.create(
+                name=f"Golfklubb {index}",
+                club_id=f"south-{index}",
+                latitude=60.0 - 0.005 * index,
+                longitude=10.0,
+            )
+            course = GolfCourse.objects.create(
+                name=f"Bane {index}", golf_club=club, course_id=f"course-south-{index}"
+            )
+            # One of them has room for 2 players
+            create_tee_times(course, count=3)
+        club_ids = self.search(radiusKm="40")
+        self.assertEqual(club_ids, [f"south-{index}" for index in range(1, 61)])
+
+    def test_radius_cuts_off_clubs(self):
+        self.assertEqual(set(self.search(radiusKm="60")), {"east"})
+        self.assertEqual(self.search(radiusKm="10"), [])
+
+
+@override_settings(GOOGLE_MAPS_API_TOKEN="test-token", GEOCODE_NEGATIVE_TTL=3600)
+class GeocodeCacheTests(TestCase):
+    def setUp(self):
+        geocode_cache.clear()
+        patcher = mock.patch("golf.utils.query_utils.get_geolocator")
+        self.geolocator = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name(" Bærum  Golfklubb "), "baerum golfklubb")
+        self.assertEqual(normalize_name("Ålesund"), "alesund")
+        self.assertEqual(normalize_name("Tromsø, Norge"), "tromso norge")
+
+    def test_spellings_share_one_entry(self):
+        Location.objects.create(name="Asker", latitude=59.83, longitude=10.43)
+        self.assertEqual(get_or_geocode_location(" ASKER "), (59.83, 10.43))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_or_geocode_location("asker"), (59.83, 10.43))
+        self.geolocator.geocode.assert_not_called()
+
+    def test_geocoded_location_is_stored(self):
+        self.geolocator.geocode.return_value = mock.Mock(latitude=59.9, longitude=10.7)
+        self.assertEqual(get_or_geocode_location("Oslo"), (59.9, 10.7))
+        geocode_cache.clear()
+        self.assertEqual(get_or_geocode_location("oslo"), (59.9, 10.7))
+        self.geolocator.geocode.assert_called_once()
+        self.assertEqual(Location.objects.get().normalized_name, "oslo")
+
+    def test_async_geocoding(self):
+        request = httpx.Request("GET", GOOGLE_GEOCODE_URL)
+        responses = [
+            httpx.Response(
+                200,
+                json={
+                    "status": "OK",
+                    "results": [{"geometry": {"location": {"lat": 59.9, "lng": 10.7}}}],
+                },
+                request=request,
+            ),
+            httpx.Response(200, json={"status": "ZERO_RESULTS"}, request=request),
+        ]
+        with mock.patch.object(httpx.AsyncClient, "get", side_effect=responses):
+            self.assertEqual(
+                async_to_sync(aget_or_geocode_location)("Oslo"), (59.9, 10.7)
+            )
+            self.assertEqual(
+                async_to_sync(aget_or_geocode_location)("Nowhere"), (None, None)
+            )
+        self.assertEqual(
+            dict(Location.objects.values_list("normalized_name", "latitude")),
+            {"oslo": 59.9, "nowhere": None},
+        )
+
+    def test_failed_lookup_is_cached_until_ttl(self):
+        self.geolocator.geocode.return_value = None
+        self.assertEqual(get_or_geocode_location("Nowhere"), (None, None))
+        geocode_cache.clear()
+        self.assertEqual(get_or_geocode_location("nowhere"), (None, None))
+        self.geolocator.geocode.assert_called_once()
+
+        Location.objects.update(last_checked=timezone.now() - timedelta(hours=2))
+        geocode_cache.clear()
+        self.geolocator.geocode.return_value = mock.Mock(latitude=1.0, longitude=2.0)
+        self.assertEqual(get_or_geocode_location("Nowhere"), (1.0, 2.0))
+        self.assertEqual(Location.objects.count(), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ParseCacheTests(TestCase):
+    parse = {"date": None, "location": "oslo", "golf_club": None, "radius_km": None}
+
+    def setUp(self):
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+        cache.clear()
+        parse_cache.clear()
+        invalidate_place_names()
+        invalidate_name_index()
+        patcher = mock.patch(
+            "golf.utils.openai_utils.request_tee_time_query_parse",
+            return_value=self.parse,
+        )
+        self.request_parse = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def search(self, query):
+        response = self.client.get(reverse("search_for_tee_time"), {"query": query})
+        return response.json()["parsed_query"]
+
+    def test_repeated_query_skips_llm(self):
+        self.assertEqual(self.search("Golf near Oslo"), self.parse)
+        self.assertEqual(self.search(" golf near oslo!"), self.parse)
+        self.request_parse.assert_called_once()
+        search_log.flush()
+        self.assertEqual(
+            list(SearchQuery.objects.values_list("parsed_query", flat=True)),
+            [self.parse, self.parse],
+        )
+
+    def test_parse_is_reused_from_todays_history(self):
+        SearchQuery.objects.create(query="Golf near Oslo", parsed_query=self.parse)
+        self.assertEqual(self.search("golf near oslo"), self.parse)
+        self.request_parse.assert_not_called()
+
+    def test_parse_from_earlier_day_is_not_reused(self):
+        SearchQuery.objects.create(
+            query="golf near oslo",
+            parsed_query={**self.parse, "location": "bergen"},
+            created=timezone.now() - timedelta(days=2),
+        )
+        self.assertEqual(self.search("golf near oslo"), self.parse)
+        self.request_parse.assert_called_once()
+
+    def test_before_and_for_do_not_share_a_parse(self):
+        today = local_date(timezone.now())
+        cache_parse("golf før 10", today, self.parse)
+        SearchQuery.objects.create(query="golf før 10", parsed_query=self.parse)
+        self.assertEqual(get_reusable_parse(" Golf  FØR 10", today), self.parse)
+        parse_cache.clear()
+        self.assertNotEqual(get_reusable_parse("golf for 10", today), self.parse)
+        self.assertEqual(SearchQuery.objects.get().normalized_query, "golf before 10")
+
+    def test_errors_are_not_cached(self):
+        self.request_parse.return_value = {"error": "OpenAI API key not configured"}
+        for _ in range(2):
+            response = self.client.get(
+                reverse("search_for_tee_time"), {"query": "golf near oslo"}
+            )
+            self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.request_parse.call_count, 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LocalQueryParserTests(TestCase):
+    # A Wednesday
+    today = date(2026, 10, 14)
+
+    @classmethod
+    def setUpTestData(cls):
+        GolfClub.objects.create(name="Asker Golfklubb", club_id="asker")
+        GolfClub.objects.create(name="Bærum Golfklubb", club_id="baerum")
+        Location.objects.create(name="oslo", latitude=59.91, longitude=10.75)
+
+    def setUp(self):
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+        cache.clear()
+        parse_cache.clear()
+        invalidate_place_names()
+        invalidate_name_index()
+
+    def parse(self, query):
+        result, confidence = parse_query_locally(query, self.today)
+        return {key: value for key, value in result.items() if value}, confidence
+
+    def test_norwegian_query(self):
+        self.assertEqual(
+            self.parse("i morgen ettermiddag asker 2 personer"),
+            (
+                {
+                    "date": "2026-10-15",
+                    "time_range": "12:00 to 17:00",
+                    "location": "asker",
+                    "players_count": 2,
+                },
+                1.0,
+            ),
+        )
+        self.assertEqual(
+            self.parse("Lørdag etter kl. 15 på Bærum Golfklubb, under 600,-"),
+            (
+                {
+                    "date": "2026-10-17",
+                    "time_range": "15:00 to 23:59",
+                    "golf_club": "Bærum Golfklubb",
+                    "max_price": 600,
+                },
+                1.0,
+            ),
+        )
+
+    def test_english_query(self):
+        self.assertEqual(
+            self.parse("tomorrow morning Oslo"),
+            (
+                {
+                    "date": "2026-10-15",
+                    "time_range": "06:00 to 12:00",
+                    "location": "oslo",
+                },
+                1.0,
+            ),
+        )
+        self.assertEqual(
+            self.parse("golf this weekend within 30 km of asker with two friends"),
+            (
+                {
+                    "date": "2026-10-17 to 2026-10-18",
+                    "location": "asker",
+                    "players_count": 3,
+                    "radius_km": 30.0,
+                },
+                1.0,
+            ),
+        )
+
+    def test_unknown_words_lower_confidence(self):
+        result, confidence = self.parse("tomorrow near drammen")
+        self.assertLess(confidence, 0.9)
+        self.assertEqual(self.parse("golf")[1], 0.0)
+        # Two different dates
+        self.assertEqual(self.parse("i dag i morgen asker")[1], 0.0)
+
+    @override_settings(LOCAL_PARSE_MIN_CONFIDENCE=0.9)
+    def test_search_only_asks_openai_when_unsure(self):
+        with mock.patch(
+            "golf.utils.openai_utils.request_tee_time_query_parse",
+            return_value={"location": "drammen"},
+        ) as request_parse:
+            self.client.get(reverse("search_for_tee_time"), {"query": "i morgen asker"})
+            request_parse.assert_not_called()
+            self.client.get(
+                reverse("search_for_tee_time"), {"query": "i morgen drammen"}
+            )
+            request_parse.assert_called_once()
+
+
+@override_settings(MOCK_OPENAI_CALL=True, OPENAI_API_KEY="test-key", CACHES=TEST_CACHES)
+class SearchLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Asker Golfklubb", club_id="asker")
+        course = GolfCourse.objects.create(
+            name="Asker bane", golf_club=club, course_id="asker-1"
+        )
+        create_tee_times(course, count=10)
+
+    def setUp(self):
+        geocode_cache.clear()
+        parse_cache.clear()
+        invalidate_place_names()
+        invalidate_name_index()
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+
+    def search(self):
+        return self.client.get(
+            reverse("search_for_tee_time"), {"query": "i morgen asker 2 personer"}
+        )
+
+    @override_settings(SEARCH_LOG_BATCH_SIZE=3, SEARCH_LOG_FLUSH_INTERVAL=3600)
+    def test_searches_are_written_in_batches(self):
+        for _ in range(2):
+            self.search()
+        self.assertEqual(SearchQuery.objects.count(), 0)
+        with CaptureQueriesContext(connection) as context:
+            self.search()
+        inserts = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('INSERT INTO "golf_searchquery"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(SearchQuery.objects.count(), 3)
+        self.assertEqual(len(search_log), 0)
+
+    @override_settings(SEARCH_LOG_BATCH_SIZE=1, SEARCH_LOG_FLUSH_INTERVAL=3600)
+    def test_analytics_fields(self):
+        body = self.search().json()
+        search_query = SearchQuery.objects.get()
+        self.assertEqual(search_query.normalized_query, "i morgen asker 2 personer")
+        self.assertEqual(search_query.parsed_query["location"], "asker")
+        self.assertNotIn("golf_club_id", search_query.parsed_query)
+        self.assertEqual(search_query.result_count, body["pagination"]["total_results"])
+        self.assertIsNotNone(search_query.latency_ms)
+
+    @override_settings(SEARCH_LOG_FLUSH_INTERVAL=3600)
+    def test_dropped_searches_are_logged(self):
+        for query in ["asker", "bogstad"]:
+            search_log.add(SearchQuery(query=query))
+        with (
+            mock.patch.object(
+                SearchQuery.objects,
+                "bulk_create",
+                side_effect=DatabaseError("database is locked"),
+            ),
+            self.assertLogs("default", "ERROR") as logs,
+        ):
+            search_log.flush()
+        self.assertIn("Dropped 2 search queries", logs.output[0])
+        self.assertEqual(len(search_log), 0)
+
+
+class SearchLogTimerTests(TransactionTestCase):
+    """
+    The timer writes from its own thread, with its own database connection.
+    """
+
+    def setUp(self):
+        search_log.clear()
+        self.addCleanup(search_log.clear)
+
+    @override_settings(SEARCH_LOG_BATCH_SIZE=50, SEARCH_LOG_FLUSH_INTERVAL=0.01)
+    def test_quiet_process_flushes_on_a_timer(self):
+        search_log.add(SearchQuery(query="asker"))
+        timer = search_log._timer
+        timer.join(timeout=5)
+        self.assertEqual(
+            list(SearchQuery.objects.values_list("normalized_query", flat=True)),
+            ["asker"],
+        )
+        self.assertEqual(len(search_log), 0)
+
+    @override_settings(SEARCH_LOG_BATCH_SIZE=1, SEARCH_LOG_FLUSH_INTERVAL=3600)
+    def test_flush_cancels_the_timer(self):
+        search_log.add(SearchQuery(query="asker"))
+        timer = search_log._timer
+        search_log.flush()
+        timer.join(timeout=5)
+        self.assertTrue(timer.finished.is_set())
+        self.assertEqual(SearchQuery.objects.count(), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NameIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for club_id, name, course_name in [
+            ("hoken", "Høken Golfklubb", "Høken 18 hull"),
+            ("miklagard", "Miklagard Golfklubb", "Miklagard bane"),
+            ("asker", "Asker Golfklubb", "Asker bane"),
+            ("oslo", "Oslo Golfklubb", "Bogstad"),
+        ]:
+            club = GolfClub.objects.create(name=name, club_id=club_id)
+            course = GolfCourse.objects.create(
+                name=course_name, golf_club=club, course_id=f"{club_id}-1"
+            )
+            create_tee_times(course, count=5)
+
+    def setUp(self):
+        invalidate_name_index()
+
+    def resolve(self, text):
+        return [match.club_id for match in get_name_index().search(text)]
+
+    def test_matches_ignore_accents_and_typos(self):
+        self.assertEqual(self.resolve("Hoken")[0], "hoken")
+        self.assertEqual(self.resolve("HØKEN golfklubb")[0], "hoken")
+        self.assertEqual(self.resolve("Miklagaard")[0], "miklagard")
+        self.assertEqual(self.resolve("asker"), ["asker"])
+        self.assertEqual(self.resolve("Bergen"), [])
+
+    def test_course_names_resolve_to_club(self):
+        self.assertEqual(self.resolve("bogstad"), ["oslo"])
+
+    def test_partial_names_rank_by_score(self):
+        index = NameIndex([(1, "a", "Asker Golfklubb"), (2, "b", "Askim Golfklubb")])
+        matches = index.search("Askerr golfklubb")
+        self.assertEqual([match.club_id for match in matches], ["a", "b"])
+        self.assertGreater(matches[0].score, matches[1].score)
+        self.assertEqual(
+            [match.club_id for match in index.search("askim golfklubb")], ["b", "a"]
+        )
+
+    def test_golf_club_filter_uses_resolved_clubs(self):
+        filters = TeeTime.apply_filters({"golf_club": "Hoken golfklub"})
+        club_ids = set(
+            TeeTime.objects.filter(filters).values_list(
+                "golf_course__golf_club__club_id", flat=True
+            )
+        )
+        self.assertEqual(club_ids, {"hoken"})
+        filters = TeeTime.apply_filters({"golf_club": "Bergen"})
+        self.assertFalse(TeeTime.objects.filter(filters).exists())
+
+    def test_rebuilt_when_clubs_change(self):
+        self.assertEqual(self.resolve("Larvik"), [])
+        GolfClub.objects.create(name="Larvik Golfklubb", club_id="larvik")
+        self.assertEqual(self.resolve("Larvik"), ["larvik"])
+
+
+GRID_PAGES = Path(__file__).parent / "testdata" / "grid_pages"
+
+
+class GridParserTests(TestCase):
+    """
+    Runs every installed grid parser backend over the saved GolfBox grid pages.
+    """
+
+    def setUp(self):
+        # The html.parser and lxml backends warn about every text node in the grid
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_backends_agree_on_saved_pages(self):
+        pages = sorted(GRID_PAGES.glob("*.html"))
+        self.assertTrue(pages)
+        for page in pages:
+            html = page.read_text(encoding="utf-8")
+            expected = GRID_PARSERS["html.parser"](html)
+            for name, parse in GRID_PARSERS.items():
+                with self.subTest(page=page.name, parser=name):
+                    self.assertEqual(parse(html), expected)
+
+    def test_parses_day_page(self):
+        html = (GRID_PAGES / "day_mixed.html").read_text(encoding="utf-8")
+        timeslots = parse_grid_page(html)
+        self.assertEqual(len(timeslots), 9)
+        self.assertEqual(
+            timeslots[1],
+            {
+                "time": "07:10",
+                "availability": "free",
+                "available_spots": 4,
+                "expired": False,
+                "price_in_ore": 45000,
+            },
+        )
+        self.assertEqual(timeslots[2]["availability"], "partfree")
+        self.assertEqual(timeslots[2]["available_spots"], 2)
+        self.assertEqual(timeslots[2]["price_in_ore"], 125000)
+        self.assertEqual(
+            [slot["time"] for slot in timeslots if slot["availability"] == "blocking"],
+            [None, None],
+        )
+        self.assertEqual(timeslots[-1]["available_spots"], 0)
+        self.assertIsNone(timeslots[-2]["price_in_ore"])
+
+    def test_page_without_grid(self):
+        html = (GRID_PAGES / "no_grid.html").read_text(encoding="utf-8")
+        for name, parse in GRID_PARSERS.items():
+            with self.subTest(parser=name):
+                self.assertIsNone(parse(html))
+
+    @override_settings(GOLFBOX_GRID_PARSER="html.parser")
+    def test_unknown_backend_falls_back_to_html_parser(self):
+        html = (GRID_PAGES / "day_blocked.html").read_text(encoding="utf-8")
+        self.assertEqual(parse_grid_page(html, parser="missing"), parse_grid_page(html))
+
+
+def to_golfbox_date(value: date) -> str:
+    return value.strftime("%Y%m%d") + "T000000"
+
+
+class ScrapeSchedulerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.asker = GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        cls.bogstad = GolfClub.objects.create(name="Oslo GK Bogstad", club_id="club-2")
+        cls.asker_course = GolfCourse.objects.create(
+            name="Asker 18 hull", golf_club=cls.asker, course_id="course-1"
+        )
+        cls.bogstad_course = GolfCourse.objects.create(
+            name="Bogstad 18 hull", golf_club=cls.bogstad, course_id="course-2"
+        )
+
+    def setUp(self):
+        self.today = local_date(timezone.now())
+        self.scheduler = ScrapeScheduler(min_interval=timedelta(minutes=5))
+
+    def test_score_weights(self):
+        score = self.scheduler.score
+        self.assertGreater(score(60, 1, 0.5, 0), score(30, 1, 0.5, 0))
+        self.assertGreater(score(60, 0, 0.5, 0), score(60, 5, 0.5, 0))
+        self.assertGreater(score(60, 1, 0.9, 0), score(60, 1, 0.1, 0))
+        self.assertGreater(score(60, 1, 0.5, 10), score(60, 1, 0.5, 0))
+        # Past dates weigh as much as today
+        self.assertEqual(score(60, -1, 0.5, 0), score(60, 0, 0.5, 0))
+
+    def test_next_tasks_takes_highest_scores_within_budget(self):
+        dates = [to_golfbox_date(self.today + timedelta(days=days)) for days in (1, 5)]
+        GridPageFingerprint.objects.create(
+            golf_course=self.asker_course,
+            date=self.today + timedelta(days=1),
+            fingerprint="a",
+            last_checked=timezone.now() - timedelta(minutes=1),
+        )
+        # The nearest date that was not checked a minute ago comes first
+        [(course, page_dates)] = self.scheduler.next_tasks(dates, budget=1)
+        self.assertEqual((course, page_dates), (self.bogstad_course, [dates[0]]))
+        # The page checked a minute ago is not due yet
+        tasks = ScrapeScheduler(timedelta(minutes=5)).next_tasks(dates, budget=10)
+        self.assertEqual(
+            sorted((course.pk, page_dates) for course, page_dates in tasks),
+            [
+                (self.asker_course.pk, [dates[1]]),
+                (self.bogstad_course.pk, dates),
+            ],
+        )
+
+    def test_attempted_pages_back_off(self):
+        dates = [to_golfbox_date(self.today + timedelta(days=1))]
+        self.assertEqual(len(self.scheduler.next_tasks(dates, budget=10)), 2)
+        # Attempts count as fetches, even if the page failed and left no fingerprint
+        self.assertEqual(self.scheduler.next_tasks(dates, budget=10), [])
+        with mock.patch(
+            "golf.utils.scheduler.timezone.now",
+            return_value=timezone.now() + timedelta(minutes=6),
+        ):
+            self.assertEqual(len(self.scheduler.next_tasks(dates, budget=10)), 2)
+
+    def test_attempts_for_past_dates_are_pruned(self):
+        yesterday = self.today - timedelta(days=1)
+        self.scheduler.attempts[(self.asker_course.pk, yesterday)] = timezone.now()
+        self.scheduler.next_tasks([to_golfbox_date(self.today)], budget=10)
+        self.assertEqual(
+            set(self.scheduler.attempts),
+            {(self.asker_course.pk, self.today), (self.bogstad_course.pk, self.today)},
+        )
+
+    def test_demand_prefers_searched_clubs(self):
+        SearchQuery.objects.create(query="ledige tider på bogstad i morgen")
+        dates = [to_golfbox_date(self.today + timedelta(days=1))]
+        [(course, _)] = self.scheduler.next_tasks(dates, budget=1)
+        self.assertEqual(course, self.bogstad_course)
+
+    def test_club_demand_is_updated_incrementally(self):
+        now = timezone.now()
+        demand = ClubDemand(timedelta(days=7))
+        SearchQuery.objects.create(
+            query="golf i asker", created=now - timedelta(days=6, hours=23)
+        )
+        SearchQuery.objects.create(query="asker eller bogstad", created=now)
+        self.assertEqual(demand.update(now), {self.asker.pk: 2, self.bogstad.pk: 1})
+
+        SearchQuery.objects.create(query="bogstad", created=now)
+        previous_pk = demand.last_pk
+        with CaptureQueriesContext(connection) as context:
+            counts = demand.update(now + timedelta(hours=2))
+        self.assertEqual(counts, {self.asker.pk: 1, self.bogstad.pk: 2})
+        # Only the new search was read
+        [search_query] = [
+            query
+            for query in context.captured_queries
+            if "golf_searchquery" in query["sql"]
+        ]
+        self.assertIn(f'"id" > {previous_pk}', search_query["sql"])
+
+    def test_club_demand_is_recounted_when_clubs_change(self):
+        now = timezone.now()
+        demand = ClubDemand(timedelta(days=7))
+        SearchQuery.objects.create(query="golf i asker", created=now)
+        self.assertEqual(demand.update(now), {self.asker.pk: 1})
+        GolfClub.objects.filter(pk=self.asker.pk).update(disabled=True)
+        self.assertEqual(demand.update(now), {})
+
+    def test_scheduler_survives_failed_cycles(self):
+        with (
+            mock.patch(
+                "golf.management.commands.run_scrape_scheduler.run_scheduler_cycle",
+                side_effect=[RuntimeError("database is locked"), None],
+            ) as run_cycle,
+            mock.patch(
+                "golf.management.commands.run_scrape_scheduler.time.sleep",
+                side_effect=[None, KeyboardInterrupt],
+            ),
+            self.assertLogs("default", "ERROR") as logs,
+        ):
+            call_command("run_scrape_scheduler", cycle_seconds=0)
+        self.assertEqual(run_cycle.call_count, 2)
+        self.assertIn("database is locked", "\n".join(logs.output))
+
+
+LOGIN_FORM = '<form><input name="loginform.username"></form>'
+
+
+def create_response(text="<html></html>", status_code=200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = text.encode("utf-8")
+    response.encoding = "utf-8"
+    return response
+
+
+class GolfBoxSessionMixin:
+    """
+    Replaces the GolfBox client's HTTP calls with `self.send`, which by default
+    logs in successfully and returns a grid page for anything else.
+    """
+
+    def setUp(self):
+        super().setUp()
+        client = scraping.GolfBoxClient(
+            pool_size=1, retries=0, backoff_factor=0, timeout=1
+        )
+        self.requests = []
+        self.logins = 0
+        self.login_accepted = True
+        self.session_valid = True
+        self.requests_lock = threading.Lock()
+        patchers = [
+            mock.patch.object(scraping, "_golfbox_client", client),
+            mock.patch.object(scraping, "_cookie_cache", (None, None)),
+            mock.patch.object(scraping, "_login_retry_at", None),
+            mock.patch.object(client.session, "request", side_effect=self.send),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client_session = client.session
+
+    def send(self, method, url, **kwargs):
+        with self.requests_lock:
+            self.requests.append(url)
+            if url != scraping.golfbox_login_url:
+                if self.session_valid:
+                    return create_response("<div>grid</div>")
+                return create_response(LOGIN_FORM)
+            self.logins += 1
+            login = self.logins
+        # Slow enough for concurrent callers to pile up behind the lock
+        threading.Event().wait(0.05)
+        if not self.login_accepted:
+            return create_response(LOGIN_FORM)
+        self.session_valid = True
+        self.client_session.cookies.set("session", f"token-{login}")
+        return create_response("<html>Min side</html>")
+
+
+@override_settings(GOLFBOX_USERNAME="user", GOLFBOX_PASSWORD="secret")
+class GolfBoxSessionTests(GolfBoxSessionMixin, TestCase):
+    def test_cookies_are_served_from_memory(self):
+        self.assertEqual(scraping.get_cookies(), {"session": "token-1"})
+        self.assertEqual(GolfBoxCookie.objects.get().value, "token-1")
+        with self.assertNumQueries(0):
+            self.assertEqual(scraping.get_cookies(), {"session": "token-1"})
+        self.assertEqual(self.logins, 1)
+
+    def test_cold_start_uses_stored_cookies(self):
+        GolfBoxCookie.objects.create(
+            name="session",
+            value="stored",
+            expires=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(scraping.get_cookies(), {"session": "stored"})
+        self.assertEqual(self.logins, 0)
+
+    def test_logged_out_response_logs_in_again_and_retries(self):
+        scraping.get_cookies()
+        self.session_valid = False
+        with self.assertLogs("default", "WARNING"):
+            response = scraping.get_golfbox_client().get("https://www.golfbox.no/grid")
+        self.assertEqual(response.text, "<div>grid</div>")
+        self.assertEqual(self.logins, 2)
+        self.assertEqual(scraping.get_cookies(), {"session": "token-2"})
+
+    def test_relogin_is_skipped_once_session_was_renewed(self):
+        stale = scraping.get_cookies()
+        renewed = scraping.relogin_golfbox(stale)
+        self.assertEqual(scraping.relogin_golfbox(stale), renewed)
+        self.assertEqual(self.logins, 2)
+
+    def test_rejected_login_backs_off(self):
+        self.login_accepted = False
+        with self.assertRaises(scraping.GolfBoxLoginError):
+            scraping.get_cookies()
+        self.assertFalse(GolfBoxCookie.objects.exists())
+
+        # Requests fail straight away instead of sending the credentials again
+        with self.assertRaises(scraping.GolfBoxLoginError):
+            scraping.get_golfbox_client().get("https://www.golfbox.no/grid")
+        self.assertEqual(self.logins, 1)
+        self.assertEqual(len(self.requests), 1)
+
+        self.login_accepted = True
+        with mock.patch(
+            "golf.utils.scraping.timezone.now",
+            return_value=timezone.now() + timedelta(minutes=6),
+        ):
+            self.assertEqual(scraping.get_cookies(), {"session": "token-2"})
+
+    def test_rejected_relogin_backs_off(self):
+        scraping.get_cookies()
+        self.session_valid = False
+        self.login_accepted = False
+        client = scraping.get_golfbox_client()
+        with (
+            self.assertRaises(scraping.GolfBoxLoginError),
+            self.assertLogs("default", "WARNING"),
+        ):
+            client.get("https://www.golfbox.no/grid")
+        for _ in range(3):
+            with self.assertRaises(scraping.GolfBoxLoginError):
+                client.get("https://www.golfbox.no/grid")
+        self.assertEqual(self.logins, 2)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_workers_close_their_database_connections(self):
+        club = GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        course = GolfCourse.objects.create(
+            name="Asker 18 hull", golf_club=club, course_id="course-1"
+        )
+        page = {"changed": True, "fingerprint": {"fingerprint": "a"}, "timeslots": []}
+        dates = [f"2026061{day}T000000" for day in range(5)]
+        with (
+            mock.patch("golf.utils.scrape_engine.fetch_grid_page", return_value=page),
+            mock.patch(
+                "golf.utils.scrape_engine.close_old_connections"
+            ) as close_old_connections,
+        ):
+            scrape_course_dates([(course, dates)], mock.Mock(), workers=2)
+        self.assertEqual(close_old_connections.call_count, 5)
+
+    def test_failed_login_request_backs_off(self):
+        self.client_session.request.side_effect = requests.ConnectionError("refused")
+        with self.assertRaises(scraping.GolfBoxLoginError):
+            scraping.get_cookies()
+        with self.assertRaises(scraping.GolfBoxLoginError):
+            scraping.get_cookies()
+        self.assertEqual(self.client_session.request.call_count, 1)
+
+
+@override_settings(GOLFBOX_USERNAME="user", GOLFBOX_PASSWORD="secret")
+class GolfBoxConcurrentSessionTests(GolfBoxSessionMixin, TransactionTestCase):
+    """
+    Runs callers on threads, with their own database connections.
+    """
+
+    def run_threads(self, target, count=8):
+        results = []
+
+        def run():
+            try:
+                results.append(target())
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_callers_share_one_login(self):
+        results = self.run_threads(scraping.get_cookies)
+        self.assertEqual(results, [{"session": "token-1"}] * 8)
+        self.assertEqual(self.logins, 1)
+
+    def test_concurrent_relogins_share_one_login(self):
+        stale = scraping.get_cookies()
+        results = self.run_threads(lambda: scraping.relogin_golfbox(stale))
+        self.assertEqual(results, [{"session": "token-2"}] * 8)
+        self.assertEqual(self.logins, 2)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_burst_is_served_without_waiting(self):
+        bucket = TokenBucket(
+            rate=2, capacity=3, clock=self.clock, sleep=self.clock.sleep
+        )
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_rate_is_kept_after_burst(self):
+        bucket = TokenBucket(
+            rate=2, capacity=3, clock=self.clock, sleep=self.clock.sleep
+        )
+        for _ in range(10):
+            bucket.acquire()
+        self.assertAlmostEqual(self.clock.now, 3.5)
+
+    def test_idle_time_refills_up_to_capacity(self):
+        bucket = TokenBucket(
+            rate=2, capacity=3, clock=self.clock, sleep=self.clock.sleep
+        )
+        for _ in range(3):
+            bucket.acquire()
+        self.clock.now += 100
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_rate_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+    def test_hosts_are_limited_separately(self):
+        throttle = HostThrottle(
+            rate=1, burst=2, max_concurrent=2, clock=self.clock, sleep=self.clock.sleep
+        )
+        for url in [
+            "https://a.example/1",
+            "https://a.example/2",
+            "https://b.example/1",
+        ]:
+            with throttle.limit(url):
+                pass
+        self.assertEqual(self.clock.sleeps, [])
+        with throttle.limit("https://a.example/3"):
+            pass
+        self.assertEqual(self.clock.sleeps, [1])
+
+    def test_concurrency_per_host_is_bounded(self):
+        throttle = HostThrottle(rate=1000, burst=100, max_concurrent=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def request():
+            with throttle.limit("https://a.example/grid"):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                threading.Event().wait(0.02)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(peak), 2)
+
+
+class ScrapeEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        cls.courses = [
+            GolfCourse.objects.create(
+                name=f"Asker {holes} hull", golf_club=club, course_id=f"course-{holes}"
+            )
+            for holes in (9, 18)
+        ]
+
+    def setUp(self):
+        patcher = mock.patch("golf.utils.scrape_engine.get_cookies")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_collects_results_and_errors_of_all_workers(self):
+        dates = ["20260612T000000", "20260613T000000", "20260614T000000"]
+        # Both workers have to be fetching at once to get past the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fetch_grid_page(course_id, club_id, course_name, date_str, *args):
+            if date_str == dates[0]:
+                barrier.wait()
+            if course_id == "course-9" and date_str == dates[2]:
+                raise requests.ConnectionError("reset by peer")
+            return {
+                "changed": True,
+                "fingerprint": {"fingerprint": f"{course_id}-{date_str}"},
+                "timeslots": [{"course_id": course_id, "date": date_str}],
+            }
+
+        scraped = {}
+
+        def on_course_scraped(course, timeslots):
+            scraped[course.course_id] = sorted(slot["date"] for slot in timeslots)
+            return {"created": len(timeslots)}
+
+        tasks = [(course, dates) for course in self.courses]
+        with (
+            mock.patch("golf.utils.scrape_engine.fetch_grid_page", fetch_grid_page),
+            self.assertLogs("default", "ERROR") as logs,
+        ):
+            summary = scrape_course_dates(
+                tasks, on_course_scraped, workers=2, incremental=False
+            )
+
+        self.assertEqual(
+            summary,
+            {
+                "pages": 6,
+                "failed_pages": 1,
+                "fingerprint_hits": 0,
+                "fingerprint_misses": 5,
+                "timeslots": 5,
+                "created": 5,
+            },
+        )
+        self.assertEqual(scraped, {"course-9": dates[:2], "course-18": dates})
+        self.assertIn("reset by peer", "\n".join(logs.output))
+        # The failed page has no fingerprint, so it is fetched again on the next run
+        self.assertEqual(
+            GridPageFingerprint.objects.filter(golf_course=self.courses[0]).count(), 2
+        )
+        self.assertEqual(
+            GridPageFingerprint.objects.filter(golf_course=self.courses[1]).count(), 3
+        )
+
+
+class GridPageFingerprintTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        club = GolfClub.objects.create(name="Asker Golfklubb", club_id="club-1")
+        cls.course = GolfCourse.objects.create(
+            name="Asker 18 hull", golf_club=club, course_id="course-1"
+        )
+        cls.page = (GRID_PAGES / "day_mixed.html").read_text(encoding="utf-8")
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.date_str = to_golfbox_date(local_date(timezone.now()) + timedelta(days=1))
+        self.client_mock = mock.Mock()
+        self.client_mock.post.side_effect = lambda *args, **kwargs: create_response(
+            self.page
+        )
+        patchers = [
+            mock.patch(
+                "golf.utils.scraping.get_golfbox_client", return_value=self.client_mock
+            ),
+            mock.patch("golf.utils.scrape_engine.get_cookies"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fetch(self, previous=None, force=False):
+        return scraping.fetch_grid_page(
+            "course-1", "club-1", "Asker 18 hull", self.date_str, previous, force=force
+        )
+
+    def scrape(self, on_course_scraped=None):
+        on_course_scraped = on_course_scraped or mock.Mock(return_value=None)
+        summary = scrape_course_dates(
+            [(self.course, [self.date_str])], on_course_scraped, workers=1
+        )
+        return summary, on_course_scraped
+
+    def test_fingerprint_ignores_markup_around_the_grid(self):
+        fingerprint = scraping.grid_page_fingerprint(self.page)
+        self.assertEqual(
+            scraping.grid_page_fingerprint(
+                self.page.replace("Logg ut", "Logg ut (Ola)")
+            ),
+            fingerprint,
+        )
+        self.assertNotEqual(
+            scraping.grid_page_fingerprint(self.page.replace("07:10", "07:15")),
+            fingerprint,
+        )
+
+    def test_unchanged_page_is_not_parsed(self):
+        first = self.fetch()
+        self.assertTrue(first["changed"])
+        self.assertEqual(len(first["timeslots"]), 7)
+
+        with mock.patch("golf.utils.scraping.parse_grid_page") as parse_grid_page:
+            page = self.fetch(previous=first["fingerprint"])
+        parse_grid_page.assert_not_called()
+        self.assertFalse(page["changed"])
+        self.assertIsNone(page["timeslots"])
+
+        page = self.fetch(previous=first["fingerprint"], force=True)
+        self.assertFalse(page["changed"])
+        self.assertEqual(len(page["timeslots"]), 7)
+
+    def test_changed_page_is_parsed(self):
+        previous = {"fingerprint": "stale", "etag": "", "last_modified": ""}
+        page = self.fetch(previous=previous)
+        self.assertTrue(page["changed"])
+        self.assertEqual(len(page["timeslots"]), 7)
+
+    def test_not_modified_response_keeps_previous_fingerprint(self):
+        previous = {"fingerprint": "a", "etag": '"v1"', "last_modified": ""}
+        self.client_mock.post.side_effect = None
+        self.client_mock.post.return_value = create_response("", status_code=304)
+        page = self.fetch(previous=previous)
+        self.assertEqual(
+            page, {"changed": False, "fingerprint": previous, "timeslots": None}
+        )
+        self.assertEqual(
+            self.client_mock.post.call_args.kwargs["headers"], {"If-None-Match": '"v1"'}
+        )
+
+    def test_engine_skips_unchanged_pages(self):
+        summary, on_course_scraped = self.scrape()
+        self.assertEqual(summary["fingerprint_misses"], 1)
+        on_course_scraped.assert_called_once()
+
+        summary, on_course_scraped = self.scrape()
+        self.assertEqual(summary["fingerprint_hits"], 1)
+        on_course_scraped.assert_not_called()
+        fingerprint = GridPageFingerprint.objects.get()
+        self.assertEqual((fingerprint.check_count, fingerprint.change_count), (2, 1))
+
+    def test_fingerprint_is_saved_after_successful_ingest_only(self):
+        failing_ingest = mock.Mock(side_effect=DatabaseError("database is locked"))
+        with self.assertRaises(DatabaseError):
+            self.scrape(failing_ingest)
+        self.assertFalse(GridPageFingerprint.objects.exists())
+
+        # The page is ingested again on the next run instead of skipped as unchanged
+        summary, on_course_scraped = self.scrape()
+        self.assertEqual(summary["fingerprint_misses"], 1)
+        on_course_scraped.assert_called_once()
+        self.assertTrue(GridPageFingerprint.objects.exists())
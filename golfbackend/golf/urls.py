@@ -15,4 +15,9 @@ urlpatterns = [
         views.search_for_tee_time,
         name="search_for_tee_time",
     ),
+    path(
+        "api/search-for-tee-time/async/",
+        views.search_for_tee_time_async,
+        name="search_for_tee_time_async",
+    ),
 ]
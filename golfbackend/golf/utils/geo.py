@@ -0,0 +1,111 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from haversine import haversine
+from golf.models import GolfClub
+
+logger = logging.getLogger("default")
+
+# Size of a grid cell in degrees, about 55 km north-south and 25 km east-west in Norway
+GRID_CELL_DEGREES = 0.5
+EARTH_RADIUS_KM = 6371.0088
+# Distance given to clubs without coordinates, further than any point on earth
+UNKNOWN_DISTANCE_KM = 100_000.0
+
+
+class ClubSpatialIndex:
+    """
+    Grid index over the coordinates of golf clubs.
+
+    Clubs are bucketed by GRID_CELL_DEGREES cells, so a radius query only looks at
+    the cells overlapping the radius' bounding box. Distances are great-circle
+    distances in kilometers.
+    """
+
+    def __init__(self, clubs: list[tuple[int, float, float]]):
+        self.clubs = {pk: (latitude, longitude) for pk, latitude, longitude in clubs}
+        self.cells = defaultdict(list)
+        for pk, (latitude, longitude) in self.clubs.items():
+            self.cells[self.cell(latitude, longitude)].append(pk)
+        self.built = time.monotonic()
+
+    @staticmethod
+    def cell(latitude: float, longitude: float) -> tuple[int, int]:
+        return (
+            math.floor(latitude / GRID_CELL_DEGREES),
+            math.floor(longitude / GRID_CELL_DEGREES),
+        )
+
+    def candidates(self, latitude: float, longitude: float, radius_km: float):
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        # Longitude degrees shrink towards the poles, widen the box accordingly
+        cos_lat = math.cos(math.radians(min(abs(latitude) + lat_delta, 89.9)))
+        lon_delta = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180)
+        min_lat, min_lon = self.cell(latitude - lat_delta, longitude - lon_delta)
+        max_lat, max_lon = self.cell(latitude + lat_delta, longitude + lon_delta)
+        for cell_lat in range(min_lat, max_lat + 1):
+            for cell_lon in range(min_lon, max_lon + 1):
+                yield from self.cells.get((cell_lat, cell_lon), [])
+
+    def ranked(
+        self, latitude: float, longitude: float, radius_km: float | None = None
+    ) -> list[tuple[int, float]]:
+        """
+        Clubs ordered by distance to a point.
+
+        Args:
+            latitude: Latitude of the point.
+            longitude: Longitude of the point.
+            radius_km: Leave out clubs further away than this. Defaults to no limit.
+
+        Returns:
+            (club pk, distance in km) pairs, nearest first.
+        """
+        pks = (
+            self.clubs
+            if radius_km is None
+            else self.candidates(latitude, longitude, radius_km)
+        )
+        distances = [
+            (pk, haversine((latitude, longitude), self.clubs[pk])) for pk in pks
+        ]
+        if radius_km is not None:
+            distances = [item for item in distances if item[1] <= radius_km]
+        return sorted(distances, key=lambda item: (item[1], item[0]))
+
+
+_club_index = None
+_club_index_lock = threading.Lock()
+
+
+def build_club_spatial_index() -> ClubSpatialIndex:
+    clubs = GolfClub.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).values_list("pk", "latitude", "longitude")
+    index = ClubSpatialIndex(list(clubs))
+    logger.info(f"Built club spatial index over {len(index.clubs)} clubs")
+    return index
+
+
+def get_club_spatial_index() -> ClubSpatialIndex:
+    """
+    The process wide club index, rebuilt after clubs change in this process or
+    after settings.CLUB_INDEX_TTL seconds, for changes made by other processes.
+    """
+    global _club_index
+    index = _club_index
+    if index is not None and time.monotonic() - index.built < settings.CLUB_INDEX_TTL:
+        return index
+    with _club_index_lock:
+        index = _club_index
+        if index is None or time.monotonic() - index.built >= settings.CLUB_INDEX_TTL:
+            index = _club_index = build_club_spatial_index()
+        return index
+
+
+def invalidate_club_spatial_index(**kwargs):
+    global _club_index
+    _club_index = None
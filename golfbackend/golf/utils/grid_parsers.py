@@ -0,0 +1,393 @@
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Callable
+from bs4 import BeautifulSoup, Tag
+from django.conf import settings
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger("default")
+
+GRID_CLASS = "w-100 classicgrid portal d-flexformlist"
+PRICE_CONTAINER_CLASS = "d-flex flex-row flex-center pt-2 pointer"
+MAX_PLAYERS = 4
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+_grid_start_re = re.compile(
+    r"<div\b[^>]*\bclass\s*=\s*([\"'])" + re.escape(GRID_CLASS) + r"\1", re.IGNORECASE
+)
+_div_tag_re = re.compile(r"<(/?)div\b", re.IGNORECASE)
+
+
+def availability_from_classes(classes: list[str]) -> str:
+    if "free" in classes:
+        return "free"
+    elif "c_partfree" in classes:
+        return "partfree"
+    elif "full" in classes:
+        return "full"
+    elif "blocking" in classes:
+        return "blocking"
+    return "unknown"
+
+
+def price_text_to_ore(price_in_kr_string: str) -> int | None:
+    price_in_kr_string = price_in_kr_string.strip()
+    price_in_kr_string = price_in_kr_string.replace(",", "").replace("-", "")
+    if price_in_kr_string:
+        return int(price_in_kr_string) * 100
+    return None
+
+
+def build_timeslot(time, players, classes, price_in_ore):
+    availability = availability_from_classes(classes)
+    available_spots = MAX_PLAYERS - players
+    if availability == "blocking":
+        available_spots = 0
+    return {
+        "time": time,
+        "availability": availability,
+        "available_spots": available_spots,
+        "expired": "expired" in classes,
+        "price_in_ore": price_in_ore,
+    }
+
+
+def extract_grid_markup(html: str) -> str | None:
+    """
+    Cuts the classicgrid container out of a grid page without building a tree.
+
+    Only <div> open and close tags are counted, which is enough to find where the
+    container ends. Returns None when the page has no booking grid.
+    """
+    start = _grid_start_re.search(html)
+    if start is None:
+        return None
+    depth = 0
+    for tag in _div_tag_re.finditer(html, start.start()):
+        if not tag.group(1):
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            end = html.find(">", tag.end())
+            return html[start.start() : end + 1 if end != -1 else len(html)]
+    return html[start.start() :]
+
+
+# BeautifulSoup backends
+
+
+def is_expired(child):
+    return "expired" in child["class"]
+
+
+def get_time(child):
+    timeCellDiv = child.find("div", {"class": "timecell"})
+    return timeCellDiv.text.strip() if timeCellDiv else None
+
+
+def get_players(child):
+    playerContainerDiv = child.find("div", {"class": "time-players"})
+    if playerContainerDiv and playerContainerDiv.children:
+        playerDivs = list(playerContainerDiv.children)
+        return len(playerDivs)
+    return 0
+
+
+def get_availability(child):
+    return availability_from_classes(child["class"])
+
+
+def get_price_in_ore(child):
+    priceContainerDiv = child.find("div", {"class": PRICE_CONTAINER_CLASS})
+    if priceContainerDiv is None:
+        return None
+    priceDiv = priceContainerDiv.find("div", {"class": "ymPrice"})
+    if priceDiv:
+        return price_text_to_ore(priceDiv.text)
+    return None
+
+
+def process_child(child):
+    if isinstance(child, Tag):
+        return build_timeslot(
+            get_time(child),
+            get_players(child),
+            child["class"],
+            get_price_in_ore(child),
+        )
+    else:
+        logger.warning(f"child is not a tag: {child}")
+        return None
+
+
+def get_timeslots_of_course_day(soup):
+    div = soup.find("div", {"class": GRID_CLASS})
+    if div is None:
+        return None
+    children = div.children
+    result = []
+    for child in children:
+        processed = process_child(child)
+        if processed is not None:
+            result.append(processed)
+    return result
+
+
+def parse_with_html_parser(html: str) -> list[dict] | None:
+    return get_timeslots_of_course_day(BeautifulSoup(html, "html.parser"))
+
+
+def parse_with_lxml(html: str) -> list[dict] | None:
+    return get_timeslots_of_course_day(BeautifulSoup(html, "lxml"))
+
+
+# selectolax backend
+
+
+def parse_with_selectolax(html: str) -> list[dict] | None:
+    grid = LexborHTMLParser(html).css_first(f'div[class="{GRID_CLASS}"]')
+    if grid is None:
+        return None
+    result = []
+    for child in grid.iter(include_text=True):
+        if child.tag in ("-text", "_text", "-comment", "_comment"):
+            continue
+        classes = (child.attributes.get("class") or "").split()
+
+        time_div = child.css_first("div.timecell")
+        time = time_div.text(deep=True).strip() if time_div is not None else None
+
+        players = 0
+        players_div = child.css_first("div.time-players")
+        if players_div is not None:
+            players = sum(1 for _ in players_div.iter(include_text=True))
+
+        price_in_ore = None
+        price_container = child.css_first(f'div[class="{PRICE_CONTAINER_CLASS}"]')
+        if price_container is not None:
+            price_div = price_container.css_first("div.ymPrice")
+            if price_div is not None:
+                price_in_ore = price_text_to_ore(price_div.text(deep=True))
+
+        result.append(build_timeslot(time, players, classes, price_in_ore))
+    return result
+
+
+# Streaming backend
+
+
+class _GridEventParser(HTMLParser):
+    """
+    Builds timeslot dicts straight from parser events, without materialising a tree.
+
+    Mirrors the BeautifulSoup lookups of the html.parser backend: for every direct
+    child of the grid container, the first timecell, the first time-players div and
+    the ymPrice of the first price container below it.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.grid_depth = None
+        self.grid_done = False
+        self.slot = None
+        self.timeslots = None
+
+    def _new_slot(self, classes):
+        return {
+            "classes": classes,
+            "time": None,
+            "time_seen": False,
+            "time_depth": None,
+            "time_text": [],
+            "players": 0,
+            "players_seen": False,
+            "players_depth": None,
+            "players_last_was_text": False,
+            "price_seen": False,
+            "price_depth": None,
+            "ym_seen": False,
+            "ym_depth": None,
+            "ym_text": [],
+            "price_in_ore": None,
+        }
+
+    def _count_player_node(self, is_text):
+        # BeautifulSoup counts every direct child node, merging adjacent text
+        slot = self.slot
+        if slot["players_depth"] != len(self.stack):
+            return
+        if not (is_text and slot["players_last_was_text"]):
+            slot["players"] += 1
+        slot["players_last_was_text"] = is_text
+
+    def _match_slot_div(self, classes, depth):
+        slot = self.slot
+        if not slot["time_seen"] and "timecell" in classes:
+            slot["time_seen"] = True
+            slot["time_depth"] = depth
+        if not slot["players_seen"] and "time-players" in classes:
+            slot["players_seen"] = True
+            slot["players_depth"] = depth
+        if not slot["price_seen"] and " ".join(classes) == PRICE_CONTAINER_CLASS:
+            slot["price_seen"] = True
+            slot["price_depth"] = depth
+        elif slot["price_depth"] is not None and not slot["ym_seen"]:
+            if "ymPrice" in classes:
+                slot["ym_seen"] = True
+                slot["ym_depth"] = depth
+
+    def handle_starttag(self, tag, attrs):
+        if self.grid_done:
+            return
+        classes = []
+        for name, value in attrs:
+            if name == "class":
+                classes = (value or "").split()
+                break
+
+        depth = len(self.stack) + 1
+        if self.grid_depth is None:
+            if tag == "div" and " ".join(classes) == GRID_CLASS:
+                self.grid_depth = depth
+                self.timeslots = []
+        elif depth == self.grid_depth + 1:
+            self.slot = self._new_slot(classes)
+        elif self.slot is not None:
+            self._count_player_node(is_text=False)
+            if tag == "div":
+                self._match_slot_div(classes, depth)
+
+        self.stack.append(tag)
+        if tag in VOID_ELEMENTS:
+            self._close_to(depth)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.grid_done or tag not in self.stack:
+            return
+        depth = len(self.stack) - self.stack[::-1].index(tag)
+        self._close_to(depth)
+
+    def _close_to(self, depth):
+        """
+        Closes every open element at `depth` or deeper, innermost first.
+        """
+        while len(self.stack) >= depth:
+            current = len(self.stack)
+            slot = self.slot
+            if slot is not None:
+                if slot["time_depth"] == current:
+                    slot["time"] = "".join(slot["time_text"]).strip()
+                    slot["time_depth"] = None
+                if slot["players_depth"] == current:
+                    slot["players_depth"] = None
+                if slot["ym_depth"] == current:
+                    slot["price_in_ore"] = price_text_to_ore("".join(slot["ym_text"]))
+                    slot["ym_depth"] = None
+                if slot["price_depth"] == current:
+                    slot["price_depth"] = None
+                if current == self.grid_depth + 1:
+                    self.timeslots.append(
+                        build_timeslot(
+                            slot["time"],
+                            slot["players"],
+                            slot["classes"],
+                            slot["price_in_ore"],
+                        )
+                    )
+                    self.slot = None
+            if current == self.grid_depth:
+                self.grid_done = True
+            self.stack.pop()
+
+    def handle_data(self, data):
+        slot = self.slot
+        if slot is None:
+            return
+        if slot["time_depth"] is not None:
+            slot["time_text"].append(data)
+        if slot["ym_depth"] is not None:
+            slot["ym_text"].append(data)
+        self._count_player_node(is_text=True)
+
+    def handle_comment(self, data):
+        if self.slot is not None:
+            self._count_player_node(is_text=False)
+
+
+def parse_streaming(html: str) -> list[dict] | None:
+    """
+    Parses only the grid container, feeding its markup to an event based parser.
+    """
+    parser = _GridEventParser()
+    parser.feed(extract_grid_markup(html) or html)
+    parser.close()
+    if parser.grid_depth is None:
+        return None
+    if parser.slot is not None:
+        # Unterminated markup, close what is left like BeautifulSoup does at EOF
+        parser._close_to(parser.grid_depth)
+    return parser.timeslots
+
+
+GRID_PARSERS: dict[str, Callable[[str], list[dict] | None]] = {
+    "html.parser": parse_with_html_parser,
+    "streaming": parse_streaming,
+}
+if LXML_AVAILABLE:
+    GRID_PARSERS["lxml"] = parse_with_lxml
+if LexborHTMLParser is not None:
+    GRID_PARSERS["selectolax"] = parse_with_selectolax
+
+
+def parse_grid_page(html: str, parser: str | None = None) -> list[dict] | None:
+    """
+    Extracts the timeslots of a booking grid page with the configured parser backend.
+
+    Args:
+        html: The grid page as returned by GolfBox.
+        parser: Backend name, defaults to settings.GOLFBOX_GRID_PARSER. Backends whose
+            library is not installed fall back to "html.parser".
+
+    Returns:
+        A list of timeslot dicts, or None if the page has no booking grid.
+    """
+    parser = parser or settings.GOLFBOX_GRID_PARSER
+    parse = GRID_PARSERS.get(parser)
+    if parse is None:
+        logger.warning(f"Grid parser '{parser}' is not available, using html.parser")
+        parse = parse_with_html_parser
+    return parse(html)
@@ -0,0 +1,188 @@
+import logging
+from datetime import date
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from golf.models import ClubDailyAvailability, GolfCourse, GridPageFingerprint, TeeTime
+from golf.utils.local_time import (
+    LOCAL_TIMEZONE,
+    local_date,
+    local_day_bounds,
+    local_minute_of_day,
+)
+
+logger = logging.getLogger("default")
+
+TEE_TIME_UPDATE_FIELDS = ["availability", "available_spots", "expired", "price_in_ore"]
+
+
+def upsert_tee_times(course: GolfCourse, timeslots: list[dict]) -> dict[str, int]:
+    """
+    Writes the scraped timeslots of a course in bulk.
+
+    Existing rows in the scraped time window are loaded in one query and diffed
+    against the scraped data. New slots are inserted with a single bulk_create,
+    changed slots are written with a single bulk_update, and unchanged slots are
+    not touched so their `last_updated` keeps pointing at the last real change.
+    The club's daily availability rollup is refreshed for the dates that changed.
+
+    Args:
+        course: The GolfCourse the timeslots belong to.
+        timeslots: Slot dicts as returned by the scraper, with an aware `time`.
+
+    Returns:
+        A dict with the number of created, updated and unchanged tee times.
+    """
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    scraped = {slot["time"]: slot for slot in timeslots if slot.get("time")}
+    if not scraped:
+        return counts
+
+    existing = {
+        tee_time.time: tee_time
+        for tee_time in TeeTime.objects.filter(
+            golf_course=course,
+            time__gte=min(scraped),
+            time__lte=max(scraped),
+        )
+    }
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for time, slot in scraped.items():
+        tee_time = existing.get(time)
+        if tee_time is None:
+            to_create.append(
+                TeeTime(
+                    time=time,
+                    golf_course=course,
+                    # bulk_create skips save(), which normally derives it
+                    local_minute_of_day=local_minute_of_day(time),
+                    **{field: slot.get(field) for field in TEE_TIME_UPDATE_FIELDS},
+                )
+            )
+            continue
+
+        changed = False
+        for field in TEE_TIME_UPDATE_FIELDS:
+            if getattr(tee_time, field) != slot.get(field):
+                setattr(tee_time, field, slot.get(field))
+                changed = True
+        if changed:
+            # bulk_update does not run auto_now, so stamp the change ourselves
+            tee_time.last_updated = now
+            to_update.append(tee_time)
+        else:
+            counts["unchanged"] += 1
+
+    with transaction.atomic():
+        if to_create:
+            # update_conflicts guards against rows inserted since the diff was read
+            TeeTime.objects.bulk_create(
+                to_create,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=["golf_course", "time"],
+                update_fields=[*TEE_TIME_UPDATE_FIELDS, "last_updated"],
+            )
+        if to_update:
+            TeeTime.objects.bulk_update(
+                to_update, [*TEE_TIME_UPDATE_FIELDS, "last_updated"], batch_size=500
+            )
+        if to_create or to_update:
+            changed_dates = [
+                local_date(tee_time.time) for tee_time in [*to_create, *to_update]
+            ]
+            refresh_club_daily_availability(
+                [course.golf_club_id], min(changed_dates), max(changed_dates)
+            )
+
+    counts["created"] = len(to_create)
+    counts["updated"] = len(to_update)
+    return counts
+
+
+def refresh_club_daily_availability(
+    club_ids: list[int], start_date: date, end_date: date
+):
+    """
+    Recomputes the ClubDailyAvailability rows of clubs for a range of local dates.
+
+    Args:
+        club_ids: Primary keys of the clubs to refresh.
+        start_date: First local date to refresh.
+        end_date: Last local date to refresh, inclusive.
+    """
+    start, end = local_day_bounds(start_date, end_date)
+    counts = (
+        TeeTime.objects.filter(
+            golf_course__golf_club_id__in=club_ids,
+            time__gte=start,
+            time__lt=end,
+            available_spots__gt=0,
+        )
+        .annotate(date=TruncDate("time", tzinfo=LOCAL_TIMEZONE))
+        .values("golf_course__golf_club_id", "date", "available_spots")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        ClubDailyAvailability.objects.filter(
+            golf_club_id__in=club_ids, date__gte=start_date, date__lte=end_date
+        ).delete()
+        ClubDailyAvailability.objects.bulk_create(
+            [
+                ClubDailyAvailability(
+                    golf_club_id=row["golf_course__golf_club_id"],
+                    date=row["date"],
+                    available_spots=row["available_spots"],
+                    count=row["count"],
+                )
+                for row in counts
+            ]
+        )
+
+
+def save_grid_page_fingerprints(
+    course: GolfCourse, changed: dict[date, dict], unchanged: list[date]
+):
+    """
+    Stores the fingerprints of the grid pages of a course after they were ingested.
+
+    Args:
+        course: The GolfCourse the pages belong to.
+        changed: New fingerprint data per date for pages whose grid changed.
+        unchanged: Dates whose page was fetched but had not changed.
+    """
+    now = timezone.now()
+    if changed:
+        GridPageFingerprint.objects.bulk_create(
+            [
+                GridPageFingerprint(
+                    golf_course=course,
+                    date=page_date,
+                    last_checked=now,
+                    last_changed=now,
+                    **fingerprint,
+                )
+                for page_date, fingerprint in changed.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["golf_course", "date"],
+            update_fields=[
+                "fingerprint",
+                "etag",
+                "last_modified",
+                "last_checked",
+                "last_changed",
+            ],
+        )
+        GridPageFingerprint.objects.filter(
+            golf_course=course, date__in=list(changed)
+        ).update(check_count=F("check_count") + 1, change_count=F("change_count") + 1)
+    if unchanged:
+        GridPageFingerprint.objects.filter(
+            golf_course=course, date__in=unchanged
+        ).update(last_checked=now, check_count=F("check_count") + 1)
@@ -0,0 +1,50 @@
+from datetime import date, datetime, time, timedelta
+import pytz
+
+# Tee times are booked in Norwegian local time, whatever the server time zone is
+LOCAL_TIMEZONE = pytz.timezone("Europe/Oslo")
+
+
+def local_date(value: datetime) -> date:
+    """
+    Local date of an aware datetime.
+    """
+    return value.astimezone(LOCAL_TIMEZONE).date()
+
+
+def local_day_start(day: date) -> datetime:
+    """
+    Aware datetime of local midnight starting `day`.
+    """
+    return LOCAL_TIMEZONE.localize(datetime.combine(day, time.min))
+
+
+def local_day_bounds(start: date, end: date | None = None) -> tuple[datetime, datetime]:
+    """
+    Half-open [start, end) datetime range covering the local days `start` to `end`.
+
+    Args:
+        start: First day of the range.
+        end: Last day of the range, inclusive. Defaults to `start`.
+
+    Returns:
+        Aware datetimes of local midnight on `start` and on the day after `end`.
+    """
+    end = end or start
+    return local_day_start(start), local_day_start(end + timedelta(days=1))
+
+
+def local_minute_of_day(value: datetime) -> int:
+    """
+    Minutes since local midnight of an aware datetime, e.g. 14:30 in Oslo is 870.
+    """
+    local = value.astimezone(LOCAL_TIMEZONE)
+    return local.hour * 60 + local.minute
+
+
+def parse_minute_of_day(time_str: str) -> int:
+    """
+    Converts a 'HH:MM' string to minutes since midnight.
+    """
+    parsed = datetime.strptime(time_str.strip(), "%H:%M").time()
+    return parsed.hour * 60 + parsed.minute
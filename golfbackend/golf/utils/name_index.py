@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from django.conf import settings
+from golf.models import GolfClub, GolfCourse
+from golf.utils.text import normalize_name
+
+logger = logging.getLogger("default")
+
+# Matches scoring lower are left out, 1 is a match of the whole query
+MIN_SCORE = 0.6
+# Clubs scoring this close to the best match are resolved along with it
+SCORE_TOLERANCE = 0.05
+
+
+def get_trigrams(text: str) -> set[str]:
+    """
+    Trigrams of each word of a normalized text, padded as pg_trgm does, so
+    "golf" gives "  g", " go", "gol", "olf" and "lf ".
+    """
+    trigrams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def get_similarity(trigrams: set[str], other: set[str]) -> float:
+    shared = len(trigrams & other)
+    return shared / (len(trigrams) + len(other) - shared) if shared else 0.0
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    club_pk: int
+    club_id: str
+    name: str
+    score: float
+
+
+class NameIndex:
+    """
+    Trigram index over the names of golf clubs and their courses.
+
+    Names are normalized, so matching ignores case, accents and Norwegian letters,
+    "Hoken" finds "Høken Golfklubb". Course names resolve to their club.
+    """
+
+    def __init__(self, names: list[tuple[int, str, str]]):
+        """
+        Args:
+            names: (club pk, club_id, name) of every club and course name.
+        """
+        self.entries = []
+        self.postings = defaultdict(set)
+        for club_pk, club_id, name in names:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            for trigram in get_trigrams(normalized):
+                self.postings[trigram].add(len(self.entries))
+            self.entries.append((club_pk, club_id, name, normalized))
+        self.built = time.monotonic()
+
+    @staticmethod
+    def score(query: str, query_trigrams: set[str], normalized: str) -> float:
+        if query in normalized:
+            return 1.0
+        # Compared with spans of as many words as the query, so "asker" is
+        # compared with "asker" and not with all of "asker golfklubb"
+        words = normalized.split()
+        length = min(len(query.split()), len(words))
+        return max(
+            get_similarity(
+                query_trigrams, get_trigrams(" ".join(words[i : i + length]))
+            )
+            for i in range(len(words) - length + 1)
+        )
+
+    def search(self, text: str, limit: int | None = 5) -> list[NameMatch]:
+        """
+        Clubs whose name or course names match a text, best match first.
+
+        Args:
+            text: A club or course name, possibly partial or misspelled.
+            limit: Maximum number of clubs returned, None for all matches.
+
+        Returns:
+            One match per club, by its best matching name.
+        """
+        query = normalize_name(text)
+        if not query:
+            return []
+        query_trigrams = get_trigrams(query)
+        candidates = set()
+        for trigram in query_trigrams:
+            candidates.update(self.postings.get(trigram, ()))
+
+        best = {}
+        for index in candidates:
+            club_pk, club_id, name, normalized = self.entries[index]
+            score = self.score(query, query_trigrams, normalized)
+            if score >= MIN_SCORE and (
+                club_pk not in best or score > best[club_pk].score
+            ):
+                best[club_pk] = NameMatch(club_pk, club_id, name, score)
+        matches = sorted(
+            best.values(), key=lambda match: (-match.score, len(match.name), match.name)
+        )
+        return matches[:limit] if limit is not None else matches
+
+
+_name_index = None
+_name_index_lock = threading.Lock()
+
+
+def build_name_index() -> NameIndex:
+    names = list(GolfClub.objects.values_list("pk", "club_id", "name"))
+    names.extend(
+        GolfCourse.objects.values_list("golf_club_id", "golf_club__club_id", "name")
+    )
+    index = NameIndex(names)
+    logger.info(f"Built name index over {len(index.entries)} club and course names")
+    return index
+
+
+def get_name_index() -> NameIndex:
+    """
+    The process wide name index, rebuilt after clubs or courses change in this
+    process or after settings.CLUB_INDEX_TTL seconds, for changes made by other
+    processes.
+    """
+    global _name_index
+    index = _name_index
+    if index is not None and time.monotonic() - index.built < settings.CLUB_INDEX_TTL:
+        return index
+    with _name_index_lock:
+        index = _name_index
+        if index is None or time.monotonic() - index.built >= settings.CLUB_INDEX_TTL:
+            index = _name_index = build_name_index()
+        return index
+
+
+def invalidate_name_index(**kwargs):
+    global _name_index
+    _name_index = None
+
+
+def resolve_club_pks(text: str) -> list[int]:
+    """
+    Pks of the clubs best matching a club or course name, empty if none match.
+    """
+    matches = get_name_index().search(text, limit=None)
+    if not matches:
+        return []
+    return [
+        match.club_pk
+        for match in matches
+        if match.score >= matches[0].score - SCORE_TOLERANCE
+    ]
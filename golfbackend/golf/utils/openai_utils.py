@@ -1,28 +1,128 @@
+import asyncio
+import copy
 import os
 import logging
 import json
-from datetime import datetime, timedelta
-from openai import OpenAI
+import weakref
+from datetime import date, datetime, timedelta
+from asgiref.sync import sync_to_async
+from openai import AsyncOpenAI, OpenAI, OpenAIError
 from django.conf import settings
+from django.utils import timezone
+from golf.models import SearchQuery
+from golf.utils.local_time import local_date, local_day_bounds
+from golf.utils.lru_cache import LRUCache
+from golf.utils.query_parser import parse_query_locally
+from golf.utils.text import prepare_query
 
 logger = logging.getLogger("default")
 
+# Parsed queries by (normalized query, local date), relative dates depend on the day
+parse_cache = LRUCache(maxsize=1024)
+_openai_clients = {}
+# Async clients hold connections bound to the event loop they were used in
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def get_openai_api_key():
+    api_key = getattr(settings, "OPENAI_API_KEY", os.environ.get("OPENAI_API_KEY"))
+    if not api_key:
+        logger.error("OpenAI API key not found in settings or environment variables")
+    return api_key
+
 
 def get_openai_client():
     """
     Get an OpenAI client instance using the API key from settings or environment variables.
+
+    Clients are reused per API key, so their connection pool is shared between requests.
     """
-    api_key = getattr(settings, "OPENAI_API_KEY", os.environ.get("OPENAI_API_KEY"))
+    api_key = get_openai_api_key()
     if not api_key:
-        logger.error("OpenAI API key not found in settings or environment variables")
         return None
 
-    return OpenAI(api_key=api_key)
+    client = _openai_clients.get(api_key)
+    if client is None:
+        client = _openai_clients[api_key] = OpenAI(
+            api_key=api_key, timeout=settings.OPENAI_TIMEOUT
+        )
+    return client
+
+
+def get_async_openai_client():
+    """
+    Async counterpart of get_openai_client, reused per event loop.
+    """
+    api_key = get_openai_api_key()
+    if not api_key:
+        return None
+
+    loop = asyncio.get_running_loop()
+    client = _async_openai_clients.get(loop)
+    if client is None or client.api_key != api_key:
+        client = _async_openai_clients[loop] = AsyncOpenAI(
+            api_key=api_key, timeout=settings.OPENAI_TIMEOUT
+        )
+    return client
+
+
+def get_previous_parse(normalized_query: str, today: date) -> dict | None:
+    """
+    The parse stored with the latest identical search made today, if any.
+    """
+    start, end = local_day_bounds(today)
+    return (
+        SearchQuery.objects.filter(
+            normalized_query=normalized_query,
+            parsed_query__isnull=False,
+            created__gte=start,
+            created__lt=end,
+        )
+        .order_by("-created")
+        .values_list("parsed_query", flat=True)
+        .first()
+    )
+
+
+def get_reusable_parse(query_text: str, today: date) -> dict | None:
+    """
+    Parses a query without OpenAI, from the cache, today's search history or the
+    rule based parser. None if OpenAI has to be asked.
+    """
+    normalized_query = prepare_query(query_text)
+    key = (normalized_query, today.isoformat())
+
+    result = parse_cache.get(key)
+    if result is None:
+        result = get_previous_parse(normalized_query, today)
+        if result is not None:
+            parse_cache.set(key, result, ttl=settings.PARSE_CACHE_TIMEOUT)
+    if result is not None:
+        logger.info(f"Reusing parse of '{query_text}'")
+        # Callers add to the parse, keep the cached one intact
+        return copy.deepcopy(result)
+
+    result, confidence = parse_query_locally(query_text, today)
+    if confidence < settings.LOCAL_PARSE_MIN_CONFIDENCE:
+        return None
+    logger.info(f"Parsed '{query_text}' locally, confidence {confidence:.2f}")
+    cache_parse(query_text, today, result)
+    return result
+
+
+def cache_parse(query_text: str, today: date, result: dict):
+    if "error" not in result:
+        key = (prepare_query(query_text), today.isoformat())
+        parse_cache.set(key, copy.deepcopy(result), ttl=settings.PARSE_CACHE_TIMEOUT)
 
 
 def parse_tee_time_query(query_text):
     """
-    Parse a natural language query for tee time search using OpenAI.
+    Parse a natural language query for tee time search, reusing earlier parses.
+
+    Parses are cached in process and looked up in today's search history, keyed on
+    the normalized query and today's date. New queries go through the rule based
+    parser first, OpenAI is only asked when it understood too little of the query.
 
     Args:
         query_text (str): Natural language query like
@@ -31,63 +131,124 @@ def parse_tee_time_query(query_text):
     Returns:
         dict: Structured data with extracted parameters like date, time_range, location, players_count
     """
-    client = get_openai_client()
-    if not client:
-        return {"error": "OpenAI API key not configured"}
+    today = local_date(timezone.now())
+    result = get_reusable_parse(query_text, today)
+    if result is None:
+        result = request_tee_time_query_parse(query_text, today)
+        cache_parse(query_text, today, result)
+    return result
+
+
+async def aparse_tee_time_query(query_text):
+    """
+    Async version of parse_tee_time_query.
+    """
+    today = local_date(timezone.now())
+    result = await sync_to_async(get_reusable_parse)(query_text, today)
+    if result is None:
+        result = await arequest_tee_time_query_parse(query_text, today)
+        cache_parse(query_text, today, result)
+    return result
+
 
+def get_completion_arguments(query_text: str, today: date) -> dict:
     system_prompt = f"""
         You are a helpful assistant that extracts structured information from natural language queries
         about golf tee times.
         Extract the following information if present:
         1. Date (specific date or relative like 'tomorrow', 'next week'. If relative translate to date or date range.
-        Today is {datetime.now().strftime("%Y-%m-%d")})
+        Today is {today.strftime("%Y-%m-%d")})
         2. Time range (morning, afternoon, evening, or specific hours). Convert to 24 hour format.
           Eg "morning" -> "06:00 to 12:00"
         3. Golf club (name of the golf club)
         4. Location (city or area).
         5. Number of players (total including the person asking)
         6. Maximum price (if mentioned)
+        7. Search radius in kilometers around the location (e.g. "within 30 km")
 
         Return the information in JSON format with these keys: date, time_range, golf_club, location,
-        players_count, max_price. If information is not provided, use null for that field.
+        players_count, max_price, radius_km. If information is not provided, use null for that field.
     """
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query_text},
+        ],
+        "response_format": {"type": "json_object"},
+    }
 
-    logger.info("Mocking OpenAI call: %s", settings.MOCK_OPENAI_CALL)
-    if settings.MOCK_OPENAI_CALL:
-        tomorrow = datetime.now() + timedelta(days=1)
-        three_days_after_tomorrow = tomorrow + timedelta(days=3)
-        tomorrow_str = tomorrow.strftime("%Y-%m-%d")
-        three_days_after_str = three_days_after_tomorrow.strftime("%Y-%m-%d")
-
-        mock_data = {
-            "date": f"{tomorrow_str} to {three_days_after_str}",
-            "location": "asker",
-            "location_additional_info": "norway",
-            "players_count": 2,
-            "max_price": 17000,
-            "time_range": None,
-            "golf_club": None,
-        }
-        response_content = json.dumps(mock_data)
-    else:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query_text},
-            ],
-            response_format={"type": "json_object"},
-        )
-        response_content = response.choices[0].message.content
 
+def get_mock_response_content() -> str:
+    tomorrow = datetime.now() + timedelta(days=1)
+    three_days_after_tomorrow = tomorrow + timedelta(days=3)
+    tomorrow_str = tomorrow.strftime("%Y-%m-%d")
+    three_days_after_str = three_days_after_tomorrow.strftime("%Y-%m-%d")
+
+    mock_data = {
+        "date": f"{tomorrow_str} to {three_days_after_str}",
+        "location": "asker",
+        "location_additional_info": "norway",
+        "players_count": 2,
+        "max_price": 17000,
+        "time_range": None,
+        "golf_club": None,
+        "radius_km": None,
+    }
+    return json.dumps(mock_data)
+
+
+def read_completion(response_content: str, today: date) -> dict:
     result = json.loads(response_content)
 
     # Process date if it's a relative reference like "tomorrow"
     if result.get("date"):
         if result["date"].lower() == "tomorrow":
-            tomorrow = datetime.now() + timedelta(days=1)
+            tomorrow = today + timedelta(days=1)
             result["date"] = tomorrow.strftime("%Y-%m-%d")
         elif result["date"].lower() == "today":
-            result["date"] = datetime.now().strftime("%Y-%m-%d")
+            result["date"] = today.strftime("%Y-%m-%d")
 
     return result
+
+
+def request_tee_time_query_parse(query_text: str, today: date) -> dict:
+    """
+    Parse a natural language query for tee time search using OpenAI.
+    """
+    client = get_openai_client()
+    if not client:
+        return {"error": "OpenAI API key not configured"}
+
+    logger.info("Mocking OpenAI call: %s", settings.MOCK_OPENAI_CALL)
+    if settings.MOCK_OPENAI_CALL:
+        return read_completion(get_mock_response_content(), today)
+    try:
+        response = client.chat.completions.create(
+            **get_completion_arguments(query_text, today)
+        )
+    except OpenAIError as e:
+        logger.error(f"OpenAI could not parse '{query_text}': {e}")
+        return {"error": "Could not parse the query"}
+    return read_completion(response.choices[0].message.content, today)
+
+
+async def arequest_tee_time_query_parse(query_text: str, today: date) -> dict:
+    """
+    Async version of request_tee_time_query_parse.
+    """
+    client = get_async_openai_client()
+    if not client:
+        return {"error": "OpenAI API key not configured"}
+
+    logger.info("Mocking OpenAI call: %s", settings.MOCK_OPENAI_CALL)
+    if settings.MOCK_OPENAI_CALL:
+        return read_completion(get_mock_response_content(), today)
+    try:
+        response = await client.chat.completions.create(
+            **get_completion_arguments(query_text, today)
+        )
+    except OpenAIError as e:
+        logger.error(f"OpenAI could not parse '{query_text}': {e}")
+        return {"error": "Could not parse the query"}
+    return read_completion(response.choices[0].message.content, today)
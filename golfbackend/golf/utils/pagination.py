@@ -0,0 +1,116 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from django.db.models import Q, QuerySet
+
+# Upper bound of the optional total, so counting never walks the whole result set
+APPROXIMATE_TOTAL_CAP = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def is_cursor_request(query_params) -> bool:
+    return query_params.get("pagination") == "cursor" or bool(
+        query_params.get("cursor")
+    )
+
+
+def encode_cursor(ordering: list[str], values: list) -> str:
+    payload = {
+        "k": ordering,
+        "v": [
+            {"dt": value.isoformat()} if isinstance(value, datetime) else value
+            for value in values
+        ],
+    }
+    encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    return encoded.rstrip("=")
+
+
+def decode_cursor(cursor: str, ordering: list[str]) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        keys, values = payload["k"], payload["v"]
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in values
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if keys != ordering or len(values) != len(ordering):
+        raise InvalidCursor("Cursor does not belong to this listing")
+    return values
+
+
+def keyset_filter(ordering: list[str], values: list) -> Q:
+    """
+    Matches the rows sorting after `values` in ascending `ordering`, i.e.
+    (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) for three fields.
+    """
+    filters = Q()
+    for index, field in enumerate(ordering):
+        equal_before = {ordering[i]: values[i] for i in range(index)}
+        filters |= Q(**equal_before, **{f"{field}__gt": values[index]})
+    return filters
+
+
+def paginate_by_cursor(
+    query_params, queryset: QuerySet, ordering: list[str], page_size: int
+) -> tuple[list, dict]:
+    """
+    Returns one page of a queryset using keyset pagination.
+
+    Instead of an OFFSET, the page continues from the last row of the previous
+    page, so every page costs the same as the first and no total is counted
+    unless asked for.
+
+    Args:
+        query_params: The request's query parameters. `cursor` is the opaque token
+            returned as `next_cursor` by the previous page and `includeTotal=true`
+            adds a total capped at APPROXIMATE_TOTAL_CAP.
+        queryset: The filtered queryset, it is reordered by `ordering`.
+        ordering: Ascending fields ending in a unique field, e.g. ["time", "id"].
+        page_size: Number of rows per page.
+
+    Returns:
+        The rows of the page, model instances or dicts for a .values() queryset,
+        and a pagination dict for the response.
+
+    Raises:
+        InvalidCursor: If the cursor was not issued for this ordering.
+    """
+    ordered = queryset.order_by(*ordering)
+    page_queryset = ordered
+    cursor = query_params.get("cursor")
+    if cursor:
+        page_queryset = ordered.filter(
+            keyset_filter(ordering, decode_cursor(cursor, ordering))
+        )
+
+    rows = list(page_queryset[: page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    pagination = {
+        "next_cursor": None,
+        "has_next": has_next,
+        "page_size": page_size,
+    }
+    if has_next:
+        last = rows[-1]
+        pagination["next_cursor"] = encode_cursor(
+            ordering,
+            [
+                last[field] if isinstance(last, dict) else getattr(last, field)
+                for field in ordering
+            ],
+        )
+    if query_params.get("includeTotal") == "true":
+        total = ordered.order_by()[: APPROXIMATE_TOTAL_CAP + 1].count()
+        pagination["total_results"] = min(total, APPROXIMATE_TOTAL_CAP)
+        pagination["total_is_approximate"] = total > APPROXIMATE_TOTAL_CAP
+    return rows, pagination
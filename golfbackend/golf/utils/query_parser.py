@@ -0,0 +1,454 @@
+import logging
+import re
+import threading
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from golf.models import GolfClub, Location
+from golf.utils.text import get_club_keywords, normalize_name, prepare_query
+
+logger = logging.getLogger("default")
+
+# Keys of a parsed query, as returned by parse_tee_time_query
+PARSED_QUERY_KEYS = [
+    "date",
+    "time_range",
+    "golf_club",
+    "location",
+    "players_count",
+    "max_price",
+    "radius_km",
+]
+
+# Words are matched after fold_letters, so "lørdag" is "lordag" and "på" is "pa"
+NUMBER_WORDS = {
+    "en": 1,
+    "ett": 1,
+    "one": 1,
+    "to": 2,
+    "two": 2,
+    "tre": 3,
+    "three": 3,
+    "fire": 4,
+    "four": 4,
+}
+WEEKDAYS = {
+    "mandag": 0,
+    "monday": 0,
+    "tirsdag": 1,
+    "tuesday": 1,
+    "onsdag": 2,
+    "wednesday": 2,
+    "torsdag": 3,
+    "thursday": 3,
+    "fredag": 4,
+    "friday": 4,
+    "lordag": 5,
+    "saturday": 5,
+    "sondag": 6,
+    "sunday": 6,
+}
+MONTHS = {
+    "januar": 1,
+    "january": 1,
+    "februar": 2,
+    "february": 2,
+    "mars": 3,
+    "march": 3,
+    "april": 4,
+    "mai": 5,
+    "may": 5,
+    "juni": 6,
+    "june": 6,
+    "juli": 7,
+    "july": 7,
+    "august": 8,
+    "september": 9,
+    "oktober": 10,
+    "october": 10,
+    "november": 11,
+    "desember": 12,
+    "december": 12,
+}
+# The time ranges the LLM is asked to convert parts of the day to
+DAYPARTS = {
+    "morning": "06:00 to 12:00",
+    "afternoon": "12:00 to 17:00",
+    "evening": "17:00 to 21:00",
+}
+DAYPART_WORDS = {
+    "morning": "morning",
+    "morgen": "morning",
+    "morgenen": "morning",
+    "formiddag": "morning",
+    "formiddagen": "morning",
+    "afternoon": "afternoon",
+    "ettermiddag": "afternoon",
+    "ettermiddagen": "afternoon",
+    "evening": "evening",
+    "kveld": "evening",
+    "kvelden": "evening",
+    "kveldstid": "evening",
+}
+# Words that carry no search parameter, they neither add to nor lower confidence
+FILLER_WORDS = set(
+    """
+    a an and any are around at available book by can close club course find for
+    free get go golf i in is like me near of on play please round search slot slots
+    some tee teetime teetimes the there time times to us want we would
+    av bane banen det et ei finn finne gjerne har hos jeg kan kl klokka klokken
+    klubb ledig ledige lyst maks max meg naer noen og om omradet onsker oss pa
+    rundt runde skal spille starttid starttider tid tider til ved vi vil
+    """.split()
+)
+# Longest place name, in words, looked for in a query
+MAX_PLACE_NAME_WORDS = 6
+
+NUMBER = rf"(\d+|{'|'.join(NUMBER_WORDS)})"
+HOUR = r"(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?"
+HOUR_WITH_MINUTES = r"(\d{1,2})[:.](\d{2})\s*(am|pm)?"
+CLOCK = r"(?:(?:kl|klokka|klokken)\s+)?"
+PLAYERS = (
+    r"(?:personer|person|pers|spillere|spiller|players|player|people|persons"
+    r"|golfere|golfers|stk)"
+)
+OTHERS = r"(?:andre|others|other|venner|friends|kompiser|buddies|mates)"
+FRIEND = r"(?:venn|venninne|friend|kompis|kamerat|buddy|mate)"
+
+
+def to_date_string(start: date, end: date | None = None) -> str:
+    if end is None or end == start:
+        return start.isoformat()
+    return f"{start.isoformat()} to {end.isoformat()}"
+
+
+def to_clock(hour: str, minute: str | None, meridiem: str | None) -> str | None:
+    """
+    Formats an hour as 'HH:MM'. Hours up to 5 without am/pm are read as afternoon
+    hours, nobody tees off at 3 at night.
+    """
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    elif meridiem is None and 0 < hour <= 5:
+        hour += 12
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def upcoming_weekday(today: date, weekday: int) -> date:
+    return today + timedelta(days=(weekday - today.weekday()) % 7)
+
+
+def dated(year: int, month: int, day: int, today: date) -> date | None:
+    """
+    The date, in the next year if no year was given and it has passed this year.
+    """
+    try:
+        value = date(year or today.year, month, day)
+        if not year and value < today:
+            value = date(today.year + 1, month, day)
+    except ValueError:
+        return None
+    return value
+
+
+def parse_iso_dates(match, today):
+    try:
+        start = date.fromisoformat(match[1])
+        end = date.fromisoformat(match[2]) if match[2] else None
+    except ValueError:
+        return None
+    if end is not None and end < start:
+        return None
+    return {"date": to_date_string(start, end)}
+
+
+def parse_dotted_date(match, today):
+    value = dated(int(match[3]), int(match[2]), int(match[1]), today)
+    return value and {"date": to_date_string(value)}
+
+
+def parse_day_month(match, today):
+    value = dated(0, MONTHS[match[2]], int(match[1]), today)
+    return value and {"date": to_date_string(value)}
+
+
+def parse_month_day(match, today):
+    value = dated(0, MONTHS[match[1]], int(match[2]), today)
+    return value and {"date": to_date_string(value)}
+
+
+def parse_weekend(match, today):
+    # On a Sunday only the rest of the day is left of the weekend
+    saturday = (
+        today - timedelta(days=1)
+        if today.weekday() == 6
+        else upcoming_weekday(today, 5)
+    )
+    return {"date": to_date_string(max(saturday, today), saturday + timedelta(days=1))}
+
+
+def parse_next_week(match, today):
+    monday = today + timedelta(days=7 - today.weekday())
+    return {"date": to_date_string(monday, monday + timedelta(days=6))}
+
+
+def parse_weekday(match, today):
+    value = upcoming_weekday(today, WEEKDAYS[match[2]])
+    if match[1] in ("next", "neste") and value == today:
+        value += timedelta(days=7)
+    return {"date": to_date_string(value)}
+
+
+def parse_radius(match, today):
+    radius_km = float(match[1].replace(",", "."))
+    # A Norwegian mil is 10 km
+    return {"radius_km": radius_km * 10 if match[2] == "mil" else radius_km}
+
+
+def parse_number(value: str) -> int:
+    return NUMBER_WORDS[value] if value in NUMBER_WORDS else int(value)
+
+
+def parse_players(match, today):
+    players_count = parse_number(match[1])
+    return {"players_count": players_count} if 0 < players_count <= 20 else None
+
+
+def parse_players_with_others(match, today):
+    players_count = parse_number(match[1]) + 1
+    return {"players_count": players_count} if players_count <= 20 else None
+
+
+def parse_time_range(match, today):
+    start = to_clock(match[1], match[2], match[3])
+    end = to_clock(match[4], match[5], match[6])
+    if start is None or end is None or end <= start:
+        return None
+    return {"time_range": f"{start} to {end}"}
+
+
+def parse_after(match, today):
+    start = to_clock(match[1], match[2], match[3])
+    return start and {"time_range": f"{start} to 23:59"}
+
+
+def parse_before(match, today):
+    end = to_clock(match[1], match[2], match[3])
+    return end and end != "00:00" and {"time_range": f"00:00 to {end}"}
+
+
+def parse_price(match, today):
+    return {"max_price": int(match[1])}
+
+
+def parse_daypart(match, today):
+    return {"time_range": DAYPARTS[DAYPART_WORDS[match[1]]]}
+
+
+def fixed(fields: dict | None = None, days: int | None = None, daypart=None):
+    """
+    Rule handler for phrases with a fixed meaning, like "i morgen" or "tonight".
+    """
+
+    def handler(match, today):
+        result = dict(fields or {})
+        if days is not None:
+            result["date"] = to_date_string(today + timedelta(days=days))
+        if daypart is not None:
+            result["time_range"] = DAYPARTS[daypart]
+        return result
+
+    return handler
+
+
+def rule(pattern: str, handler):
+    return re.compile(rf"\b{pattern}\b"), handler
+
+
+# Applied in order, each consuming the text it matched. Handlers return the fields
+# the match stands for, or None to leave the text alone.
+RULES = [
+    # Dates
+    rule(
+        r"(\d{4}-\d{2}-\d{2})(?:\s*(?:to|til|-)\s*(\d{4}-\d{2}-\d{2}))?",
+        parse_iso_dates,
+    ),
+    rule(r"(\d{1,2})\.(\d{1,2})\.(\d{4})", parse_dotted_date),
+    rule(
+        rf"(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({'|'.join(MONTHS)})",
+        parse_day_month,
+    ),
+    rule(rf"({'|'.join(MONTHS)})\s+(\d{{1,2}})(?:st|nd|rd|th)?", parse_month_day),
+    rule(r"(?:the\s+)?day\s+after\s+tomorrow|(?:i\s+)?overmorgen", fixed(days=2)),
+    rule(r"(?:i\s+morgen|imorgen)\s+tidlig", fixed(days=1, daypart="morning")),
+    rule(r"i\s+morgen|imorgen|tomorrow", fixed(days=1)),
+    rule(r"i\s+kveld|ikveld|tonight", fixed(days=0, daypart="evening")),
+    rule(r"i\s+dag|idag|today", fixed(days=0)),
+    rule(
+        r"(?:(?:this|next|denne|neste|i|over)\s+)?(?:weekend|helgen|helga|helg)",
+        parse_weekend,
+    ),
+    rule(r"(?:next|neste)\s+(?:week|uke)", parse_next_week),
+    rule(
+        rf"(?:(next|neste|this|denne|on|pa)\s+)?({'|'.join(WEEKDAYS)})(?:en)?",
+        parse_weekday,
+    ),
+    # Radius, before prices so "under 30 km" is not a price
+    rule(
+        r"(?:(?:within|innen|innenfor|under|max|maks)\s+)?(\d+(?:[.,]\d+)?)\s*"
+        r"(km|kilometer|kilometers|kilometres|mil)"
+        r"(?:\s+(?:from|of|around|fra|av|rundt))?",
+        parse_radius,
+    ),
+    # Players, before times and prices so "maks 4 spillere" is not a price
+    rule(rf"{NUMBER}\s*{PLAYERS}", parse_players),
+    rule(rf"(?:med|with)\s+{NUMBER}\s+{OTHERS}", parse_players_with_others),
+    rule(
+        rf"(?:med|with)\s+(?:a|en|ei|my|min)\s+{FRIEND}",
+        fixed({"players_count": 2}),
+    ),
+    rule(rf"(?:vi\s+er|we\s+are)\s+{NUMBER}", parse_players),
+    rule(r"alene|alone|solo|by\s+myself", fixed({"players_count": 1})),
+    # Times
+    rule(
+        rf"(?:mellom|between|fra|from|kl|klokka|klokken|at)\s+{CLOCK}{HOUR}\s*"
+        rf"(?:og|and|to|til|-)\s*{CLOCK}{HOUR}",
+        parse_time_range,
+    ),
+    rule(
+        rf"{HOUR_WITH_MINUTES}\s*(?:-|to|til)\s*{HOUR_WITH_MINUTES}", parse_time_range
+    ),
+    rule(rf"{HOUR}\s*-\s*{HOUR}", parse_time_range),
+    rule(rf"(?:etter|after|fra|from)\s+{CLOCK}{HOUR}", parse_after),
+    rule(rf"before\s+{CLOCK}{HOUR}", parse_before),
+    # Prices
+    rule(
+        r"(?:under|below|max|maks|maximum|maksimum|less\s+than|mindre\s+enn"
+        r"|billigere\s+enn|cheaper\s+than|up\s+to|opp\s+til|inntil)\s+(\d+)"
+        r"(?:\s*(?:kr|kroner|nok))?",
+        parse_price,
+    ),
+    rule(r"(\d+)\s*(?:kr|kroner|nok)", parse_price),
+    # "for 2", once dates, times and prices have claimed their numbers
+    rule(rf"for\s+{NUMBER}", parse_players),
+    rule(
+        rf"(?:(?:early|tidlig)\s+)?(?:om\s+)?({'|'.join(DAYPART_WORDS)})",
+        parse_daypart,
+    ),
+]
+
+
+_place_names = None
+_place_names_built = 0.0
+_place_names_lock = threading.Lock()
+
+
+def build_place_names() -> dict[str, tuple[str, str]]:
+    """
+    Maps normalized club names, club name keywords and geocoded location names to
+    the parsed query key and value they stand for.
+    """
+    club_names = list(GolfClub.objects.values_list("name", flat=True))
+    places = {}
+    for name in club_names:
+        for keyword in get_club_keywords(name):
+            places[normalize_name(keyword)] = ("location", keyword)
+    locations = Location.objects.filter(latitude__isnull=False).values_list(
+        "normalized_name", "name"
+    )
+    for normalized_name, name in locations:
+        places[normalized_name] = ("location", name)
+    for name in club_names:
+        places[normalize_name(name)] = ("golf_club", name)
+    return places
+
+
+def get_place_names() -> dict[str, tuple[str, str]]:
+    """
+    The process wide place names, rebuilt after clubs or locations change in this
+    process or after settings.CLUB_INDEX_TTL seconds.
+    """
+    global _place_names, _place_names_built
+    places = _place_names
+    if places is not None and time.monotonic() - _place_names_built < (
+        settings.CLUB_INDEX_TTL
+    ):
+        return places
+    with _place_names_lock:
+        if _place_names is None or time.monotonic() - _place_names_built >= (
+            settings.CLUB_INDEX_TTL
+        ):
+            _place_names = build_place_names()
+            _place_names_built = time.monotonic()
+        return _place_names
+
+
+def invalidate_place_names(**kwargs):
+    global _place_names
+    _place_names = None
+
+
+def parse_query_locally(query_text: str, today: date) -> tuple[dict, float]:
+    """
+    Parses a tee time query with fixed Norwegian and English rules.
+
+    Args:
+        query_text: Natural language query like "i morgen ettermiddag asker 2 personer".
+        today: The local date relative dates are counted from.
+
+    Returns:
+        The parsed query, shaped like the one of parse_tee_time_query, and the share
+        of the query's words that were understood. The confidence is 0 if nothing
+        was found or the query contradicts itself, such as two different dates.
+    """
+    result = dict.fromkeys(PARSED_QUERY_KEYS)
+    text = prepare_query(query_text)
+    word_count = len(text.split())
+    if not word_count:
+        return result, 0.0
+    conflicts = 0
+
+    for pattern, handler in RULES:
+
+        def consume(match):
+            nonlocal conflicts
+            fields = handler(match, today)
+            if not fields:
+                return match[0]
+            for key, value in fields.items():
+                if result[key] is not None and result[key] != value:
+                    conflicts += 1
+                result[key] = value
+            return " "
+
+        text = pattern.sub(consume, text)
+
+    places = get_place_names()
+    words = text.split()
+    unknown = 0
+    index = 0
+    while index < len(words):
+        for length in range(min(MAX_PLACE_NAME_WORDS, len(words) - index), 0, -1):
+            place = places.get(" ".join(words[index : index + length]))
+            if place is not None:
+                key, value = place
+                # A second place makes the query ambiguous
+                if result["golf_club"] or result["location"]:
+                    unknown += length
+                else:
+                    result[key] = value
+                index += length
+                break
+        else:
+            if words[index] not in FILLER_WORDS:
+                unknown += 1
+            index += 1
+
+    if conflicts or not any(value is not None for value in result.values()):
+        return result, 0.0
+    return result, 1 - unknown / word_count
@@ -1,121 +1,246 @@
 import logging
-from django.db.models import F, FloatField, ExpressionWrapper, QuerySet
-from django.db.models.functions import Sqrt, Power
+from datetime import timedelta
+import httpx
+from asgiref.sync import sync_to_async
+from django.db.models import Case, FloatField, QuerySet, Value, When
+from django.utils import timezone
 from ..models import Location  # Import Location model
+from .geo import UNKNOWN_DISTANCE_KM, get_club_spatial_index
+from .lru_cache import LRUCache
+from .text import normalize_name
+from geopy.exc import GeopyError
 from geopy.geocoders import GoogleV3
 from django.conf import settings
 
 logger = logging.getLogger("default")
 
+# Coordinates by normalized location name, (None, None) for names that failed
+geocode_cache = LRUCache(maxsize=2048)
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+_geolocator = None
 
-def get_or_geocode_location(location_query: str) -> tuple[float | None, float | None]:
+
+def get_geolocator() -> GoogleV3 | None:
     """
-    Tries to find location coordinates in the DB, falls back to Google Geocoding,
-    and caches the result back to the DB.
+    The process wide Google geocoding client, None if no API token is configured.
+    """
+    global _geolocator
+    if not settings.GOOGLE_MAPS_API_TOKEN:
+        return None
+    if _geolocator is None:
+        _geolocator = GoogleV3(
+            api_key=settings.GOOGLE_MAPS_API_TOKEN, timeout=settings.GEOCODE_TIMEOUT
+        )
+    return _geolocator
 
-    Args:
-        location_query: The location name string to search for.
+
+def cache_location(key: str, latitude: float | None, longitude: float | None, ttl=None):
+    geocode_cache.set(key, (latitude, longitude), ttl)
+
+
+def get_known_location(key: str) -> tuple[float | None, float | None] | None:
+    """
+    Coordinates of a normalized location name from the in-process cache or the DB.
 
     Returns:
-        A tuple (latitude, longitude) or (None, None) if coordinates cannot be determined.
+        (latitude, longitude), (None, None) for names that recently failed to
+        geocode, or None if the name has to be geocoded.
     """
-    target_lat = None
-    target_lon = None
-    location_name_for_db = location_query  # Use original query for name by default
+    # 1. In-process cache
+    cached = geocode_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # 2. DB lookup on the indexed normalized name
+    location_obj = Location.objects.filter(normalized_name=key).first()
+    if location_obj is None:
+        return None
+    if location_obj.latitude is not None and location_obj.longitude is not None:
+        logger.info(
+            f"Found matching location in DB: {location_obj.name} at "
+            f"({location_obj.latitude}, {location_obj.longitude})"
+        )
+        cache_location(key, location_obj.latitude, location_obj.longitude)
+        return location_obj.latitude, location_obj.longitude
+    retry_in = (
+        location_obj.last_checked
+        + timedelta(seconds=settings.GEOCODE_NEGATIVE_TTL)
+        - timezone.now()
+    ).total_seconds()
+    if retry_in > 0:
+        logger.info(f"'{location_obj.name}' could not be geocoded recently, skipping.")
+        cache_location(key, None, None, ttl=retry_in)
+        return None, None
+    return None
 
-    # 1. Try DB lookup first
-    location_obj = Location.objects.filter(name__icontains=location_query).first()
 
-    if location_obj and location_obj.latitude and location_obj.longitude:
-        target_lat = location_obj.latitude
-        target_lon = location_obj.longitude
+def store_location(
+    key: str, location_query: str, latitude: float | None, longitude: float | None
+):
+    """
+    Stores a geocoding result, or the lack of one, in the DB and the cache.
+    """
+    if latitude is not None and longitude is not None:
         logger.info(
-            f"Found matching location in DB: {location_obj.name} at ({target_lat}, {target_lon})"
+            f"Resolved '{location_query}' via Google Maps to ({latitude}, {longitude})."
         )
-        return target_lat, target_lon
+        ttl = None
+    else:
+        logger.warning(f"Google Maps could not geocode '{location_query}'.")
+        ttl = settings.GEOCODE_NEGATIVE_TTL
+
+    Location.objects.update_or_create(
+        normalized_name=key,
+        defaults={
+            "name": location_query,
+            "latitude": latitude,
+            "longitude": longitude,
+            "last_checked": timezone.now(),
+        },
+    )
+    cache_location(key, latitude, longitude, ttl=ttl)
+
+
+def get_or_geocode_location(location_query: str) -> tuple[float | None, float | None]:
+    """
+    Resolves location coordinates through the in-process cache, then the DB, then
+    Google Geocoding, and caches the result in both.
+
+    Names are compared by their normalized form, so "Asker", "asker " and "ASKER"
+    share one entry. Names Google cannot geocode are cached as misses for
+    settings.GEOCODE_NEGATIVE_TTL seconds.
+
+    Args:
+        location_query: The location name string to search for.
+
+    Returns:
+        A tuple (latitude, longitude) or (None, None) if coordinates cannot be determined.
+    """
+    key = normalize_name(location_query)
+    if not key:
+        return None, None
+    known = get_known_location(key)
+    if known is not None:
+        return known
 
     logger.info(
         f"No matching location found in DB for '{location_query}'. Trying Google Geocoding."
     )
 
-    # 2. Fallback to Google Geocoding
-    if not settings.GOOGLE_MAPS_API_TOKEN:
+    # 3. Fallback to Google Geocoding
+    geolocator = get_geolocator()
+    if geolocator is None:
         logger.error("GOOGLE_MAPS_API_TOKEN is not configured. Cannot geocode.")
         return None, None
 
-    geolocator = GoogleV3(api_key=settings.GOOGLE_MAPS_API_TOKEN)
-    geocoded_location = geolocator.geocode(location_query, timeout=5)
-    print(geocoded_location)
+    try:
+        geocoded_location = geolocator.geocode(location_query)
+    except GeopyError as e:
+        # Not cached, the next search retries
+        logger.error(f"Geocoding '{location_query}' failed: {e}")
+        return None, None
+
+    target_lat = target_lon = None
     if geocoded_location and geocoded_location.latitude and geocoded_location.longitude:
         target_lat = geocoded_location.latitude
         target_lon = geocoded_location.longitude
-        # Consider using geocoded_location.address for location_name_for_db if preferred
-        logger.info(
-            f"Resolved '{location_query}' via Google Maps to ({target_lat}, {target_lon})."
-        )
+    store_location(key, location_query, target_lat, target_lon)
+    return target_lat, target_lon
 
-        new_loc, created = Location.objects.update_or_create(
-            # Using exact name match for update_or_create might be better
-            # depending on desired behavior vs __icontains lookup.
-            name=location_name_for_db,
-            defaults={
-                "latitude": target_lat,
-                "longitude": target_lon,
-            },
-        )
-        if created:
-            logger.info(f"Created new Location entry: {new_loc.name}")
-        else:
-            logger.info(f"Updated existing Location entry for {new_loc.name}")
 
-        return target_lat, target_lon  # Return coords even if DB save failed
-    else:
-        logger.warning(f"Google Maps could not geocode '{location_query}'.")
+async def aget_or_geocode_location(
+    location_query: str,
+) -> tuple[float | None, float | None]:
+    """
+    Async version of get_or_geocode_location, calling the Google Geocoding API
+    with httpx.
+    """
+    key = normalize_name(location_query)
+    if not key:
         return None, None
+    known = await sync_to_async(get_known_location)(key)
+    if known is not None:
+        return known
+
+    if not settings.GOOGLE_MAPS_API_TOKEN:
+        logger.error("GOOGLE_MAPS_API_TOKEN is not configured. Cannot geocode.")
+        return None, None
+
+    try:
+        async with httpx.AsyncClient(timeout=settings.GEOCODE_TIMEOUT) as client:
+            response = await client.get(
+                GOOGLE_GEOCODE_URL,
+                params={
+                    "address": location_query,
+                    "key": settings.GOOGLE_MAPS_API_TOKEN,
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Geocoding '{location_query}' failed: {e}")
+        return None, None
+
+    target_lat = target_lon = None
+    if data.get("status") == "OK" and data.get("results"):
+        coordinates = data["results"][0]["geometry"]["location"]
+        target_lat, target_lon = coordinates["lat"], coordinates["lng"]
+    elif data.get("status") != "ZERO_RESULTS":
+        # Quota and key errors are not cached, the next search retries
+        logger.error(f"Geocoding '{location_query}' failed: {data.get('status')}")
+        return None, None
+    await sync_to_async(store_location)(key, location_query, target_lat, target_lon)
+    return target_lat, target_lon
 
 
 def sort_queryset_by_distance(
-    queryset: QuerySet, target_lat: float | None, target_lon: float | None
+    queryset: QuerySet,
+    target_lat: float | None,
+    target_lon: float | None,
+    radius_km: float | None = None,
 ) -> QuerySet:
     """
     Sorts a queryset of TeeTime objects by distance to a target location if coordinates are provided.
 
+    Clubs are ranked by great-circle distance with the club spatial index, so the
+    distance is computed once per club instead of once per tee time row. Tee times
+    are then annotated with their club's distance in km, tee times of clubs without
+    coordinates come last with a distance of UNKNOWN_DISTANCE_KM.
+
     Args:
         queryset: The base TeeTime queryset (already filtered).
         target_lat: The target latitude.
         target_lon: The target longitude.
+        radius_km: Only keep tee times of clubs within this distance. Clubs without
+            coordinates are left out.
 
     Returns:
         The sorted queryset (by distance then time if coordinates provided, otherwise by time).
     """
     if target_lat is not None and target_lon is not None:
         logger.info(f"Attempting to sort by distance to ({target_lat}, {target_lon})")
-        # Exclude clubs without coordinates before annotating
-        queryset_with_coords = queryset.exclude(
-            golf_course__golf_club__latitude__isnull=True
-        ).exclude(golf_course__golf_club__longitude__isnull=True)
-
-        if not queryset_with_coords.exists():
-            logger.warning(
-                "No tee times found with associated golf club coordinates for distance sorting."
+        ranked_clubs = get_club_spatial_index().ranked(
+            target_lat, target_lon, radius_km
+        )
+        if radius_km is not None:
+            # Clubs without coordinates cannot be shown to be within the radius
+            queryset = queryset.filter(
+                golf_course__golf_club_id__in=[pk for pk, _ in ranked_clubs]
             )
-            # Fallback to original queryset sorted by time if no results have coordinates
-            return queryset.order_by("time")
-
-        # Approximate distance calculation (Euclidean distance in degrees, ignoring curvature)
-        delta_lat = F("golf_course__golf_club__latitude") - target_lat
-        delta_lon = F("golf_course__golf_club__longitude") - target_lon
-        distance_sq = Power(delta_lat, 2) + Power(delta_lon, 2)
-
-        sorted_queryset = queryset_with_coords.annotate(
-            distance=ExpressionWrapper(Sqrt(distance_sq), output_field=FloatField())
-        ).order_by("distance", "time")  # Sort by distance first, then time
-
-        # Optional: Consider how to handle items excluded due to missing coordinates.
-        # Currently, they are simply left out if sorting by distance is applied.
-        # You could potentially union the sorted queryset with the excluded items
-        # if you want them appended at the end, ordered by time.
 
+        # Clubs without coordinates get a distance beyond any real one, so their
+        # tee times follow the located ones, ordered by time
+        distance = Case(
+            *[
+                When(golf_course__golf_club_id=pk, then=Value(distance_km))
+                for pk, distance_km in ranked_clubs
+            ],
+            default=Value(UNKNOWN_DISTANCE_KM),
+            output_field=FloatField(),
+        )
+        sorted_queryset = queryset.annotate(distance=distance).order_by(
+            "distance", "time"
+        )
         logger.info("Successfully sorted results by distance.")
         return sorted_queryset
     else:
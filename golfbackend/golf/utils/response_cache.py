@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger("default")
+
+DATA_VERSION_KEY = "golf:data_version"
+
+
+def get_data_version() -> str:
+    """
+    Token identifying the current state of the tee time data.
+
+    Every cached response is keyed on it, so bumping it retires them all at once.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """
+    Invalidates all cached responses, called whenever tee times are written.
+    """
+    cache.set(DATA_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    logger.info("Bumped tee time data version, cached responses are invalidated")
+
+
+def bump_data_version_if_changed(summary: dict | None):
+    if summary and (summary.get("created") or summary.get("updated")):
+        bump_data_version()
+
+
+def get_response_cache_key(view_name: str, query_params, param_names: list[str]):
+    """
+    Builds a cache key from the data version and the normalized query parameters.
+
+    Parameters other than `param_names` are ignored, blank values are dropped and
+    the page defaults to 1, so equivalent requests share an entry.
+    """
+    params = {}
+    for name in param_names:
+        value = (query_params.get(name) or "").strip()
+        if value:
+            params[name] = value
+    params.setdefault("page", "1")
+    digest = hashlib.sha1(urlencode(sorted(params.items())).encode()).hexdigest()
+    return f"golf:response:{view_name}:{get_data_version()}:{digest}"
+
+
+def get_etag(data) -> str:
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+def versioned_cache_response(param_names: list[str], timeout: int | None = None):
+    """
+    Caches successful responses of an API view until the data version changes.
+
+    Entries also expire after `timeout` seconds, defaults to
+    settings.RESPONSE_CACHE_TIMEOUT, as results depend on the current time. Every
+    response carries an ETag and requests with a matching If-None-Match get an
+    empty 304 response.
+
+    Args:
+        param_names: The query parameters the response depends on.
+        timeout: Lifetime of a cache entry in seconds.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            key = get_response_cache_key(view.__name__, request.GET, param_names)
+            cached = cache.get(key)
+            if cached is None:
+                response = view(request, *args, **kwargs)
+                # Streamed and failed responses are passed through uncached
+                if response.streaming or response.status_code != 200:
+                    return response
+                cached = (response.data, get_etag(response.data))
+                cache.set(
+                    key,
+                    cached,
+                    timeout if timeout is not None else settings.RESPONSE_CACHE_TIMEOUT,
+                )
+            data, etag = cached
+
+            # Weak comparison, compressed responses carry the ETag as W/"..."
+            if_none_match = request.headers.get("If-None-Match", "")
+            client_etags = [
+                tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+            ]
+            if etag in client_etags:
+                return Response(status=304, headers={"ETag": etag})
+            return Response(data, headers={"ETag": etag})
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,181 @@
+import heapq
+import logging
+import math
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta
+import pytz
+from django.db.models import Sum
+from django.utils import timezone
+from golf.models import GolfClub, GolfCourse, GridPageFingerprint, SearchQuery
+from golf.utils.scrape_engine import golfbox_date_to_date
+from golf.utils.text import get_club_keywords
+
+logger = logging.getLogger("default")
+
+# Staleness in minutes assumed for pages that have never been fetched
+NEVER_FETCHED_STALENESS = 24 * 60
+
+
+def get_enabled_club_keywords() -> dict[int, list[str]]:
+    return {
+        pk: get_club_keywords(name)
+        for pk, name in GolfClub.objects.filter(disabled=False).values_list(
+            "pk", "name"
+        )
+    }
+
+
+class ClubDemand:
+    """
+    Rolling count of recent searches mentioning each enabled club, keyed by club pk.
+
+    Each update only matches the searches logged since the previous one against
+    the club names, and subtracts the searches that have left the window. The
+    window is counted again from scratch when clubs are added, renamed or disabled.
+    """
+
+    def __init__(self, window: timedelta):
+        self.window = window
+        self.keywords = None
+        self.last_pk = 0
+        # (created, club pks) of the searches in the window that mention a club
+        self.matches = deque()
+        self.counts = defaultdict(int)
+
+    def update(self, now: datetime) -> dict[int, int]:
+        keywords = get_enabled_club_keywords()
+        if keywords != self.keywords:
+            self.keywords = keywords
+            self.last_pk = 0
+            self.matches.clear()
+            self.counts.clear()
+
+        since = now - self.window
+        queries = (
+            SearchQuery.objects.filter(pk__gt=self.last_pk, created__gte=since)
+            .order_by("pk")
+            .values_list("pk", "created", "query")
+        )
+        for pk, created, query in queries.iterator():
+            self.last_pk = pk
+            text = query.lower()
+            club_pks = [
+                club_pk
+                for club_pk, words in keywords.items()
+                if any(word in text for word in words)
+            ]
+            if club_pks:
+                self.matches.append((created, club_pks))
+                for club_pk in club_pks:
+                    self.counts[club_pk] += 1
+
+        while self.matches and self.matches[0][0] < since:
+            _, club_pks = self.matches.popleft()
+            for club_pk in club_pks:
+                self.counts[club_pk] -= 1
+                if not self.counts[club_pk]:
+                    del self.counts[club_pk]
+        return self.counts
+
+
+def get_course_volatility() -> dict[int, float]:
+    """
+    Share of fetches that found a changed grid, per course pk.
+
+    Smoothed so courses with little history start out at 0.5.
+    """
+    counts = GridPageFingerprint.objects.values("golf_course_id").annotate(
+        checks=Sum("check_count"), changes=Sum("change_count")
+    )
+    return {
+        row["golf_course_id"]: (row["changes"] + 1) / (row["checks"] + 2)
+        for row in counts
+    }
+
+
+class ScrapeScheduler:
+    """
+    Decides which (course, date) grid pages to refresh next within a request budget.
+
+    Every candidate page is scored by how long ago it was fetched, weighted by how
+    close the date is, how often the course's grid changed historically and how
+    often users searched for its club. The highest scoring pages are fetched first,
+    so refreshes go where the data moves and where users look.
+    """
+
+    def __init__(
+        self, min_interval: timedelta, demand_window: timedelta = timedelta(days=7)
+    ):
+        self.min_interval = min_interval
+        self.demand = ClubDemand(demand_window)
+        # Fetch attempts of this process, so failing pages do not hog the budget
+        self.attempts = {}
+
+    def prune_attempts(self, today: date):
+        self.attempts = {
+            key: attempted
+            for key, attempted in self.attempts.items()
+            if key[1] >= today
+        }
+
+    def score(self, staleness_minutes, days_ahead, volatility, demand) -> float:
+        proximity = 1 / (1 + max(days_ahead, 0))
+        return staleness_minutes * proximity * volatility * (1 + math.log1p(demand))
+
+    def next_tasks(
+        self, dates: list[str], budget: int
+    ) -> list[tuple[GolfCourse, list[str]]]:
+        """
+        Returns up to `budget` pages to fetch among `dates`, grouped per course for
+        the scrape engine.
+        """
+        now = timezone.now()
+        today = now.astimezone(pytz.timezone("Europe/Oslo")).date()
+        page_dates = {date_str: golfbox_date_to_date(date_str) for date_str in dates}
+        self.prune_attempts(today)
+
+        courses = {
+            course.pk: course
+            for course in GolfCourse.objects.filter(
+                golf_club__disabled=False
+            ).select_related("golf_club")
+        }
+        last_checked = dict(
+            (
+                (fingerprint["golf_course_id"], fingerprint["date"]),
+                fingerprint["last_checked"],
+            )
+            for fingerprint in GridPageFingerprint.objects.filter(
+                date__in=list(page_dates.values())
+            ).values("golf_course_id", "date", "last_checked")
+        )
+        volatility = get_course_volatility()
+        demand = self.demand.update(now)
+
+        candidates = []
+        for course in courses.values():
+            for date_str, page_date in page_dates.items():
+                key = (course.pk, page_date)
+                checked = max(
+                    filter(None, [last_checked.get(key), self.attempts.get(key)]),
+                    default=None,
+                )
+                if checked is None:
+                    staleness = NEVER_FETCHED_STALENESS
+                elif now - checked < self.min_interval:
+                    continue
+                else:
+                    staleness = (now - checked).total_seconds() / 60
+                score = self.score(
+                    staleness,
+                    (page_date - today).days,
+                    volatility.get(course.pk, 0.5),
+                    demand.get(course.golf_club_id, 0),
+                )
+                candidates.append((score, course.pk, date_str))
+
+        tasks = defaultdict(list)
+        for _, course_pk, date_str in heapq.nlargest(budget, candidates):
+            tasks[course_pk].append(date_str)
+            self.attempts[(course_pk, page_dates[date_str])] = now
+        return [(courses[course_pk], dates) for course_pk, dates in tasks.items()]
@@ -0,0 +1,162 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Callable
+from django.conf import settings
+from django.db import close_old_connections
+from golf.models import GolfCourse, GridPageFingerprint
+from golf.utils.ingest import save_grid_page_fingerprints
+from golf.utils.scraping import fetch_grid_page, get_cookies
+from golf.utils.throttling import HostThrottle
+
+logger = logging.getLogger("default")
+
+
+def get_default_throttle() -> HostThrottle:
+    return HostThrottle(
+        rate=settings.GOLFBOX_REQUESTS_PER_SECOND,
+        burst=settings.GOLFBOX_REQUEST_BURST,
+        max_concurrent=settings.GOLFBOX_MAX_CONCURRENT_PER_HOST,
+    )
+
+
+def golfbox_date_to_date(date_str: str) -> date:
+    return datetime.strptime(date_str, "%Y%m%dT%H%M%S").date()
+
+
+def fetch_grid_page_in_worker(*args) -> dict:
+    """
+    Runs fetch_grid_page on a worker thread. Cold starts and logins read and write
+    the cookie table from the worker, so its database connection is closed after.
+    """
+    try:
+        return fetch_grid_page(*args)
+    finally:
+        close_old_connections()
+
+
+def load_grid_page_fingerprints(courses: list[GolfCourse]) -> dict:
+    fingerprints = GridPageFingerprint.objects.filter(golf_course__in=courses).values(
+        "golf_course_id", "date", "fingerprint", "etag", "last_modified"
+    )
+    return {
+        (fingerprint.pop("golf_course_id"), fingerprint.pop("date")): fingerprint
+        for fingerprint in fingerprints
+    }
+
+
+def scrape_course_dates(
+    tasks: list[tuple[GolfCourse, list[str]]],
+    on_course_scraped: Callable[[GolfCourse, list[dict]], dict | None],
+    workers: int | None = None,
+    throttle: HostThrottle | None = None,
+    incremental: bool = True,
+) -> dict[str, int]:
+    """
+    Fetches the booking grid of every (course, date) pair on a bounded worker pool.
+
+    Requests are spread over the pool and paced by the throttle, so wall time is
+    bounded by the politeness budget rather than the number of clubs. Worker
+    threads only do HTTP and parsing; `on_course_scraped` is called on the calling
+    thread once every date of a course has been fetched, which keeps all database
+    writes on a single connection.
+
+    Every page's grid is fingerprinted. Pages whose fingerprint matches the one
+    stored on the previous run are neither parsed nor written, and a course whose
+    pages are all unchanged never reaches `on_course_scraped`.
+
+    Args:
+        tasks: Pairs of a GolfCourse (with golf_club selected) and the dates to fetch.
+        on_course_scraped: Callback receiving the course and the timeslots of its
+            changed pages. Counts in a returned dict are added to the summary.
+        workers: Size of the worker pool. Defaults to settings.GOLFBOX_SCRAPE_WORKERS.
+        throttle: Per-host limiter. Defaults to one built from settings.
+        incremental: Skip unchanged pages. When False every page is parsed and
+            ingested, while fingerprints are still recorded.
+
+    Returns:
+        A summary dict with the number of pages fetched, failed pages, fingerprint
+        hits and misses, timeslots and any counts reported by `on_course_scraped`.
+    """
+    workers = workers or settings.GOLFBOX_SCRAPE_WORKERS
+    throttle = throttle or get_default_throttle()
+    summary = {
+        "pages": 0,
+        "failed_pages": 0,
+        "fingerprint_hits": 0,
+        "fingerprint_misses": 0,
+        "timeslots": 0,
+    }
+    tasks = [(course, dates) for course, dates in tasks if dates]
+    if not tasks:
+        return summary
+
+    known_fingerprints = load_grid_page_fingerprints([course for course, _ in tasks])
+    # Warm the session cookies once so workers start from the in-memory cache
+    get_cookies()
+    courses = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for course, dates in tasks:
+            courses[course.pk] = {
+                "course": course,
+                "pending": len(dates),
+                "timeslots": [],
+                "changed": {},
+                "unchanged": [],
+            }
+            for date_str in dates:
+                page_date = golfbox_date_to_date(date_str)
+                future = executor.submit(
+                    fetch_grid_page_in_worker,
+                    course.course_id,
+                    course.golf_club.club_id,
+                    course.name,
+                    date_str,
+                    known_fingerprints.get((course.pk, page_date)),
+                    throttle,
+                    not incremental,
+                )
+                futures[future] = (course.pk, page_date)
+
+        for future in as_completed(futures):
+            course_pk, page_date = futures[future]
+            state = courses[course_pk]
+            course = state["course"]
+            summary["pages"] += 1
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.error(f"Failed to scrape {course.name} on {page_date}: {e}")
+                page = None
+
+            if page is None or page["fingerprint"] is None:
+                summary["failed_pages"] += 1
+            elif page["changed"]:
+                summary["fingerprint_misses"] += 1
+                state["changed"][page_date] = page["fingerprint"]
+                state["timeslots"].extend(page["timeslots"])
+            else:
+                summary["fingerprint_hits"] += 1
+                state["unchanged"].append(page_date)
+                state["timeslots"].extend(page["timeslots"] or [])
+
+            state["pending"] -= 1
+            if state["pending"] == 0:
+                del courses[course_pk]
+                finish_course(state, on_course_scraped, summary)
+
+    return summary
+
+
+def finish_course(state: dict, on_course_scraped: Callable, summary: dict):
+    course = state["course"]
+    if state["timeslots"]:
+        summary["timeslots"] += len(state["timeslots"])
+        result = on_course_scraped(course, state["timeslots"])
+        for key, value in (result or {}).items():
+            summary[key] = summary.get(key, 0) + value
+    # Only record fingerprints once their timeslots are stored, so a failed
+    # write is retried on the next run instead of being skipped as unchanged
+    save_grid_page_fingerprints(course, state["changed"], state["unchanged"])
@@ -1,10 +1,17 @@
+import hashlib
 import requests
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup
 import pytz
 from django.conf import settings
+from django.db import DatabaseError, transaction
 import logging
 from golf.models import GolfBoxCookie
+from golf.utils.grid_parsers import extract_grid_markup, parse_grid_page
+from golf.utils.throttling import HostThrottle
 from django.utils import timezone
 
 logger = logging.getLogger("default")
@@ -13,10 +20,159 @@ golfbox_base_url = "https://www.golfbox.no"
 golfbox_club_url = f"{golfbox_base_url}/site/ressources/booking/chooseclub.asp"
 golfbox_booking_url = f"{golfbox_base_url}/site/my_golfbox/ressources/booking/grid.asp"
 golfbox_login_url = f"{golfbox_base_url}/login.asp"
+golfbox_cookie_lifetime = timedelta(minutes=10)
+golfbox_cookie_refresh_margin = timedelta(minutes=1)
+golfbox_user_agent = (
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+)
+
+
+class GolfBoxClient:
+    """
+    Shared HTTP client for every request made to GolfBox.
+
+    Owns a keep-alive requests.Session with a connection pool sized for the scrape
+    workers, retries with exponential backoff on connection errors and transient
+    status codes, and gzip transfer encoding. TCP and TLS handshakes are then paid
+    once per pooled connection instead of once per page.
+    """
+
+    def __init__(self, pool_size: int, retries: int, backoff_factor: float, timeout):
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+            pool_block=True,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Accept": "*/*",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+                "User-Agent": golfbox_user_agent,
+            }
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        authenticated: bool = True,
+        throttle: HostThrottle | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if not authenticated:
+            return self._send(method, url, throttle, **kwargs)
+
+        cookies = get_cookies()
+        response = self._send(method, url, throttle, cookies=cookies, **kwargs)
+        if is_logged_out_response(response):
+            # The session was dropped before it expired, log in again once and retry
+            logger.warning(f"GolfBox session expired early, logging in again: {url}")
+            cookies = relogin_golfbox(cookies)
+            response = self._send(method, url, throttle, cookies=cookies, **kwargs)
+            if is_logged_out_response(response):
+                logger.error(f"GolfBox still reports logged out after re-login: {url}")
+        return response
+
+    def _send(self, method, url, throttle, **kwargs) -> requests.Response:
+        if throttle is None:
+            return self.session.request(method, url, **kwargs)
+        with throttle.limit(url):
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+_golfbox_client = None
+_golfbox_client_lock = threading.Lock()
+
+
+def get_golfbox_client() -> GolfBoxClient:
+    global _golfbox_client
+    if _golfbox_client is None:
+        with _golfbox_client_lock:
+            if _golfbox_client is None:
+                _golfbox_client = GolfBoxClient(
+                    pool_size=max(
+                        settings.GOLFBOX_SCRAPE_WORKERS,
+                        settings.GOLFBOX_MAX_CONCURRENT_PER_HOST,
+                    ),
+                    retries=settings.GOLFBOX_REQUEST_RETRIES,
+                    backoff_factor=settings.GOLFBOX_REQUEST_BACKOFF,
+                    timeout=settings.GOLFBOX_REQUEST_TIMEOUT,
+                )
+    return _golfbox_client
+
+
+def is_logged_out_response(response: requests.Response) -> bool:
+    """
+    GolfBox answers with its login form instead of an error when the session is gone.
+    """
+    return "loginform.username" in response.text
+
+
+class GolfBoxLoginError(Exception):
+    """
+    Raised when GolfBox rejects the login, and until the failed login may be retried.
+    """
+
+
+# Cookies of the current GolfBox session as (cookies, expires), swapped atomically
+_cookie_cache = (None, None)
+_cookie_lock = threading.RLock()
+# When a failed login may be retried, so the worker pool does not keep sending
+# rejected credentials to GolfBox
+_login_retry_at = None
+
+
+def check_login_backoff():
+    if _login_retry_at is not None and timezone.now() < _login_retry_at:
+        raise GolfBoxLoginError(
+            f"GolfBox login failed, not retrying before {_login_retry_at}"
+        )
+
+
+def store_cookies(cookies_dict: dict, expiration):
+    try:
+        # Persisted so the next process can skip the login on a cold start
+        with transaction.atomic():
+            GolfBoxCookie.objects.all().delete()
+            GolfBoxCookie.objects.bulk_create(
+                GolfBoxCookie(name=name, value=value, expires=expiration)
+                for name, value in cookies_dict.items()
+            )
+    except DatabaseError as e:
+        logger.error(f"Failed to store GolfBox cookies: {e}")
 
 
 def login_golfbox():
-    with requests.Session() as session:
+    """
+    Logs in to GolfBox and caches the session cookies.
+
+    Raises:
+        GolfBoxLoginError: If the login failed, or failed less than
+            settings.GOLFBOX_LOGIN_BACKOFF seconds ago.
+    """
+    global _cookie_cache, _login_retry_at
+    with _cookie_lock:
+        check_login_backoff()
+        client = get_golfbox_client()
         form_data = {
             "command": "login",
             "loginform.submitted": "true",
@@ -26,30 +182,89 @@ def login_golfbox():
         }
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
-            "Accept": "*/*",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "User-Agent": "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
         }
-        session.post(golfbox_login_url, headers=headers, data=form_data, verify=True)
-        cookies_dict = requests.utils.dict_from_cookiejar(session.cookies)
-        GolfBoxCookie.objects.all().delete()
-        expiration = timezone.now() + timedelta(minutes=10)
-        for name, value in cookies_dict.items():
-            GolfBoxCookie.objects.create(name=name, value=value, expires=expiration)
+        client.session.cookies.clear()
+        try:
+            response = client.post(
+                golfbox_login_url,
+                authenticated=False,
+                headers=headers,
+                data=form_data,
+                verify=True,
+            )
+            error = None
+            if not response.ok:
+                error = f"status {response.status_code}"
+            elif is_logged_out_response(response):
+                error = "the login form was returned, are the credentials correct?"
+        except requests.RequestException as e:
+            error = str(e)
+        if error is not None:
+            _cookie_cache = (None, None)
+            _login_retry_at = timezone.now() + timedelta(
+                seconds=settings.GOLFBOX_LOGIN_BACKOFF
+            )
+            # Drop the rejected session from the cookie table as well
+            store_cookies({}, _login_retry_at)
+            raise GolfBoxLoginError(
+                f"GolfBox login failed: {error}, not retrying before {_login_retry_at}"
+            )
+
+        _login_retry_at = None
+        cookies_dict = requests.utils.dict_from_cookiejar(client.session.cookies)
+        expiration = timezone.now() + golfbox_cookie_lifetime
+        _cookie_cache = (cookies_dict, expiration)
+        store_cookies(cookies_dict, expiration)
         return cookies_dict
 
 
 def get_cookies():
-    cookies = GolfBoxCookie.objects.filter(expires__gt=timezone.now())
-    if cookies.exists():
-        return {cookie.name: cookie.value for cookie in cookies}
-    return login_golfbox()
+    """
+    Returns the cookies of a valid GolfBox session.
+
+    Served from memory on the hot path. The cookie table is only read on a cold
+    start, and the session is renewed shortly before it expires. The lock makes
+    sure concurrent callers trigger a single login rather than one each.
+
+    Raises:
+        GolfBoxLoginError: If logging in failed.
+    """
+    global _cookie_cache
+    cookies, expires = _cookie_cache
+    if cookies is not None and expires - golfbox_cookie_refresh_margin > timezone.now():
+        return cookies
+
+    with _cookie_lock:
+        cookies, expires = _cookie_cache
+        refresh_at = timezone.now() + golfbox_cookie_refresh_margin
+        if cookies is not None and expires > refresh_at:
+            return cookies
+        if cookies is None:
+            check_login_backoff()
+            stored = list(GolfBoxCookie.objects.filter(expires__gt=refresh_at))
+            if stored:
+                cookies = {cookie.name: cookie.value for cookie in stored}
+                _cookie_cache = (cookies, min(cookie.expires for cookie in stored))
+                return cookies
+        return login_golfbox()
+
+
+def relogin_golfbox(stale_cookies: dict):
+    """
+    Logs in again after `stale_cookies` were rejected by GolfBox.
+
+    Callers that saw the same stale session share one login; anyone arriving after
+    the session was already renewed gets the new cookies straight away.
+    """
+    with _cookie_lock:
+        cookies, _ = _cookie_cache
+        if cookies is not None and cookies is not stale_cookies:
+            return cookies
+        return login_golfbox()
 
 
 def parse_golf_clubs(max_amount=20):
-    cookies = get_cookies()
-    response = requests.get(golfbox_club_url, cookies=cookies)
+    response = get_golfbox_client().get(golfbox_club_url)
     soup = BeautifulSoup(response.text, "html.parser")
     if not soup:
         return None
@@ -82,9 +297,7 @@ def parse_golf_courses_of_club(club_id: str):
         "ddlResource": "",
     }
 
-    cookies = get_cookies()
-
-    response = requests.post(url, data=form_data, cookies=cookies)
+    response = get_golfbox_client().post(url, data=form_data)
     soup = BeautifulSoup(response.text, "html.parser")
     if not soup:
         return None
@@ -116,85 +329,6 @@ def get_course_url(course_id, club_id, selected_date):
     return f"{golfbox_booking_url}?SelectedDate={selected_date}&Ressource_GUID={{{course_id}}}&Club_GUID={{{club_id}}}"
 
 
-def is_expired(child):
-    return "expired" in child["class"]
-
-
-def get_time(child):
-    timeCellDiv = child.find("div", {"class": "timecell"})
-    return timeCellDiv.text.strip() if timeCellDiv else None
-
-
-def get_players(child):
-    playerContainerDiv = child.find("div", {"class": "time-players"})
-    if playerContainerDiv and playerContainerDiv.children:
-        playerDivs = list(playerContainerDiv.children)
-        return len(playerDivs)
-    return 0
-
-
-def get_availability(child):
-    classes = child["class"]
-    if "free" in classes:
-        return "free"
-    elif "c_partfree" in classes:
-        return "partfree"
-    elif "full" in classes:
-        return "full"
-    elif "blocking" in classes:
-        return "blocking"
-    return "unknown"
-
-
-def get_price_in_ore(child):
-    priceContainerDiv = child.find(
-        "div", {"class": "d-flex flex-row flex-center pt-2 pointer"}
-    )
-    if priceContainerDiv is None:
-        return None
-    priceDiv = priceContainerDiv.find("div", {"class": "ymPrice"})
-    if priceDiv:
-        price_in_kr_string = priceDiv.text.strip()
-        price_in_kr_string = price_in_kr_string.replace(",", "").replace("-", "")
-        if price_in_kr_string:
-            return int(price_in_kr_string) * 100
-    return None
-
-
-def process_child(child):
-    if isinstance(child, Tag):
-        time = get_time(child)
-        available_spots = 4 - get_players(child)
-        availability = get_availability(child)
-        price_in_ore = get_price_in_ore(child)
-        if availability == "blocking":
-            available_spots = 0
-        expired = is_expired(child)
-        return {
-            "time": time,
-            "availability": availability,
-            "available_spots": available_spots,
-            "expired": expired,
-            "price_in_ore": price_in_ore,
-        }
-    else:
-        logger.warning(f"child is not a tag: {child}")
-        return None
-
-
-def get_timeslots_of_course_day(soup):
-    div = soup.find("div", {"class": "w-100 classicgrid portal d-flexformlist"})
-    if div is None:
-        return None
-    children = div.children
-    result = []
-    for child in children:
-        processed = process_child(child)
-        if processed is not None:
-            result.append(processed)
-    return result
-
-
 def date_str_to_datetime(date_str: str, time_str: str, timezone_str="Europe/Oslo"):
     if not date_str or not time_str:
         return None
@@ -206,24 +340,89 @@ def date_str_to_datetime(date_str: str, time_str: str, timezone_str="Europe/Oslo
     return aware_datetime
 
 
+def grid_page_fingerprint(html: str) -> str:
+    """
+    Hashes the booking grid of a page, ignoring the navigation and session noise
+    around it, so the hash only changes when the tee times do.
+    """
+    markup = extract_grid_markup(html) or html
+    return hashlib.sha256(markup.encode("utf-8")).hexdigest()
+
+
+def fetch_grid_page(
+    course_id: str,
+    club_id: str,
+    course_name: str,
+    date: str,
+    previous: dict | None = None,
+    throttle: HostThrottle | None = None,
+    force: bool = False,
+) -> dict:
+    """
+    Fetches the booking grid of a course on one date, skipping parsing if unchanged.
+
+    Args:
+        previous: The fingerprint, etag and last_modified stored for this page on the
+            last run. Sent as conditional request headers and compared to the new
+            grid hash.
+        force: Always parse the page, still reporting whether it changed.
+
+    Returns:
+        A dict with `changed`, the page `fingerprint` data to store, and the parsed
+        `timeslots` (None when the page is unchanged or has no grid).
+    """
+    url = get_course_url(course_id, club_id, date)
+    headers = {}
+    if previous and not force:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+    response = get_golfbox_client().post(url, headers=headers, throttle=throttle)
+
+    if previous and response.status_code == 304:
+        return {"changed": False, "fingerprint": previous, "timeslots": None}
+
+    fingerprint = {
+        "fingerprint": grid_page_fingerprint(response.text),
+        "etag": response.headers.get("ETag", ""),
+        "last_modified": response.headers.get("Last-Modified", ""),
+    }
+    changed = not previous or previous.get("fingerprint") != fingerprint["fingerprint"]
+    if not changed and not force:
+        return {"changed": False, "fingerprint": fingerprint, "timeslots": None}
+
+    timeslots = parse_grid_page(response.text)
+    if timeslots is None:
+        logger.error(f"Failed to get timeslots for {course_name} on {date}")
+        return {"changed": changed, "fingerprint": None, "timeslots": None}
+    result = []
+    for slot in timeslots:
+        slot["time"] = date_str_to_datetime(date, slot["time"])
+        if slot["time"] is None:
+            # Blocking timeslots have no time, so we skip them
+            continue
+        result.append(slot)
+    return {"changed": changed, "fingerprint": fingerprint, "timeslots": result}
+
+
+def get_timeslots_of_course_date(
+    course_id: str,
+    club_id: str,
+    course_name: str,
+    date: str,
+    throttle: HostThrottle | None = None,
+):
+    page = fetch_grid_page(course_id, club_id, course_name, date, throttle=throttle)
+    return page["timeslots"]
+
+
 def get_timeslots_of_course(
     course_id: str, club_id: str, course_name: str, relevant_dates: list[str]
 ):
     all_timeslots = []
-    cookies = get_cookies()
     for date in relevant_dates:
-        url = get_course_url(course_id, club_id, date)
-        response = requests.post(url, cookies=cookies)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        timeslots = get_timeslots_of_course_day(soup)
-        if timeslots is None:
-            logger.error(f"Failed to get timeslots for {course_name} on {date}")
-            continue
-        for slot in timeslots:
-            slot["time"] = date_str_to_datetime(date, slot["time"])
-            if slot["time"] is None:
-                # Blocking timeslots have no time, so we skip them
-                continue
-            all_timeslots.append(slot)
+        timeslots = get_timeslots_of_course_date(course_id, club_id, course_name, date)
+        if timeslots:
+            all_timeslots.extend(timeslots)
     return all_timeslots
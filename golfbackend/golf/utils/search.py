@@ -0,0 +1,197 @@
+import logging
+import time
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.utils import timezone
+from golf.models import SearchQuery, TeeTime
+from golf.serializers import TEE_TIME_SHAPES, get_tee_time_rows, serialize_tee_time_page
+from golf.utils.name_index import get_name_index
+from golf.utils.pagination import is_cursor_request, paginate_by_cursor
+from golf.utils.query_utils import (
+    aget_or_geocode_location,
+    get_or_geocode_location,
+    sort_queryset_by_distance,
+)
+from golf.utils.search_log import search_log
+
+logger = logging.getLogger("default")
+
+SEARCH_PAGE_SIZE = 100
+
+
+def get_search_request_error(query_params) -> str | None:
+    """
+    Validates the query parameters of a search, returns the error message if invalid.
+    """
+    if not query_params.get("query"):
+        return "Query parameter is required"
+    if query_params.get("shape", "full") not in TEE_TIME_SHAPES:
+        return f"shape must be one of {', '.join(TEE_TIME_SHAPES)}"
+    return None
+
+
+def log_search_query(
+    query: str,
+    parsed_query: dict,
+    started: float,
+    result_count: int | None = None,
+):
+    """
+    Queues a search for the search log, written after the response is sent.
+
+    Args:
+        query: The query text.
+        parsed_query: The parsed query. Stored without the golf_club_id looked up
+            for it, as parse_tee_time_query returned it, for identical searches
+            made today to reuse.
+        started: time.perf_counter() when the search started.
+        result_count: Number of tee times found, if counted.
+    """
+    if "error" in parsed_query:
+        parsed_query = None
+    else:
+        parsed_query = {
+            key: value for key, value in parsed_query.items() if key != "golf_club_id"
+        }
+    search_log.add(
+        SearchQuery(
+            query=query,
+            parsed_query=parsed_query,
+            latency_ms=round((time.perf_counter() - started) * 1000),
+            result_count=result_count,
+        )
+    )
+
+
+def find_club_id(parsed_query: dict) -> str | None:
+    """
+    The club_id of the club best matching the parsed golf club or location name.
+    """
+    club_identifier = parsed_query.get("golf_club") or parsed_query.get("location")
+    if not club_identifier:
+        return None
+    matches = get_name_index().search(club_identifier, limit=1)
+    if not matches:
+        return None
+    logger.info(
+        f"Found matching GolfClub ID: {matches[0].club_id} for identifier: "
+        f"'{club_identifier}', score {matches[0].score:.2f}"
+    )
+    return matches[0].club_id
+
+
+def find_club_id_in_worker(parsed_query: dict) -> str | None:
+    """
+    Runs find_club_id off the shared sync thread, so the async search overlaps it
+    with the location lookup. Rebuilding the name index reads the clubs from the
+    worker, so its database connection is closed after.
+    """
+    try:
+        return find_club_id(parsed_query)
+    finally:
+        close_old_connections()
+
+
+def log_unresolved_location(location_query: str):
+    logger.warning(
+        f"Could not resolve coordinates for location: '{location_query}'. "
+        f"Proceeding without distance sorting."
+    )
+
+
+def get_result_count(data: dict) -> int | None:
+    # Cursor pages only count the results when asked to
+    return data["pagination"].get("total_results")
+
+
+def resolve_location(parsed_query: dict) -> tuple[float | None, float | None]:
+    location_query = parsed_query.get("location")
+    if not location_query:
+        return None, None
+    logger.info(f"Attempting to resolve coordinates for location: '{location_query}'")
+    target_lat, target_lon = get_or_geocode_location(location_query)
+    if target_lat is None and target_lon is None:
+        log_unresolved_location(location_query)
+    return target_lat, target_lon
+
+
+async def aresolve_location(parsed_query: dict) -> tuple[float | None, float | None]:
+    location_query = parsed_query.get("location")
+    if not location_query:
+        return None, None
+    logger.info(f"Attempting to resolve coordinates for location: '{location_query}'")
+    target_lat, target_lon = await aget_or_geocode_location(location_query)
+    if target_lat is None and target_lon is None:
+        log_unresolved_location(location_query)
+    return target_lat, target_lon
+
+
+def search_tee_times(
+    query_params,
+    parsed_query: dict,
+    target_lat: float | None,
+    target_lon: float | None,
+) -> dict:
+    """
+    Finds the page of tee times matching a parsed query, nearest clubs first.
+
+    Args:
+        query_params: The request's query parameters, for the radius, shape and
+            pagination.
+        parsed_query: The parsed query, with the golf_club_id of a matching club.
+        target_lat: Latitude of the searched location, if it was resolved.
+        target_lon: Longitude of the searched location, if it was resolved.
+
+    Returns:
+        The response body.
+
+    Raises:
+        InvalidCursor: If the cursor parameter is invalid.
+    """
+    filters = TeeTime.apply_filters(parsed_query)
+
+    # Ensure we only get tee times from current time or future, not just current date
+    now = timezone.now()
+    base_queryset = TeeTime.objects.filter(filters).filter(time__gte=now)
+
+    radius_km = query_params.get("radiusKm") or parsed_query.get("radius_km")
+    try:
+        radius_km = float(radius_km) if radius_km else None
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid radius: {radius_km}")
+        radius_km = None
+
+    tee_times = sort_queryset_by_distance(
+        base_queryset, target_lat, target_lon, radius_km
+    )
+    ordering = ["time", "id"]
+    if "distance" in tee_times.query.annotations:
+        ordering = ["distance", "time", "id"]
+    tee_times = get_tee_time_rows(tee_times)
+    shape = query_params.get("shape", "full")
+
+    if is_cursor_request(query_params):
+        page, pagination = paginate_by_cursor(
+            query_params, tee_times, ordering, SEARCH_PAGE_SIZE
+        )
+        return {
+            "parsed_query": parsed_query,
+            **serialize_tee_time_page(page, shape),
+            "pagination": pagination,
+        }
+
+    paginator = Paginator(tee_times, SEARCH_PAGE_SIZE)
+    page_number = query_params.get("page", 1)
+    page_obj = paginator.get_page(page_number)
+
+    return {
+        "parsed_query": parsed_query,
+        **serialize_tee_time_page(page_obj, shape),
+        "pagination": {
+            "total_results": paginator.count,
+            "total_pages": paginator.num_pages,
+            "current_page": page_obj.number,
+            "has_next": page_obj.has_next(),
+            "has_previous": page_obj.has_previous(),
+        },
+    }
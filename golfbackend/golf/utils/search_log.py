@@ -0,0 +1,111 @@
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError, connection
+from golf.models import SearchQuery
+from golf.utils.text import prepare_query
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+logger = logging.getLogger("default")
+
+
+class SearchLogBuffer:
+    """
+    In-process buffer of SearchQuery rows, written with one bulk insert.
+
+    Flushed at the end of a request, after the response has been sent, once it holds
+    settings.SEARCH_LOG_BATCH_SIZE rows or its oldest row has waited
+    settings.SEARCH_LOG_FLUSH_INTERVAL seconds. A timer flushes rows that have
+    waited that long in a process that gets no further requests, and the buffer is
+    flushed when the process exits. A process killed without exiting, like a
+    uWSGI harakiri, loses at most the rows of the last interval.
+    """
+
+    def __init__(self):
+        self._rows = []
+        self._oldest = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, search_query: SearchQuery):
+        # bulk_create skips save(), which sets the normalized query
+        search_query.normalized_query = prepare_query(search_query.query)
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+                self._start_timer()
+            self._rows.append(search_query)
+
+    def _start_timer(self):
+        self._timer = threading.Timer(
+            settings.SEARCH_LOG_FLUSH_INTERVAL, self.flush_from_timer
+        )
+        self._timer.daemon = True
+        self._timer.start()
+
+    def is_due(self) -> bool:
+        with self._lock:
+            return bool(self._rows) and (
+                len(self._rows) >= settings.SEARCH_LOG_BATCH_SIZE
+                or time.monotonic() - self._oldest >= settings.SEARCH_LOG_FLUSH_INTERVAL
+            )
+
+    def take(self) -> list[SearchQuery]:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            rows, self._rows = self._rows, []
+            return rows
+
+    def flush(self):
+        rows = self.take()
+        if not rows:
+            return
+        try:
+            SearchQuery.objects.bulk_create(rows, batch_size=500)
+        except DatabaseError as e:
+            logger.error(
+                f"Dropped {len(rows)} search queries, writing them failed: {e}"
+            )
+            return
+        logger.info(f"Wrote {len(rows)} search queries")
+
+    def flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # No request closes the connection of the timer's thread
+            connection.close()
+
+    def clear(self):
+        self.take()
+
+    def __len__(self):
+        return len(self._rows)
+
+
+search_log = SearchLogBuffer()
+atexit.register(search_log.flush)
+
+if uwsgi is not None:
+    # uWSGI workers can be stopped without running Python's atexit handlers
+    uwsgi_atexit = getattr(uwsgi, "atexit", None)
+
+    def flush_search_log_at_uwsgi_exit():
+        search_log.flush()
+        if uwsgi_atexit is not None:
+            uwsgi_atexit()
+
+    uwsgi.atexit = flush_search_log_at_uwsgi_exit
+
+
+def flush_search_log_if_due(**kwargs):
+    if search_log.is_due():
+        search_log.flush()
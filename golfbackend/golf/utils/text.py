@@ -0,0 +1,54 @@
+import re
+import unicodedata
+
+# Letters that do not decompose into a base letter and an accent
+LETTER_REPLACEMENTS = str.maketrans({"ø": "o", "æ": "ae", "å": "a", "ß": "ss"})
+_non_word_re = re.compile(r"[^\w]+")
+# Words shared by most club names, which say nothing about what a user searched for
+GENERIC_CLUB_WORDS = {"golfklubb", "golf", "gk", "klubb", "golfbane", "club", "og"}
+
+
+def fold_letters(text: str) -> str:
+    """
+    Case-folds text and maps accented and Norwegian letters to ASCII.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold().translate(LETTER_REPLACEMENTS))
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def normalize_name(text: str) -> str:
+    """
+    Folds a place or club name to a lookup key: case-folded, accents and
+    Norwegian letters mapped to ASCII, punctuation dropped and whitespace collapsed.
+
+    E.g. " Bærum  Golfklubb " and "baerum golfklubb" both give "baerum golfklubb".
+    """
+    return " ".join(_non_word_re.sub(" ", fold_letters(text)).split())
+
+
+def prepare_query(query_text: str) -> str:
+    """
+    Folds a query to lower case ASCII words, keeping separators inside numbers such
+    as "10:30", "20.10.2026", "2026-10-20" and "3pm-6pm".
+
+    Queries preparing to the same text mean the same, so it is also the key parses
+    are reused by.
+    """
+    # "før" (before) folds to "for", which means something else
+    text = re.sub(r"\bfør\b", " before ", query_text.casefold())
+    text = fold_letters(text).replace(",-", " kr ")
+    text = re.sub(r"[^\w.,:/-]+", " ", text)
+    text = re.sub(r"(?<!\d)[.,:/]|[.,:/](?!\d)|(?<![\dm])-|-(?!\d)", " ", text)
+    return " ".join(text.split())
+
+
+def get_club_keywords(name: str) -> list[str]:
+    """
+    The distinctive words of a club name, to look for in search queries.
+    """
+    words = [
+        word
+        for word in name.lower().replace("-", " ").split()
+        if len(word) > 2 and word not in GENERIC_CLUB_WORDS
+    ]
+    return words or [name.lower()]
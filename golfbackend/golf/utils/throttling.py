@@ -0,0 +1,89 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens are refilled continuously at `rate` tokens per second up to `capacity`.
+    `acquire` blocks until a token is available. `clock` and `sleep` can be
+    replaced, to control time in tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.capacity)
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class HostThrottle:
+    """
+    Limits requests per host, both in concurrency and in rate.
+
+    Every host gets its own semaphore of size `max_concurrent` and its own
+    token bucket refilled at `rate` requests per second with room for `burst`.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        max_concurrent: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max(1, max_concurrent)
+        self.clock = clock
+        self.sleep = sleep
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _get_host_limits(self, host: str):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (
+                    threading.BoundedSemaphore(self.max_concurrent),
+                    TokenBucket(self.rate, self.burst, self.clock, self.sleep),
+                )
+            return self._hosts[host]
+
+    @contextmanager
+    def limit(self, url: str):
+        semaphore, bucket = self._get_host_limits(urlsplit(url).netloc)
+        with semaphore:
+            bucket.acquire()
+            yield
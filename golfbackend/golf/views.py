@@ -1,13 +1,40 @@
+import asyncio
+from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import GolfClub, GolfCourse, SearchQuery, TeeTime
-from .serializers import GolfClubSerializer, GolfCourseSerializer, TeeTimeSerializer
-from django.http import JsonResponse, Http404
-from .utils.openai_utils import parse_tee_time_query
-from .utils.query_utils import sort_queryset_by_distance, get_or_geocode_location
+from .models import GolfClub, GolfCourse, TeeTime
+from .serializers import (
+    GolfClubSerializer,
+    GolfCourseSerializer,
+    TEE_TIME_SHAPES,
+    get_tee_time_rows,
+    get_tee_times_capacity_counts,
+    serialize_tee_time_page,
+    serialize_tee_time_rows,
+)
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from .renderers import FastJSONRenderer, iter_json_results
+from .utils.openai_utils import aparse_tee_time_query, parse_tee_time_query
+from .utils.search import (
+    aresolve_location,
+    find_club_id,
+    find_club_id_in_worker,
+    get_result_count,
+    get_search_request_error,
+    log_search_query,
+    resolve_location,
+    search_tee_times,
+)
 import logging
+import time
 from django.core.paginator import Paginator
 from django.utils import timezone
+from datetime import datetime
+from .utils.local_time import local_day_bounds
+from .utils.pagination import InvalidCursor, is_cursor_request, paginate_by_cursor
+from .utils.response_cache import versioned_cache_response
 
 logger = logging.getLogger("default")
 
@@ -15,7 +42,11 @@ logger = logging.getLogger("default")
 @api_view(["GET"])
 def get_golf_clubs(request):
     golf_clubs = GolfClub.objects.all().prefetch_related("golf_courses")
-    serializer = GolfClubSerializer(golf_clubs, many=True)
+    serializer = GolfClubSerializer(
+        golf_clubs,
+        many=True,
+        context={"tee_times_capacity_counts": get_tee_times_capacity_counts()},
+    )
     return Response(serializer.data)
 
 
@@ -27,7 +58,7 @@ def get_golf_club(request, club_id):
         raise Http404("Golf club does not exist")
 
     serializer = GolfClubSerializer(golf_club)
-    return JsonResponse(serializer.data)
+    return Response(serializer.data)
 
 
 @api_view(["GET"])
@@ -38,22 +69,45 @@ def get_golf_courses(request, club_id):
 
 
 @api_view(["GET"])
-def get_times(request, course_id, date_str):
+def get_times(request, course_id, date):
+    try:
+        day_start, day_end = local_day_bounds(
+            datetime.strptime(date, "%Y-%m-%d").date()
+        )
+    except ValueError:
+        return Response({"error": "Date must be on the format YYYY-MM-DD"}, status=400)
     times = TeeTime.objects.filter(
-        golf_course__course_id=course_id, time__date=date_str
+        golf_course__course_id=course_id, time__gte=day_start, time__lt=day_end
     )
     # Filter out past tee times using current time, not just date
     now = timezone.now()
-    times = times.filter(time__gte=now).select_related(
-        "golf_course", "golf_course__golf_club"
-    )
-    serializer = TeeTimeSerializer(times, many=True)
-    return Response(serializer.data)
+    times = get_tee_time_rows(times.filter(time__gte=now).order_by("time"))
+    return Response(serialize_tee_time_rows(times))
 
 
 @api_view(["GET"])
+@versioned_cache_response(
+    [
+        "date",
+        "slotsAvailable",
+        "maxPrice",
+        "timeRange",
+        "golfClubId",
+        "page",
+        "pagination",
+        "cursor",
+        "includeTotal",
+        "shape",
+        "stream",
+    ]
+)
 def tee_times(request):
     query_dict = request.GET
+    shape = query_dict.get("shape", "full")
+    if shape not in TEE_TIME_SHAPES:
+        return Response(
+            {"error": f"shape must be one of {', '.join(TEE_TIME_SHAPES)}"}, status=400
+        )
     parsed_query = {
         "date": query_dict.get("date"),
         "players_count": query_dict.get("slotsAvailable"),
@@ -67,21 +121,43 @@ def tee_times(request):
 
     # Ensure we only get tee times from current time or future, not just current date
     now = timezone.now()
-    tee_times_qs = (
-        TeeTime.objects.filter(filters)
-        .filter(time__gte=now)
-        .select_related("golf_course", "golf_course__golf_club")
-        .order_by("time")
+    tee_times_qs = get_tee_time_rows(
+        TeeTime.objects.filter(filters).filter(time__gte=now).order_by("time")
     )
 
+    if query_dict.get("stream") == "true":
+        if shape != "full":
+            return Response(
+                {"error": "stream=true only supports the full shape"}, status=400
+            )
+        # Matching tee times up to a cap, read and encoded in chunks so memory
+        # stays flat
+        tee_times_qs = tee_times_qs[: settings.TEE_TIME_STREAM_MAX_RESULTS]
+        return StreamingHttpResponse(
+            iter_json_results(
+                tee_times_qs.iterator(chunk_size=2000), serialize_tee_time_rows
+            ),
+            content_type="application/json",
+        )
+
+    if is_cursor_request(query_dict):
+        try:
+            page, pagination = paginate_by_cursor(
+                query_dict, tee_times_qs, ["time", "id"], 500
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(
+            {**serialize_tee_time_page(page, shape), "pagination": pagination}
+        )
+
     paginator = Paginator(tee_times_qs, 500)
     page_number = request.GET.get("page", 1)
     page_obj = paginator.get_page(page_number)
 
-    serializer = TeeTimeSerializer(page_obj, many=True)
     return Response(
         {
-            "results": serializer.data,
+            **serialize_tee_time_page(page_obj, shape),
             "pagination": {
                 "total_results": paginator.count,
                 "total_pages": paginator.num_pages,
@@ -99,76 +175,75 @@ def search_for_tee_time(request):
     Search for tee times using natural language query processed by OpenAI.
 
     Example query: "I want to play golf tomorrow afternoon near oslo with two other people"
+
+    Pass radiusKm to only return tee times of clubs within that many km of the location.
     """
-    query = request.GET.get("query", "")
-    if not query:
-        return Response({"error": "Query parameter is required"}, status=400)
-    SearchQuery.objects.create(query=query)
+    started = time.perf_counter()
+    error = get_search_request_error(request.GET)
+    if error:
+        return Response({"error": error}, status=400)
+    query = request.GET["query"]
     parsed_query = parse_tee_time_query(query)
 
     logger.info(f"Parsed query: {parsed_query}")
     if "error" in parsed_query:
+        log_search_query(query, parsed_query, started)
         return Response({"error": parsed_query["error"]}, status=500)
 
     # Attempt to find golf club ID based on parsed location or golf_club name
-    club_identifier = parsed_query.get("golf_club") or parsed_query.get("location")
-    if club_identifier:
-        try:
-            found_club = GolfClub.objects.filter(
-                name__icontains=club_identifier
-            ).first()
-            if found_club:
-                parsed_query["golf_club_id"] = found_club.club_id
-                logger.info(
-                    f"Found matching GolfClub ID: {found_club.club_id} for identifier: '{club_identifier}'"
-                )
-        except Exception as e:
-            logger.error(
-                f"Error looking up GolfClub for identifier '{club_identifier}': {e}"
-            )
+    golf_club_id = find_club_id(parsed_query)
+    if golf_club_id:
+        parsed_query["golf_club_id"] = golf_club_id
+    target_lat, target_lon = resolve_location(parsed_query)
 
-    target_lat = None
-    target_lon = None
-    if parsed_query.get("location"):
-        location_query = parsed_query["location"]
-        logger.info(
-            f"Attempting to resolve coordinates for location: '{location_query}'"
-        )
-        target_lat, target_lon = get_or_geocode_location(location_query)
-        if target_lat is None and target_lon is None:
-            logger.warning(
-                f"Could not resolve coordinates for location: '{location_query}'. "
-                f"Proceeding without distance sorting."
-            )
-
-    filters = TeeTime.apply_filters(parsed_query)
-
-    # Ensure we only get tee times from current time or future, not just current date
-    now = timezone.now()
-    base_queryset = (
-        TeeTime.objects.filter(filters)
-        .filter(time__gte=now)
-        .select_related("golf_course", "golf_course__golf_club")
+    try:
+        data = search_tee_times(request.GET, parsed_query, target_lat, target_lon)
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=400)
+    log_search_query(query, parsed_query, started, get_result_count(data))
+    return Response(data)
+
+
+def render_json(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type="application/json",
+        status=status,
     )
 
-    tee_times = sort_queryset_by_distance(base_queryset, target_lat, target_lon)
 
-    paginator = Paginator(tee_times, 100)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+@require_GET
+async def search_for_tee_time_async(request):
+    """
+    Async version of search_for_tee_time, for serving under ASGI.
 
-    serializer = TeeTimeSerializer(page_obj, many=True)
+    The OpenAI and Google calls don't hold a worker while waiting. The club lookup
+    runs on a worker thread, concurrently with the location lookup and geocoding.
+    """
+    started = time.perf_counter()
+    error = get_search_request_error(request.GET)
+    if error:
+        return render_json({"error": error}, status=400)
+    query = request.GET["query"]
+    parsed_query = await aparse_tee_time_query(query)
 
-    return Response(
-        {
-            "parsed_query": parsed_query,
-            "results": serializer.data,
-            "pagination": {
-                "total_results": paginator.count,
-                "total_pages": paginator.num_pages,
-                "current_page": page_obj.number,
-                "has_next": page_obj.has_next(),
-                "has_previous": page_obj.has_previous(),
-            },
-        }
+    logger.info(f"Parsed query: {parsed_query}")
+    if "error" in parsed_query:
+        log_search_query(query, parsed_query, started)
+        return render_json({"error": parsed_query["error"]}, status=500)
+
+    golf_club_id, (target_lat, target_lon) = await asyncio.gather(
+        sync_to_async(find_club_id_in_worker, thread_sensitive=False)(parsed_query),
+        aresolve_location(parsed_query),
     )
+    if golf_club_id:
+        parsed_query["golf_club_id"] = golf_club_id
+
+    try:
+        data = await sync_to_async(search_tee_times)(
+            request.GET, parsed_query, target_lat, target_lon
+        )
+    except InvalidCursor as e:
+        return render_json({"error": str(e)}, status=400)
+    log_search_query(query, parsed_query, started, get_result_count(data))
+    return render_json(data)
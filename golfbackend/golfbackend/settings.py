@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "golf.middleware.CompressionMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -84,6 +85,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# File based so the scrape commands and the web workers share the data version
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / "cache")),
+    }
+}
+# Seconds a cached API response is served, results also depend on the current time
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", "60"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -166,10 +183,51 @@ CORS_ALLOW_HEADERS = [
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "golf.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+# Most tee times a stream=true tee time listing returns, use cursor pagination for more
+TEE_TIME_STREAM_MAX_RESULTS = int(
+    os.environ.get("TEE_TIME_STREAM_MAX_RESULTS", "10000")
+)
+
 
 GOOGLE_MAPS_API_TOKEN = os.environ.get("GOOGLE_MAPS_API_TOKEN", "")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 MOCK_OPENAI_CALL = os.environ.get("MOCK_OPENAI_CALL", "False") == "True"
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "20"))
+# Share of a search query the rule based parser must understand to skip OpenAI
+LOCAL_PARSE_MIN_CONFIDENCE = float(os.environ.get("LOCAL_PARSE_MIN_CONFIDENCE", "0.9"))
+# Seconds a parsed search query is reused in process
+PARSE_CACHE_TIMEOUT = int(os.environ.get("PARSE_CACHE_TIMEOUT", str(6 * 60 * 60)))
+# Searches are logged in bulk, once this many are buffered or the oldest is this old,
+# which is also the most a killed worker can lose
+SEARCH_LOG_BATCH_SIZE = int(os.environ.get("SEARCH_LOG_BATCH_SIZE", "50"))
+SEARCH_LOG_FLUSH_INTERVAL = float(os.environ.get("SEARCH_LOG_FLUSH_INTERVAL", "5"))
+GEOCODE_TIMEOUT = float(os.environ.get("GEOCODE_TIMEOUT", "5"))
+# Seconds before a location Google could not geocode is looked up again
+GEOCODE_NEGATIVE_TTL = int(os.environ.get("GEOCODE_NEGATIVE_TTL", str(24 * 60 * 60)))
+# Seconds before in-process club indexes pick up changes of other processes
+CLUB_INDEX_TTL = int(os.environ.get("CLUB_INDEX_TTL", "600"))
+
+# GolfBox scraping politeness budget
+GOLFBOX_SCRAPE_WORKERS = int(os.environ.get("GOLFBOX_SCRAPE_WORKERS", "8"))
+GOLFBOX_REQUESTS_PER_SECOND = float(os.environ.get("GOLFBOX_REQUESTS_PER_SECOND", "4"))
+GOLFBOX_REQUEST_BURST = int(os.environ.get("GOLFBOX_REQUEST_BURST", "4"))
+GOLFBOX_MAX_CONCURRENT_PER_HOST = int(
+    os.environ.get("GOLFBOX_MAX_CONCURRENT_PER_HOST", "4")
+)
+GOLFBOX_REQUEST_TIMEOUT = float(os.environ.get("GOLFBOX_REQUEST_TIMEOUT", "20"))
+GOLFBOX_REQUEST_RETRIES = int(os.environ.get("GOLFBOX_REQUEST_RETRIES", "3"))
+GOLFBOX_REQUEST_BACKOFF = float(os.environ.get("GOLFBOX_REQUEST_BACKOFF", "0.5"))
+# Seconds to wait before logging in again after GolfBox rejected a login
+GOLFBOX_LOGIN_BACKOFF = float(os.environ.get("GOLFBOX_LOGIN_BACKOFF", "300"))
+# One of "html.parser", "lxml", "selectolax" or "streaming", checked against the
+# saved grid pages in golf/testdata/grid_pages by GridParserTests
+GOLFBOX_GRID_PARSER = os.environ.get("GOLFBOX_GRID_PARSER", "html.parser")
 
 LOGGING = {
     "version": 1,